@@ -22,12 +22,14 @@ import time
 
 from grakn.client import GraknClient
 
+from kglib.kgcn.pipeline.cache import GraphCache, fingerprint
 from kglib.kgcn.pipeline.pipeline import pipeline
 from kglib.utils.grakn.synthetic.examples.diagnosis.generate import generate_example_graphs
-from kglib.utils.grakn.type.type import get_thing_types, get_role_types
+from kglib.utils.grakn.object.thing import ThingCache
+from kglib.utils.grakn.type.type import get_thing_types, get_role_types, SchemaCache
 from kglib.utils.graph.iterate import multidigraph_data_iterator
 from kglib.utils.graph.query.query_graph import QueryGraph
-from kglib.utils.graph.thing.queries_to_graph import build_graph_from_queries
+from kglib.utils.graph.thing.queries_to_graph import iterate_graphs_for_examples
 
 KEYSPACE = "diagnosis"
 URI = "localhost:48555"
@@ -61,7 +63,9 @@ def diagnosis_example(num_graphs=200,
                       num_processing_steps_tr=5,
                       num_processing_steps_ge=5,
                       num_training_iterations=1000,
-                      keyspace=KEYSPACE, uri=URI):
+                      keyspace=KEYSPACE, uri=URI,
+                      cache_dir=None,
+                      cache_max_bytes=None):
     """
     Run the diagnosis example from start to finish, including traceably ingesting predictions back into Grakn
 
@@ -72,6 +76,9 @@ def diagnosis_example(num_graphs=200,
         num_training_iterations: The number of training epochs
         keyspace: The name of the keyspace to retrieve example subgraphs from
         uri: The uri of the running Grakn instance
+        cache_dir: Optional directory to cache the preprocessed graphs in. When the queries, examples, types and the
+            server's example data are unchanged since a previous run, the example data isn't extracted from Grakn again
+        cache_max_bytes: The most bytes for the cache to take up on disk, evicting the least recently used entries
 
     Returns:
         Final accuracies for training and for testing
@@ -79,13 +86,9 @@ def diagnosis_example(num_graphs=200,
 
     tr_ge_split = int(num_graphs*0.5)
 
-    generate_example_graphs(num_graphs, keyspace=keyspace, uri=uri)
-
     client = GraknClient(uri=uri)
     session = client.session(keyspace=keyspace)
 
-    graphs = create_concept_graphs(list(range(num_graphs)), session)
-
     with session.transaction().read() as tx:
         # Change the terminology here onwards from thing -> node and role -> edge
         node_types = get_thing_types(tx)
@@ -96,7 +99,22 @@ def diagnosis_example(num_graphs=200,
         print(f'Found node types: {node_types}')
         print(f'Found edge types: {edge_types}')
 
-    ge_graphs, solveds_tr, solveds_ge = pipeline(graphs,
+    example_indices = list(range(num_graphs))
+
+    # The example data must exist whether or not the graphs are taken from the cache, since predictions are written
+    # back to its concepts
+    anchor_ids = ensure_example_graphs(example_indices, session, keyspace=keyspace, uri=uri)
+
+    def create_graphs():
+        return iterate_concept_graphs(example_indices, session)
+
+    cache = None
+    cache_key = None
+    if cache_dir is not None:
+        cache = GraphCache(cache_dir, max_bytes=cache_max_bytes)
+        cache_key = concept_graphs_fingerprint(example_indices, node_types, edge_types, keyspace, uri, anchor_ids)
+
+    ge_graphs, solveds_tr, solveds_ge = pipeline(create_graphs,
                                                  tr_ge_split,
                                                  node_types,
                                                  edge_types,
@@ -105,7 +123,9 @@ def diagnosis_example(num_graphs=200,
                                                  num_training_iterations=num_training_iterations,
                                                  continuous_attributes=CONTINUOUS_ATTRIBUTES,
                                                  categorical_attributes=CATEGORICAL_ATTRIBUTES,
-                                                 output_dir=f"./events/{time.time()}/")
+                                                 output_dir=f"./events/{time.time()}/",
+                                                 cache=cache,
+                                                 cache_key=cache_key)
 
     with session.transaction().write() as tx:
         write_predictions_to_grakn(ge_graphs, tx)
@@ -116,33 +136,121 @@ def diagnosis_example(num_graphs=200,
     return solveds_tr, solveds_ge
 
 
-def create_concept_graphs(example_indices, grakn_session):
+def create_concept_graphs(example_indices, grakn_session, num_workers=4, schema_path=None):
     """
     Builds an in-memory graph for each example, with an example_id as an anchor for each example subgraph.
     Args:
         example_indices: The values used to anchor the subgraph queries within the entire knowledge graph
         grakn_session: Grakn Session
+        num_workers: The number of examples to build graphs for concurrently
+        schema_path: Optional path of a JSON file to read the schema's type information from, or to write it to if
+            the file doesn't exist yet. If None, the type information is queried afresh
 
     Returns:
         In-memory graphs of Grakn subgraphs
     """
+    return list(iterate_concept_graphs(example_indices, grakn_session, num_workers=num_workers,
+                                       schema_path=schema_path))
+
 
-    graphs = []
-    infer = True
+def iterate_concept_graphs(example_indices, grakn_session, num_workers=4, schema_path=None):
+    """
+    Builds the same graphs as `create_concept_graphs`, but yields each one as soon as it is built, so that they can be
+    preprocessed one at a time rather than all being held in memory. Arguments are as for `create_concept_graphs`
 
-    for example_id in example_indices:
-        print(f'Creating graph for example {example_id}')
-        graph_query_handles = get_query_handles(example_id)
+    Returns:
+        Generator of in-memory graphs of Grakn subgraphs, in the order of `example_indices`
+    """
+
+    # Look up the type information of every concept locally rather than asking the server
+    if schema_path is None:
         with grakn_session.transaction().read() as tx:
-            # Build a graph from the queries, samplers, and query graphs
-            graph = build_graph_from_queries(graph_query_handles, tx, infer=infer)
+            schema = SchemaCache.from_transaction(tx)
+    else:
+        schema = SchemaCache.load_or_create(schema_path, grakn_session)
 
-        obfuscate_labels(graph, TYPES_AND_ROLES_TO_OBFUSCATE)
+    def report_progress(example_id, num_completed, num_examples):
+        print(f'Created graph for example {example_id} ({num_completed}/{num_examples})')
+
+    # Build a graph from the queries, samplers, and query graphs for each example
+    graphs = iterate_graphs_for_examples(example_indices, get_query_handles, grakn_session, num_workers=num_workers,
+                                         infer=True, progress_callback=report_progress,
+                                         thing_cache=ThingCache(schema=schema))
 
+    for example_id, graph in zip(example_indices, graphs):
+        obfuscate_labels(graph, TYPES_AND_ROLES_TO_OBFUSCATE)
         graph.name = example_id
-        graphs.append(graph)
+        yield graph
+
 
-    return graphs
+def example_anchor_ids(example_indices, grakn_session):
+    """
+    Finds the concepts that anchor each example's subgraph, the people with the example's example-id
+
+    Args:
+        example_indices: The example-id values of the examples
+        grakn_session: Grakn Session
+
+    Returns:
+        Dict of the sorted concept ids of each example's anchors, keyed by example-id. Examples that don't exist in
+        the keyspace are left out
+    """
+    wanted_indices = set(example_indices)
+    anchor_ids = {}
+    with grakn_session.transaction().read() as tx:
+        for answer in tx.query('match $p isa person, has example-id $e; get;'):
+            concepts = answer.map()
+            example_id = concepts['e'].value()
+            if example_id in wanted_indices:
+                anchor_ids.setdefault(example_id, []).append(concepts['p'].id)
+    return {example_id: sorted(ids) for example_id, ids in anchor_ids.items()}
+
+
+def ensure_example_graphs(example_indices, grakn_session, keyspace=KEYSPACE, uri=URI):
+    """
+    Generates the example data in Grakn if any of the examples are missing from it
+
+    Args:
+        example_indices: The example-id values of the examples, which must be `range(num_graphs)`
+        grakn_session: Grakn Session for the keyspace
+        keyspace: The name of the keyspace to generate the examples in
+        uri: The uri of the running Grakn instance
+
+    Returns:
+        The anchor concept ids of the examples, as given by `example_anchor_ids`
+    """
+    anchor_ids = example_anchor_ids(example_indices, grakn_session)
+    if len(anchor_ids) < len(example_indices):
+        generate_example_graphs(len(example_indices), keyspace=keyspace, uri=uri)
+        anchor_ids = example_anchor_ids(example_indices, grakn_session)
+    return anchor_ids
+
+
+def concept_graphs_fingerprint(example_indices, node_types, edge_types, keyspace, uri, anchor_ids):
+    """
+    Fingerprints everything that determines the preprocessed graphs of the examples: the queries and query graphs of
+    each example, the types, attributes and labels that the graphs are encoded with, and the data they are extracted
+    from. The cached graphs hold the concept ids assigned by the server, so the keyspace, the uri and the anchor
+    concept ids of the examples are included, which change whenever the data is loaded afresh
+
+    Args:
+        example_indices: The example-id values of the examples
+        node_types: The types of the nodes to encode
+        edge_types: The types of the edges to encode
+        keyspace: The name of the keyspace the examples are extracted from
+        uri: The uri of the Grakn instance the examples are extracted from
+        anchor_ids: The anchor concept ids of the examples, as given by `example_anchor_ids`
+
+    Returns:
+        Key for the preprocessed graphs in a GraphCache
+    """
+    query_handles = [[[query, sorted(map(str, query_graph.nodes(data=True))),
+                       sorted(map(str, query_graph.edges(data=True)))]
+                      for query, _, query_graph in get_query_handles(example_id)]
+                     for example_id in example_indices]
+    data_marker = [[keyspace, uri], sorted([example_id, ids] for example_id, ids in anchor_ids.items())]
+    return fingerprint(query_handles, example_indices, node_types, edge_types, CATEGORICAL_ATTRIBUTES,
+                       CONTINUOUS_ATTRIBUTES, TYPES_AND_ROLES_TO_OBFUSCATE, data_marker)
 
 
 def obfuscate_labels(graph, types_and_roles_to_obfuscate):
@@ -18,14 +18,18 @@
 #
 
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import grakn.client
 import networkx as nx
 import numpy as np
 
-from kglib.kgcn.examples.diagnosis.diagnosis import write_predictions_to_grakn, obfuscate_labels
+from kglib.kgcn.examples.diagnosis.diagnosis import write_predictions_to_grakn, obfuscate_labels, \
+    example_anchor_ids, ensure_example_graphs, concept_graphs_fingerprint
 from kglib.utils.grakn.object.thing import Thing
+from kglib.utils.grakn.test.mock.answer import MockConceptMap
+from kglib.utils.grakn.test.mock.concept import MockType, MockAttributeType, MockThing, MockAttribute
+from kglib.utils.grakn.test.mock.session import MockSession
 from kglib.utils.graph.test.case import GraphTestCase
 
 
@@ -119,6 +123,64 @@ class TestObfuscateLabels(GraphTestCase):
         self.assertGraphsEqual(graph, expected_graph)
 
 
+ANCHOR_QUERY = 'match $p isa person, has example-id $e; get;'
+
+
+def anchor_answers(anchor_ids_for_examples):
+    person_type = MockType('V1', 'person', 'ENTITY')
+    example_id_type = MockAttributeType('V2', 'example-id', 'ATTRIBUTE', 'LONG')
+    return [MockConceptMap({'p': MockThing(anchor_id, person_type),
+                            'e': MockAttribute(f'V{example_id}e', example_id, example_id_type)})
+            for example_id, anchor_id in anchor_ids_for_examples]
+
+
+class TestExampleAnchorIds(unittest.TestCase):
+
+    def test_anchor_ids_found_for_wanted_examples_only(self):
+        session = MockSession({ANCHOR_QUERY: anchor_answers([(0, 'V10'), (1, 'V11'), (10001, 'V12')])})
+
+        self.assertEqual({0: ['V10'], 1: ['V11']}, example_anchor_ids([0, 1, 2], session))
+
+
+class TestEnsureExampleGraphs(unittest.TestCase):
+
+    @patch('kglib.kgcn.examples.diagnosis.diagnosis.generate_example_graphs')
+    def test_examples_not_generated_when_present(self, mock_generate):
+        session = MockSession({ANCHOR_QUERY: anchor_answers([(0, 'V10'), (1, 'V11')])})
+
+        anchor_ids = ensure_example_graphs([0, 1], session, keyspace='ks', uri='host:1')
+
+        mock_generate.assert_not_called()
+        self.assertEqual({0: ['V10'], 1: ['V11']}, anchor_ids)
+
+    @patch('kglib.kgcn.examples.diagnosis.diagnosis.generate_example_graphs')
+    def test_examples_generated_when_missing(self, mock_generate):
+        session = MockSession({ANCHOR_QUERY: anchor_answers([(0, 'V10')])})
+
+        ensure_example_graphs([0, 1], session, keyspace='ks', uri='host:1')
+
+        mock_generate.assert_called_once_with(2, keyspace='ks', uri='host:1')
+
+
+class TestConceptGraphsFingerprint(unittest.TestCase):
+
+    def fingerprint(self, keyspace='diagnosis', uri='localhost:48555', anchor_ids=None):
+        if anchor_ids is None:
+            anchor_ids = {0: ['V10'], 1: ['V11']}
+        return concept_graphs_fingerprint([0, 1], ['person'], ['patient'], keyspace, uri, anchor_ids)
+
+    def test_fingerprint_is_stable(self):
+        self.assertEqual(self.fingerprint(), self.fingerprint())
+
+    def test_fingerprint_changes_with_keyspace(self):
+        self.assertNotEqual(self.fingerprint(), self.fingerprint(keyspace='other'))
+
+    def test_fingerprint_changes_with_uri(self):
+        self.assertNotEqual(self.fingerprint(), self.fingerprint(uri='otherhost:48555'))
+
+    def test_fingerprint_changes_when_data_is_reloaded(self):
+        self.assertNotEqual(self.fingerprint(), self.fingerprint(anchor_ids={0: ['V20'], 1: ['V21']}))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,174 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import numpy as np
+
+from kglib.kgcn.learn.feed import create_graphs_tuples
+
+
+def segment_indices(offsets, sizes, segments):
+    """
+    Finds the indices of all of the elements belonging to the given segments of a flat array, in the order the segments
+    are given
+
+    Args:
+        offsets: The index of the first element of every segment
+        sizes: The number of elements in every segment
+        segments: The segments to find the element indices of
+
+    Returns:
+        Integer array of indices into the flat array
+    """
+    starts = offsets[segments]
+    lengths = sizes[segments]
+    batch_offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - batch_offsets, lengths) + np.arange(np.sum(lengths))
+
+
+class GraphsTupleBatcher:
+    """
+    Provides mini-batches of graphs from input and target GraphsTuples holding the whole dataset. The graphs are packed
+    into concatenated numpy arrays once, and batches are sliced out of those arrays by their offsets, rather than
+    being rebuilt from networkx graphs.
+
+    Batches are drawn from a shuffled ordering of the graphs, which is re-shuffled at the start of every epoch. Every
+    graph is seen exactly once per epoch.
+    """
+
+    def __init__(self, input_graphs, target_graphs, batch_size, shuffle=True, seed=1):
+        """
+        Args:
+            input_graphs: GraphsTuple of numpy arrays containing all of the input graphs
+            target_graphs: GraphsTuple of numpy arrays containing all of the target graphs, with the same structure
+                as `input_graphs`
+            batch_size: The maximum number of graphs in each batch. The last batch of an epoch may be smaller
+            shuffle: Whether to shuffle the order of the graphs each epoch
+            seed: Seed for the shuffling, so that the sequence of batches is deterministic
+        """
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least 1, but got {batch_size}')
+
+        if not (np.array_equal(input_graphs.n_node, target_graphs.n_node)
+                and np.array_equal(input_graphs.n_edge, target_graphs.n_edge)):
+            raise ValueError('The input and target graphs must have the same structure')
+
+        self._input_graphs = input_graphs
+        self._target_graphs = target_graphs
+        self._batch_size = batch_size
+        self._shuffle = shuffle
+        self._random_state = np.random.RandomState(seed)
+
+        n_node = input_graphs.n_node
+        n_edge = input_graphs.n_edge
+        self._node_offsets = np.cumsum(n_node) - n_node
+        self._edge_offsets = np.cumsum(n_edge) - n_edge
+
+        self._epoch = 0
+        self._order = None
+        self._position = 0
+        self._start_epoch()
+
+    @classmethod
+    def from_graphs(cls, input_graphs, target_graphs, batch_size, shuffle=True, seed=1):
+        """
+        Packs input and target graphs, either networkx graphs or ColumnarGraphs, into GraphsTuples, and creates a
+        batcher over them
+        """
+        input_graphs_tuple, target_graphs_tuple = create_graphs_tuples(input_graphs, target_graphs)
+        return cls(input_graphs_tuple, target_graphs_tuple, batch_size, shuffle=shuffle, seed=seed)
+
+    @property
+    def num_graphs(self):
+        return len(self._input_graphs.n_node)
+
+    @property
+    def batches_per_epoch(self):
+        return -(-self.num_graphs // self._batch_size)
+
+    @property
+    def epoch(self):
+        """The number of complete passes made over the graphs"""
+        return self._epoch
+
+    def _start_epoch(self):
+        if self._shuffle:
+            self._order = self._random_state.permutation(self.num_graphs)
+        else:
+            self._order = np.arange(self.num_graphs)
+        self._position = 0
+
+    def _start_next_epoch_if_complete(self):
+        if self._position >= self.num_graphs:
+            self._epoch += 1
+            self._start_epoch()
+
+    def next_batch(self):
+        """
+        Gets the next batch of graphs, moving on to a new epoch once all of the graphs have been seen
+
+        Returns:
+            Input and target GraphsTuples for the batch
+        """
+        self._start_next_epoch_if_complete()
+        graph_indices = self._order[self._position:self._position + self._batch_size]
+        self._position += self._batch_size
+        return self.batch(graph_indices)
+
+    def epoch_batches(self):
+        """
+        Iterates over the batches for the remainder of the current epoch, or for the whole of the next epoch if the
+        current one is complete
+        """
+        self._start_next_epoch_if_complete()
+        while self._position < self.num_graphs:
+            yield self.next_batch()
+
+    def batch(self, graph_indices):
+        """
+        Slices the given graphs out of the packed GraphsTuples
+
+        Args:
+            graph_indices: Indices of the graphs to include in the batch, in order
+
+        Returns:
+            Input and target GraphsTuples for the batch
+        """
+        graph_indices = np.asarray(graph_indices)
+        n_node = self._input_graphs.n_node[graph_indices]
+        n_edge = self._input_graphs.n_edge[graph_indices]
+
+        node_indices = segment_indices(self._node_offsets, self._input_graphs.n_node, graph_indices)
+        edge_indices = segment_indices(self._edge_offsets, self._input_graphs.n_edge, graph_indices)
+
+        # Senders and receivers index into the packed nodes, so move them to index into the batch's nodes instead
+        node_index_shift = np.repeat(np.cumsum(n_node) - n_node - self._node_offsets[graph_indices], n_edge)
+        senders = (self._input_graphs.senders[edge_indices] + node_index_shift).astype(np.int32)
+        receivers = (self._input_graphs.receivers[edge_indices] + node_index_shift).astype(np.int32)
+
+        def select(graphs):
+            return graphs.replace(
+                nodes=graphs.nodes[node_indices],
+                edges=graphs.edges[edge_indices],
+                globals=None if graphs.globals is None else graphs.globals[graph_indices],
+                senders=senders,
+                receivers=receivers,
+                n_node=n_node,
+                n_edge=n_edge)
+
+        return select(self._input_graphs), select(self._target_graphs)
@@ -0,0 +1,111 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import unittest
+
+import networkx as nx
+import numpy as np
+from graph_nets import utils_np
+
+from kglib.kgcn.learn.batch import GraphsTupleBatcher
+from kglib.utils.graph.columnar import ColumnarGraph
+
+
+def create_graph(num_nodes, offset):
+    graph = nx.MultiDiGraph()
+    for node in range(num_nodes):
+        graph.add_node(node, features=np.array([offset + node, 0], dtype=np.float32))
+    for node in range(num_nodes - 1):
+        graph.add_edge(node, node + 1, features=np.array([offset + node, 1], dtype=np.float32))
+        graph.add_edge(node + 1, node, features=np.array([offset + node, 2], dtype=np.float32))
+    graph.graph['features'] = np.array([offset], dtype=np.float32)
+    return graph
+
+
+class TestGraphsTupleBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self._input_graphs = [create_graph(num_nodes, 100 * i) for i, num_nodes in enumerate([3, 2, 4, 2, 5])]
+        self._target_graphs = [create_graph(num_nodes, -100 * i) for i, num_nodes in enumerate([3, 2, 4, 2, 5])]
+
+    def assertGraphsTuplesEqual(self, expected, actual):
+        for field in ['nodes', 'edges', 'globals', 'senders', 'receivers', 'n_node', 'n_edge']:
+            np.testing.assert_array_equal(getattr(expected, field), getattr(actual, field), err_msg=field)
+
+    def test_batch_matches_graphs_tuple_built_from_networkx(self):
+        batcher = GraphsTupleBatcher.from_graphs(self._input_graphs, self._target_graphs, batch_size=2)
+
+        input_batch, target_batch = batcher.batch([4, 0, 2])
+
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple(
+            [self._input_graphs[4], self._input_graphs[0], self._input_graphs[2]]), input_batch)
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple(
+            [self._target_graphs[4], self._target_graphs[0], self._target_graphs[2]]), target_batch)
+
+    def test_batch_from_columnar_graphs_matches_batch_from_networkx(self):
+        batcher = GraphsTupleBatcher.from_graphs(self._input_graphs, self._target_graphs, batch_size=2)
+        columnar_batcher = GraphsTupleBatcher.from_graphs(
+            [ColumnarGraph.from_networkx(graph) for graph in self._input_graphs],
+            [ColumnarGraph.from_networkx(graph) for graph in self._target_graphs], batch_size=2)
+
+        for expected, actual in zip(batcher.batch([1, 3, 4]), columnar_batcher.batch([1, 3, 4])):
+            self.assertGraphsTuplesEqual(expected, actual)
+
+    def test_each_graph_is_seen_once_per_epoch(self):
+        batcher = GraphsTupleBatcher.from_graphs(self._input_graphs, self._target_graphs, batch_size=2)
+
+        for epoch in range(3):
+            batches = list(batcher.epoch_batches())
+            self.assertEqual(3, len(batches))
+            self.assertEqual(epoch, batcher.epoch)
+
+            globals_seen = np.concatenate([input_batch.globals[:, 0] for input_batch, _ in batches])
+            self.assertCountEqual([0, 100, 200, 300, 400], list(globals_seen))
+
+    def test_next_batch_moves_on_to_the_next_epoch(self):
+        batcher = GraphsTupleBatcher.from_graphs(self._input_graphs, self._target_graphs, batch_size=2)
+
+        batch_sizes = []
+        for _ in range(4):
+            input_batch, _ = batcher.next_batch()
+            batch_sizes.append(len(input_batch.n_node))
+
+        self.assertEqual([2, 2, 1, 2], batch_sizes)
+        self.assertEqual(1, batcher.epoch)
+
+    def test_shuffling_is_deterministic_for_a_seed(self):
+        def globals_order(seed):
+            batcher = GraphsTupleBatcher.from_graphs(self._input_graphs, self._target_graphs, batch_size=5,
+                                                     seed=seed)
+            return [list(batcher.next_batch()[0].globals[:, 0]) for _ in range(3)]
+
+        self.assertEqual(globals_order(3), globals_order(3))
+        self.assertNotEqual(globals_order(3), globals_order(4))
+
+    def test_batches_are_in_order_when_not_shuffled(self):
+        batcher = GraphsTupleBatcher.from_graphs(self._input_graphs, self._target_graphs, batch_size=3,
+                                                 shuffle=False)
+
+        input_batch, _ = batcher.next_batch()
+
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple(self._input_graphs[:3]), input_batch)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import os
+
+import tensorflow as tf
+
+
+def save_checkpoint(sess, checkpoint_path):
+    """
+    Saves the values of all of the variables in the session's graph, including the optimiser's, so that training can
+    be resumed or the model restored for inference
+
+    Args:
+        sess: The tf.Session holding the variables
+        checkpoint_path: The path prefix to save the checkpoint files to. Its directory is created if need be
+
+    Returns:
+        The path prefix the checkpoint was saved to
+    """
+    directory = os.path.dirname(checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return tf.train.Saver().save(sess, checkpoint_path)
+
+
+def restore_checkpoint(sess, checkpoint_path):
+    """
+    Restores the variables in the session's graph from a checkpoint. Variables are matched by name, so the model must
+    be built with the same module names as when it was saved. Variables in the checkpoint that the graph doesn't have,
+    such as those of the optimiser in an inference graph, are ignored
+
+    Args:
+        sess: The tf.Session to restore the variables into
+        checkpoint_path: The path prefix of the checkpoint, or a directory, in which case its latest checkpoint is used
+    """
+    if os.path.isdir(checkpoint_path):
+        latest_checkpoint_path = tf.train.latest_checkpoint(checkpoint_path)
+        if latest_checkpoint_path is None:
+            raise ValueError(f'No checkpoint found in directory {checkpoint_path}')
+        checkpoint_path = latest_checkpoint_path
+    tf.train.Saver().restore(sess, checkpoint_path)
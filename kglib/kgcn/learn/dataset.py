@@ -0,0 +1,85 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import tensorflow as tf
+from graph_nets.graphs import GraphsTuple, ALL_FIELDS
+
+
+def graphs_tuple_signature(graphs_tuple):
+    """
+    Finds the types and shapes of the fields of a GraphsTuple of numpy arrays, leaving the number of graphs, nodes and
+    edges unknown so that batches of any size share the same signature
+
+    Args:
+        graphs_tuple: GraphsTuple of numpy arrays, with no `None` fields
+
+    Returns:
+        Dicts of the tf.DType and tf.TensorShape of each field, keyed by field name
+    """
+    types = {}
+    shapes = {}
+    for field in ALL_FIELDS:
+        value = getattr(graphs_tuple, field)
+        if value is None:
+            raise ValueError(f'GraphsTuple field "{field}" must not be None to be used in a Dataset')
+        types[field] = tf.as_dtype(value.dtype)
+        shapes[field] = tf.TensorShape([None] + list(value.shape[1:]))
+    return types, shapes
+
+
+def create_input_dataset(next_batch_fn, prefetch_batches=2):
+    """
+    Creates a Dataset of batches of input and target graphs, as an alternative to feeding placeholders. The batches are
+    concatenated GraphsTuples of varying size, so no padding is needed. The next batches are prepared in a background
+    thread while the current one is used for training.
+
+    Args:
+        next_batch_fn: Function taking no arguments which gives the next input and target GraphsTuples of numpy arrays
+            to train with. It is called indefinitely
+        prefetch_batches: The number of batches to prepare ahead of the one in use
+
+    Returns:
+        Dataset of input and target batches, each element being a pair of dicts of tensors keyed by GraphsTuple field
+    """
+    first_batch = next_batch_fn()
+    types, shapes = zip(*[graphs_tuple_signature(graphs_tuple) for graphs_tuple in first_batch])
+
+    def generator():
+        batch = first_batch
+        while True:
+            yield tuple(graphs_tuple._asdict() for graphs_tuple in batch)
+            batch = next_batch_fn()
+
+    dataset = tf.data.Dataset.from_generator(generator, output_types=types, output_shapes=shapes)
+    return dataset.prefetch(prefetch_batches)
+
+
+def graphs_tuples_from_iterator(iterator):
+    """
+    Gets the next input and target graphs from an iterator over a Dataset created by `create_input_dataset`
+
+    Args:
+        iterator: tf.data Iterator
+
+    Returns:
+        input_op: The input graphs, as a GraphsTuple of tensors
+        target_op: The target graphs, as a GraphsTuple of tensors
+    """
+    input_fields, target_fields = iterator.get_next()
+    return GraphsTuple(**input_fields), GraphsTuple(**target_fields)
@@ -0,0 +1,73 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import unittest
+
+import numpy as np
+import tensorflow as tf
+from graph_nets.graphs import GraphsTuple
+
+from kglib.kgcn.learn.dataset import create_input_dataset, graphs_tuple_signature, graphs_tuples_from_iterator
+
+
+def create_graphs_tuple(num_graphs, value):
+    return GraphsTuple(nodes=np.full((2 * num_graphs, 3), value, dtype=np.float32),
+                       edges=np.full((num_graphs, 3), value, dtype=np.float32),
+                       globals=np.zeros((num_graphs, 5), dtype=np.float32),
+                       senders=np.arange(0, 2 * num_graphs, 2, dtype=np.int32),
+                       receivers=np.arange(1, 2 * num_graphs, 2, dtype=np.int32),
+                       n_node=np.full(num_graphs, 2, dtype=np.int32),
+                       n_edge=np.full(num_graphs, 1, dtype=np.int32))
+
+
+class TestGraphsTupleSignature(unittest.TestCase):
+
+    def test_leading_dimensions_are_unknown(self):
+        types, shapes = graphs_tuple_signature(create_graphs_tuple(2, 0))
+
+        self.assertEqual(tf.float32, types['nodes'])
+        self.assertEqual(tf.int32, types['senders'])
+        self.assertEqual([None, 3], shapes['nodes'].as_list())
+        self.assertEqual([None, 5], shapes['globals'].as_list())
+        self.assertEqual([None], shapes['n_node'].as_list())
+
+    def test_exception_raised_for_none_field(self):
+        with self.assertRaises(ValueError):
+            graphs_tuple_signature(create_graphs_tuple(2, 0).replace(globals=None))
+
+
+class TestCreateInputDataset(unittest.TestCase):
+
+    def test_batches_are_given_in_order(self):
+        batches = iter([(create_graphs_tuple(i + 1, i), create_graphs_tuple(i + 1, -i)) for i in range(3)])
+
+        with tf.Graph().as_default():
+            dataset = create_input_dataset(lambda: next(batches), prefetch_batches=1)
+            input_op, target_op = graphs_tuples_from_iterator(dataset.make_one_shot_iterator())
+
+            with tf.Session() as sess:
+                for i in range(3):
+                    input_graphs, target_graphs = sess.run((input_op, target_op))
+                    np.testing.assert_array_equal(create_graphs_tuple(i + 1, i).nodes, input_graphs.nodes)
+                    np.testing.assert_array_equal(create_graphs_tuple(i + 1, -i).nodes, target_graphs.nodes)
+                    np.testing.assert_array_equal(create_graphs_tuple(i + 1, i).senders, input_graphs.senders)
+                    np.testing.assert_array_equal(create_graphs_tuple(i + 1, i).n_node, input_graphs.n_node)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import threading
+
+import tensorflow as tf
+
+
+def existence_accuracy_ops(target_op, output_op, use_nodes=True, use_edges=True):
+    """
+    Builds ops that compute the same fractions as `existence_accuracy`, but inside the TensorFlow graph, so that only
+    two scalars need be fetched from a session rather than the whole of the target and output graphs
+
+    Args:
+        target_op: GraphsTuple of the target graphs
+        output_op: GraphsTuple of the outputs of the model for the same graphs
+        use_nodes: Whether to include the nodes
+        use_edges: Whether to include the edges
+
+    Returns:
+        correct_op: The fraction of the nodes and edges to predict which are predicted correctly
+        solved_op: The fraction of graphs whose nodes and edges to predict are all predicted correctly
+    """
+    if not use_nodes and not use_edges:
+        raise ValueError("Nodes or edges (or both) must be used")
+
+    fields = []
+    if use_nodes:
+        fields.append(('nodes', 'n_node'))
+    if use_edges:
+        fields.append(('edges', 'n_edge'))
+
+    num_graphs = tf.shape(target_op.n_node)[0]
+    correct_ops = []
+    incorrect_ops = []
+    graph_index_ops = []
+    for field, count_field in fields:
+        target = getattr(target_op, field)
+        output = getattr(output_op, field)
+        counts = getattr(target_op, count_field)
+
+        # Elements which are not given as pre-existing are to be predicted. The softmax of the output doesn't change
+        # which class is most likely, so the logits are compared directly
+        to_predict = tf.equal(target[:, 0], 0)
+        matches = tf.equal(tf.argmax(target[:, 1:], axis=-1), tf.argmax(output[:, 1:], axis=-1))
+        graph_index = tf.searchsorted(tf.cumsum(counts), tf.range(tf.shape(target)[0], dtype=counts.dtype),
+                                      side='right')
+
+        correct_ops.append(tf.boolean_mask(matches, to_predict))
+        incorrect_ops.append(tf.cast(tf.logical_and(to_predict, tf.logical_not(matches)), tf.int32))
+        graph_index_ops.append(graph_index)
+
+    correct_op = tf.reduce_mean(tf.cast(tf.concat(correct_ops, axis=0), tf.float32))
+
+    # A graph is solved if none of its elements are incorrect, including if it has no elements to predict
+    incorrect_per_graph = tf.math.unsorted_segment_sum(tf.concat(incorrect_ops, axis=0),
+                                                       tf.concat(graph_index_ops, axis=0), num_graphs)
+    solved_op = tf.reduce_mean(tf.cast(tf.equal(incorrect_per_graph, 0), tf.float32))
+    return correct_op, solved_op
+
+
+class Evaluator:
+    """
+    Evaluates a model on a fixed set of graphs, such as the generalisation graphs, by running fetches with a feed dict
+    built once. The fetches are expected to be scalars computed in the graph, such as those from
+    `existence_accuracy_ops`, so that evaluation costs little beyond running the model itself.
+
+    Evaluation is either run on demand with `evaluate`, such as every few training iterations, or on a schedule in a
+    background thread started with `start`, sharing the session with training.
+    """
+
+    def __init__(self, sess, fetches, feed_dict):
+        """
+        Args:
+            sess: The session to run the fetches in
+            fetches: Dict of the ops to evaluate
+            feed_dict: Feed dict of the graphs to evaluate on
+        """
+        self._sess = sess
+        self._fetches = fetches
+        self._feed_dict = feed_dict
+        self._lock = threading.Lock()
+        self._latest = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def evaluate(self, iteration=None):
+        """
+        Runs the fetches now
+
+        Args:
+            iteration: The training iteration being evaluated, to record with the results
+
+        Returns:
+            Dict of the values of the fetches
+        """
+        values = self._sess.run(self._fetches, feed_dict=self._feed_dict)
+        with self._lock:
+            self._latest = (iteration, values)
+        return values
+
+    def latest(self):
+        """
+        Returns:
+            The training iteration and the values of the fetches from the most recent evaluation, or None if there
+            hasn't been one
+        """
+        with self._lock:
+            return self._latest
+
+    def start(self, every_seconds, current_iteration_fn):
+        """
+        Starts evaluating repeatedly in a background thread, waiting `every_seconds` between evaluations
+
+        Args:
+            every_seconds: The time to wait after each evaluation before the next
+            current_iteration_fn: Function taking no arguments, giving the current training iteration to record with
+                each evaluation
+        """
+        if self._thread is not None:
+            raise RuntimeError('The evaluator has already been started')
+
+        def evaluate_until_stopped():
+            while not self._stop_event.is_set():
+                self.evaluate(current_iteration_fn())
+                self._stop_event.wait(every_seconds)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=evaluate_until_stopped, name='evaluator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops evaluating in the background, waiting for any evaluation in progress to finish
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
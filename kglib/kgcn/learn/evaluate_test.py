@@ -0,0 +1,111 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import time
+import unittest
+
+import numpy as np
+import tensorflow as tf
+from graph_nets.graphs import GraphsTuple
+
+from kglib.kgcn.learn.evaluate import existence_accuracy_ops, Evaluator
+from kglib.kgcn.learn.metrics import existence_accuracy
+
+
+def graphs_tuple(nodes, edges, n_node, n_edge):
+    senders = np.zeros(len(edges), dtype=np.int32)
+    return GraphsTuple(nodes=np.array(nodes, dtype=np.float32), edges=np.array(edges, dtype=np.float32),
+                       globals=None, senders=senders, receivers=senders, n_node=np.array(n_node, dtype=np.int32),
+                       n_edge=np.array(n_edge, dtype=np.int32))
+
+
+def to_constants(graphs):
+    return graphs.map(tf.constant, fields=['nodes', 'edges', 'senders', 'receivers', 'n_node', 'n_edge'])
+
+
+class TestExistenceAccuracyOps(unittest.TestCase):
+
+    def setUp(self):
+        tf.reset_default_graph()
+        # Three graphs: the first is solved, the second is not, and the third has nothing to predict
+        self._target = graphs_tuple(
+            nodes=[[1, 0, 0], [0, 0, 1], [0, 1, 0], [0, 0, 1], [0, 1, 0], [1, 0, 0]],
+            edges=[[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+            n_node=[2, 3, 1], n_edge=[1, 2, 0])
+        self._output = graphs_tuple(
+            nodes=[[0, 1, 0], [0, 0, 3], [0, 2, 1], [0, 1, 0], [0, 1, 0], [0, 0, 1]],
+            edges=[[0, 1, 0], [0, 1, 0], [0, 1, 0]],
+            n_node=[2, 3, 1], n_edge=[1, 2, 0])
+
+    def test_fractions_are_as_computed_in_numpy(self):
+        for use_nodes, use_edges in [(True, True), (True, False), (False, True)]:
+            correct_op, solved_op = existence_accuracy_ops(to_constants(self._target), to_constants(self._output),
+                                                           use_nodes=use_nodes, use_edges=use_edges)
+            with tf.Session() as sess:
+                correct, solved = sess.run([correct_op, solved_op])
+
+            expected_correct, expected_solved = existence_accuracy(self._target, self._output, use_nodes=use_nodes,
+                                                                   use_edges=use_edges)
+            self.assertAlmostEqual(expected_correct, correct, places=6)
+            self.assertAlmostEqual(expected_solved, solved, places=6)
+
+    def test_neither_nodes_nor_edges_raises_exception(self):
+        with self.assertRaises(ValueError):
+            existence_accuracy_ops(to_constants(self._target), to_constants(self._output), use_nodes=False,
+                                   use_edges=False)
+
+
+class CountingSession:
+
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, fetches, feed_dict=None):
+        self.runs += 1
+        return {name: self.runs for name in fetches}
+
+
+class TestEvaluator(unittest.TestCase):
+
+    def test_latest_evaluation_is_kept(self):
+        evaluator = Evaluator(CountingSession(), {'loss': None}, feed_dict={})
+        self.assertIsNone(evaluator.latest())
+
+        evaluator.evaluate(3)
+        evaluator.evaluate(7)
+
+        self.assertEqual((7, {'loss': 2}), evaluator.latest())
+
+    def test_evaluates_in_the_background_until_stopped(self):
+        sess = CountingSession()
+        evaluator = Evaluator(sess, {'loss': None}, feed_dict={})
+
+        evaluator.start(0.01, lambda: 5)
+        time.sleep(0.2)
+        evaluator.stop()
+        runs = sess.runs
+        time.sleep(0.05)
+
+        self.assertGreater(runs, 1)
+        self.assertEqual(runs, sess.runs)
+        self.assertEqual(5, evaluator.latest()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import os
+
+import tensorflow as tf
+from graph_nets.graphs import GraphsTuple, ALL_FIELDS
+from tensorflow.tools.graph_transforms import TransformGraph
+
+from kglib.kgcn.learn.checkpoint import restore_checkpoint
+from kglib.kgcn.learn.feed import graphs_to_graphs_tuple
+from kglib.kgcn.learn.predict import input_placeholders
+from kglib.kgcn.models.instrumentation import OFF, instrumentation_level
+
+# The input placeholders of an exported graph are named "input/<field>", and its outputs "output/<field>"
+INPUT_SCOPE = 'input'
+OUTPUT_SCOPE = 'output'
+OUTPUT_FIELDS = ('nodes', 'edges')
+
+# Graph Transform Tool optimisations applied to the frozen graph
+GRAPH_OPTIMISATIONS = [
+    'remove_nodes(op=Identity, op=CheckNumerics)',
+    'fold_constants(ignore_errors=true)',
+    'sort_by_execution_order',
+]
+
+
+def export_frozen_graph(model_fn, checkpoint_path, input_graph, export_path, num_processing_steps_ge=10):
+    """
+    Exports a trained model as a single serialized GraphDef for inference. Only the final processing step's output is
+    kept: the model is built without summaries, its variables are replaced by constants holding their values from the
+    checkpoint, everything not needed for the output is pruned, and the graph is optimised, folding constants
+
+    Args:
+        model_fn: Function taking no arguments that builds the model, as it was built for training but without dropout.
+            It's called with a new tf.Graph as the default, so that the model's variables have the same names as those
+            saved in the checkpoint
+        checkpoint_path: The path prefix of the checkpoint saved by `KGCNLearner`, or a directory holding it
+        input_graph: An encoded input graph, as a networkx graph or ColumnarGraph, to shape the input placeholders by
+        export_path: The file to write the frozen graph to. Its directory is created if need be
+        num_processing_steps_ge: Number of processing (message-passing) steps to run the model for
+
+    Returns:
+        The GraphDef that was written
+    """
+    graph = tf.Graph()
+    with graph.as_default(), instrumentation_level(OFF):
+        input_ph = input_placeholders(input_graph, name=INPUT_SCOPE)
+        output_op = model_fn()(input_ph, num_processing_steps_ge)[-1]
+        with tf.name_scope(OUTPUT_SCOPE):
+            output_names = [tf.identity(getattr(output_op, field), name=field).op.name for field in OUTPUT_FIELDS]
+
+        with tf.Session() as sess:
+            restore_checkpoint(sess, checkpoint_path)
+            # Only the nodes the outputs depend on are kept, so earlier steps' outputs and all variables are dropped
+            graph_def = tf.graph_util.convert_variables_to_constants(sess, graph.as_graph_def(), output_names)
+
+    graph_def = tf.graph_util.remove_training_nodes(graph_def, protected_nodes=output_names)
+    input_names = [node.name for node in graph_def.node if node.op == 'Placeholder']
+    graph_def = TransformGraph(graph_def, input_names, output_names, GRAPH_OPTIMISATIONS)
+
+    directory = os.path.dirname(export_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(export_path, 'wb') as f:
+        f.write(graph_def.SerializeToString())
+    return graph_def
+
+
+class FrozenPredictor:
+    """
+    Scores encoded input graphs with a model exported by `export_frozen_graph`. Loading only parses the GraphDef, with
+    no model code, variables or checkpoint involved
+    """
+    def __init__(self, export_path):
+        """
+        Args:
+            export_path: The file the frozen graph was written to
+        """
+        graph_def = tf.GraphDef()
+        with open(export_path, 'rb') as f:
+            graph_def.ParseFromString(f.read())
+
+        self._graph = tf.Graph()
+        with self._graph.as_default():
+            tf.import_graph_def(graph_def, name='')
+
+        # Inputs that the outputs don't depend on were pruned during export, so aren't fed
+        placeholder_names = {op.name for op in self._graph.get_operations() if op.type == 'Placeholder'}
+        self._input_tensors = {field: self._graph.get_tensor_by_name(f'{INPUT_SCOPE}/{field}:0') for field in ALL_FIELDS
+                               if f'{INPUT_SCOPE}/{field}' in placeholder_names}
+        self._output_tensors = {field: self._graph.get_tensor_by_name(f'{OUTPUT_SCOPE}/{field}:0')
+                                for field in OUTPUT_FIELDS}
+
+        self._sess = tf.Session(graph=self._graph)
+        self._graph.finalize()
+
+    def predict(self, input_graphs):
+        """
+        Scores a batch of encoded input graphs
+
+        Args:
+            input_graphs: The input graphs, as networkx graphs or ColumnarGraphs, or a GraphsTuple of numpy arrays
+
+        Returns:
+            GraphsTuple of numpy arrays holding the logits of each node and edge, for all of the graphs
+        """
+        if not isinstance(input_graphs, GraphsTuple):
+            input_graphs = graphs_to_graphs_tuple(input_graphs)
+        feed_dict = {tensor: getattr(input_graphs, field) for field, tensor in self._input_tensors.items()}
+        outputs = self._sess.run(self._output_tensors, feed_dict=feed_dict)
+        return input_graphs.replace(**outputs)
+
+    def close(self):
+        self._sess.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,109 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from kglib.kgcn.learn.export import export_frozen_graph, FrozenPredictor
+from kglib.kgcn.learn.feed import graphs_to_graphs_tuple, create_placeholders
+from kglib.kgcn.learn.learn_benchmark import synthetic_graph_pair
+from kglib.kgcn.learn.loss import loss_ops_preexisting_no_penalty
+from kglib.kgcn.learn.predict import Predictor
+from kglib.kgcn.learn.serve_benchmark import create_model, save_untrained_checkpoint
+
+
+def runs_per_second(run_fn, num_runs):
+    run_fn()  # Warm up
+    start_time = time.perf_counter()
+    for _ in range(num_runs):
+        run_fn()
+    return num_runs / (time.perf_counter() - start_time)
+
+
+def training_graph_runs_per_second(input_graphs, target_graphs, num_processing_steps, num_runs):
+    """
+    Times scoring graphs with the graph `KGCNLearner` trains with, fetching every processing step's outputs as it does
+    for the generalisation graphs
+    """
+    with tf.Graph().as_default():
+        input_ph, target_ph = create_placeholders(input_graphs, target_graphs)
+        output_ops = create_model()(input_ph, num_processing_steps)
+        loss_op = sum(loss_ops_preexisting_no_penalty(target_ph, output_ops)) / num_processing_steps
+        tf.train.AdamOptimizer(1e-3).minimize(loss_op)
+        tf.summary.merge_all()
+
+        feed_dict = {input_ph: graphs_to_graphs_tuple(input_graphs)}
+        with tf.Session() as sess:
+            sess.run(tf.global_variables_initializer())
+            return runs_per_second(lambda: sess.run(output_ops, feed_dict=feed_dict), num_runs)
+
+
+def benchmark(num_graphs=100, num_nodes=20, num_processing_steps=10, num_runs=50):
+    """
+    Compares scoring a batch of graphs with the training graph, with a Predictor restoring the model from a checkpoint,
+    and with a FrozenPredictor of the exported graph. Loading times of the latter two are compared too
+
+    Returns:
+        Dict of runs per second keyed by approach, and dict of loading seconds keyed by approach
+    """
+    random_state = np.random.RandomState(0)
+    input_graphs, target_graphs = zip(*[synthetic_graph_pair(num_nodes, random_state) for _ in range(num_graphs)])
+    input_graphs, target_graphs = list(input_graphs), list(target_graphs)
+    batch = graphs_to_graphs_tuple(input_graphs)
+
+    throughputs = {'training graph': training_graph_runs_per_second(input_graphs, target_graphs,
+                                                                    num_processing_steps, num_runs)}
+    load_seconds = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint_path = os.path.join(directory, 'kgcn')
+        export_path = os.path.join(directory, 'kgcn.pb')
+        save_untrained_checkpoint(input_graphs[0], num_processing_steps, checkpoint_path)
+
+        start_time = time.perf_counter()
+        predictor = Predictor(create_model, checkpoint_path, input_graphs[0], num_processing_steps)
+        load_seconds['predictor'] = time.perf_counter() - start_time
+        with predictor:
+            throughputs['predictor'] = runs_per_second(lambda: predictor.predict(batch), num_runs)
+
+        start_time = time.perf_counter()
+        export_frozen_graph(create_model, checkpoint_path, input_graphs[0], export_path, num_processing_steps)
+        export_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        frozen_predictor = FrozenPredictor(export_path)
+        load_seconds['frozen'] = time.perf_counter() - start_time
+        with frozen_predictor:
+            throughputs['frozen'] = runs_per_second(lambda: frozen_predictor.predict(batch), num_runs)
+        export_bytes = os.path.getsize(export_path)
+
+    print(f'{num_graphs} graphs of {num_nodes} nodes per batch, {num_processing_steps} processing steps')
+    print(f'exported in {export_seconds:.2f}s, {export_bytes / 1024:.0f}KB')
+    for approach, throughput in throughputs.items():
+        load = f', loaded in {load_seconds[approach]:.2f}s' if approach in load_seconds else ''
+        print(f'{approach:>14}: {throughput:.1f} batches/sec{load}')
+    return throughputs, load_seconds
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -18,17 +18,36 @@
 #
 
 from graph_nets import utils_tf, utils_np
+from graph_nets.graphs import GraphsTuple
+
+from kglib.utils.graph.columnar import ColumnarGraph
 
 
 def create_placeholders(input_graphs, target_graphs):
     """
     Creates placeholders for the model training and evaluation.
+
+    Args:
+        input_graphs: The input graphs, as networkx graphs, ColumnarGraphs, or a GraphsTuple of numpy arrays
+        target_graphs: The target graphs, of the same kind as the inputs
+
     Returns:
     input_ph: The input graph's placeholders, as a graph namedtuple.
     target_ph: The target graph's placeholders, as a graph namedtuple.
     """
-    input_ph = utils_tf.placeholders_from_networkxs(input_graphs, name="input_placeholders_from_networksx")
-    target_ph = utils_tf.placeholders_from_networkxs(target_graphs, name="target_placeholders_from_networkxs")
+    if isinstance(input_graphs, GraphsTuple):
+        # Placeholders only depend on the dtypes and shapes of the features, so a single graph is enough to build them
+        input_data_dicts, target_data_dicts = [utils_np.graphs_tuple_to_data_dicts(utils_np.get_graph(graphs, 0))
+                                               for graphs in (input_graphs, target_graphs)]
+    elif are_columnar(input_graphs):
+        input_data_dicts, target_data_dicts = to_data_dicts(input_graphs), to_data_dicts(target_graphs)
+    else:
+        input_ph = utils_tf.placeholders_from_networkxs(input_graphs, name="input_placeholders_from_networksx")
+        target_ph = utils_tf.placeholders_from_networkxs(target_graphs, name="target_placeholders_from_networkxs")
+        return input_ph, target_ph
+
+    input_ph = utils_tf.placeholders_from_data_dicts(input_data_dicts, name="input_placeholders_from_data_dicts")
+    target_ph = utils_tf.placeholders_from_data_dicts(target_data_dicts, name="target_placeholders_from_data_dicts")
     return input_ph, target_ph
 
 
@@ -44,12 +63,45 @@ def create_feed_dict(input_ph, target_ph, inputs, targets):
     Returns:
         feed_dict: The feed `dict` of input and target placeholders and data.
     """
-    input_graphs = utils_np.networkxs_to_graphs_tuple(inputs)
-    target_graphs = utils_np.networkxs_to_graphs_tuple(targets)
+    input_graphs, target_graphs = create_graphs_tuples(inputs, targets)
     feed_dict = {input_ph: input_graphs, target_ph: target_graphs}
     return feed_dict
 
 
+def create_graphs_tuples(inputs, targets):
+    """Converts input and target graphs into GraphsTuples of numpy arrays.
+
+    Args:
+        inputs: The input graphs, as networkx graphs or ColumnarGraphs
+        targets: The target graphs, of the same kind as the inputs
+
+    Returns:
+        input_graphs: The input graphs, as a single GraphsTuple
+        target_graphs: The target graphs, as a single GraphsTuple
+    """
+    return graphs_to_graphs_tuple(inputs), graphs_to_graphs_tuple(targets)
+
+
+def graphs_to_graphs_tuple(graphs):
+    """Converts networkx graphs or ColumnarGraphs, with their features under "features", into a GraphsTuple"""
+    if are_columnar(graphs):
+        return utils_np.data_dicts_to_graphs_tuple(to_data_dicts(graphs))
+    return utils_np.networkxs_to_graphs_tuple(graphs)
+
+
+def graphs_tuple_to_columnar_graphs(graphs_tuple):
+    """Splits a GraphsTuple of numpy arrays into a ColumnarGraph per graph, holding the features of the graph"""
+    return [ColumnarGraph.from_data_dict(data_dict) for data_dict in utils_np.graphs_tuple_to_data_dicts(graphs_tuple)]
+
+
+def are_columnar(graphs):
+    return len(graphs) > 0 and isinstance(graphs[0], ColumnarGraph)
+
+
+def to_data_dicts(graphs):
+    return [graph.to_data_dict() for graph in graphs]
+
+
 def make_all_runnable_in_session(*args):
     """Lets an iterable of TF graphs be output from a session as NP graphs."""
     return [utils_tf.make_runnable_in_session(a) for a in args]
\ No newline at end of file
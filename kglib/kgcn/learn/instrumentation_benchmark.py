@@ -0,0 +1,105 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from kglib.kgcn.learn.feed import create_placeholders, create_feed_dict, make_all_runnable_in_session
+from kglib.kgcn.learn.learn_benchmark import synthetic_graph_pair, iterations_per_second, NODE_TYPES, \
+    NUM_EDGE_TYPES
+from kglib.kgcn.learn.loss import loss_ops_preexisting_no_penalty
+from kglib.kgcn.models.core import KGCN
+from kglib.kgcn.models.embedding import ThingEmbedder, RoleEmbedder
+from kglib.kgcn.models.instrumentation import OFF, SCALARS, FULL, histogram, instrumentation_level, scalar
+
+LEVEL_NAMES = {OFF: 'off', SCALARS: 'scalars', FULL: 'full'}
+
+
+def build_training_graph(input_graphs, target_graphs, num_processing_steps, level):
+    """
+    Builds a KGCN training step with the summaries that `KGCNLearner` adds at the given instrumentation level
+
+    Returns:
+        The input and target placeholders, the step op, and the merged summaries, or None if there are none
+    """
+    tf.reset_default_graph()
+    tf.set_random_seed(1)
+
+    input_ph, target_ph = create_placeholders(input_graphs, target_graphs)
+
+    with instrumentation_level(level):
+        thing_embedder = ThingEmbedder(node_types=NODE_TYPES, type_embedding_dim=5, attr_embedding_dim=6,
+                                       categorical_attributes={}, continuous_attributes={})
+        role_embedder = RoleEmbedder(num_edge_types=NUM_EDGE_TYPES, type_embedding_dim=5)
+        kgcn = KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3)
+
+        output_ops = kgcn(input_ph, num_processing_steps)
+        loss_op = sum(loss_ops_preexisting_no_penalty(target_ph, output_ops)) / num_processing_steps
+        scalar('loss_op_tr', loss_op)
+
+        optimizer = tf.train.AdamOptimizer(1e-3)
+        gradients_and_variables = optimizer.compute_gradients(loss_op)
+        for grad, var in gradients_and_variables:
+            if grad is not None:
+                histogram('gradients/' + var.name, grad)
+        step_op = optimizer.apply_gradients(gradients_and_variables)
+
+    input_ph, target_ph = make_all_runnable_in_session(input_ph, target_ph)
+    return input_ph, target_ph, step_op, tf.summary.merge_all()
+
+
+def benchmark(num_graphs=200, num_nodes=20, num_processing_steps=5, num_iterations=50):
+    """
+    Compares graph construction time and step time of a KGCN training step at each instrumentation level. The step
+    is timed both alone, as on most iterations, and fetching the merged summaries too, as on logging iterations
+
+    Returns:
+        Dict keyed by instrumentation level of the seconds to build the graph, and the iterations per second without
+        and with fetching the summaries
+    """
+    random_state = np.random.RandomState(0)
+    input_graphs, target_graphs = zip(*[synthetic_graph_pair(num_nodes, random_state) for _ in range(num_graphs)])
+
+    results = {}
+    for level in [FULL, SCALARS, OFF]:
+        start_time = time.time()
+        input_ph, target_ph, step_op, merged_summaries = build_training_graph(input_graphs, target_graphs,
+                                                                              num_processing_steps, level)
+        build_seconds = time.time() - start_time
+
+        with tf.Session() as sess:
+            sess.run(tf.global_variables_initializer())
+            feed_dict = create_feed_dict(input_ph, target_ph, input_graphs, target_graphs)
+            step_only = iterations_per_second(sess, step_op, lambda: feed_dict, num_iterations)
+            logging_fetches = step_op if merged_summaries is None else [step_op, merged_summaries]
+            with_summaries = iterations_per_second(sess, logging_fetches, lambda: feed_dict, num_iterations)
+
+        results[level] = build_seconds, step_only, with_summaries
+
+    print(f'{num_graphs} graphs of {num_nodes} nodes, {num_iterations} training iterations')
+    for level, (build_seconds, step_only, with_summaries) in results.items():
+        print(f'{LEVEL_NAMES[level]:>8}: build {build_seconds:.2f}s, step {step_only:.2f} iterations/sec, '
+              f'step with summaries {with_summaries:.2f} iterations/sec')
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -21,19 +21,46 @@ import time
 
 import tensorflow as tf
 
-from kglib.kgcn.learn.feed import create_placeholders, create_feed_dict, make_all_runnable_in_session
+from kglib.kgcn.learn.batch import GraphsTupleBatcher
+from kglib.kgcn.learn.checkpoint import save_checkpoint
+from kglib.kgcn.learn.dataset import create_input_dataset, graphs_tuples_from_iterator
+from kglib.kgcn.learn.evaluate import existence_accuracy_ops, Evaluator
+from kglib.kgcn.learn.feed import create_placeholders, create_graphs_tuples, make_all_runnable_in_session
 from kglib.kgcn.learn.loss import loss_ops_preexisting_no_penalty
-from kglib.kgcn.learn.metrics import existence_accuracy
+from kglib.kgcn.learn.memmap_dataset import MemmapDataset
+from kglib.kgcn.models.instrumentation import FULL, histogram, instrumentation_level, scalar
 
 
 class KGCNLearner:
     """
     Responsible for running a KGCN model
     """
-    def __init__(self, model, num_processing_steps_tr=10, num_processing_steps_ge=10):
+    def __init__(self, model, num_processing_steps_tr=10, num_processing_steps_ge=10, instrumentation=FULL,
+                 num_loss_steps=None):
+        """
+        Args:
+            model: The model to train, called with the input graphs and a number of processing steps. It's connected
+                once, for the larger of the training and generalisation steps, unless it has a true `use_while_loop`
+                attribute, as a `KGCN` running its steps in a tf.while_loop does, in which case training and
+                generalisation are connected separately so that training doesn't run the extra steps
+            num_processing_steps_tr: Number of processing (message-passing) steps for training.
+            num_processing_steps_ge: Number of processing (message-passing) steps for generalization.
+            instrumentation: The instrumentation level, OFF, SCALARS or FULL from `kglib.kgcn.models.instrumentation`.
+                FULL adds histograms of the model's embeddings and of the gradients, SCALARS only the losses, and OFF
+                no summaries at all, for the leanest training graph. A model's own instrumentation level, if it has
+                one, takes precedence within the model
+            num_loss_steps: If given, the training loss is averaged over only this many final processing steps,
+                rather than all of them, and the model is asked for only the outputs it needs, with its `num_outputs`
+                argument, so earlier steps aren't decoded. The generalisation outputs returned after training then
+                start from the first step whose outputs either loss needs
+        """
+        if num_loss_steps is not None and num_loss_steps < 1:
+            raise ValueError(f'num_loss_steps must be at least 1, but got {num_loss_steps}')
         self._model = model
         self._num_processing_steps_tr = num_processing_steps_tr
         self._num_processing_steps_ge = num_processing_steps_ge
+        self._instrumentation = instrumentation
+        self._num_loss_steps = num_loss_steps
 
     def __call__(self,
                  tr_input_graphs,
@@ -43,7 +70,14 @@ class KGCNLearner:
                  num_training_iterations=1000,
                  learning_rate=1e-3,
                  log_every_epochs=20,
-                 log_dir=None):
+                 log_dir=None,
+                 batch_size=None,
+                 shuffle_seed=1,
+                 prefetch_batches=None,
+                 tr_dataset_dir=None,
+                 evaluate_every=None,
+                 evaluate_every_seconds=None,
+                 checkpoint_path=None):
         """
         Args:
             tr_graphs: In-memory graphs of Grakn concepts for training
@@ -53,6 +87,22 @@ class KGCNLearner:
             num_training_iterations: Number of training iterations
             log_every_seconds: The time to wait between logging and printing the next set of results.
             log_dir: Directory to store TensorFlow events files
+            batch_size: Number of training graphs to use per iteration. If None, all of the training graphs are used
+                in every iteration
+            shuffle_seed: Seed for shuffling the training graphs into batches, used only if `batch_size` is given. With
+                `tr_dataset_dir`, the graphs of each batch are contiguous in the dataset, so only the boundaries
+                between the batches and their order are shuffled, as described for `MemmapDataset.batches`
+            prefetch_batches: If given, training graphs are supplied by a tf.data Dataset rather than fed to
+                placeholders, and this many batches are prepared in the background ahead of the one being trained on
+            tr_dataset_dir: If given, the training graphs are read from this directory, written by
+                `write_memmap_dataset`, rather than from `tr_input_graphs` and `tr_target_graphs`, which can be None.
+                The dataset is memory-mapped, so it needn't fit in memory
+            evaluate_every: The number of training iterations between evaluations on the generalisation graphs. If
+                None, they are evaluated every `log_every_epochs` iterations
+            evaluate_every_seconds: If given, the generalisation graphs are instead evaluated in a background thread,
+                this many seconds apart, while training continues. Each log shows the most recent evaluation
+            checkpoint_path: If given, the variables are saved to a checkpoint with this path prefix once training is
+                done, from which a `Predictor` can restore the model
 
         Returns:
 
@@ -60,33 +110,94 @@ class KGCNLearner:
 
         tf.set_random_seed(1)
 
-        input_ph, target_ph = create_placeholders(tr_input_graphs, tr_target_graphs)
+        # The graphs don't change between iterations, so convert them to GraphsTuples only once
+        tr_dataset = None
+        if tr_dataset_dir is not None:
+            tr_dataset = MemmapDataset(tr_dataset_dir)
+            tr_batches = tr_dataset.batches(batch_size, seed=shuffle_seed)
+
+            def next_tr_batch():
+                return next(tr_batches)
+        elif batch_size is None:
+            tr_graphs = create_graphs_tuples(tr_input_graphs, tr_target_graphs)
+
+            def next_tr_batch():
+                return tr_graphs
+        else:
+            batcher = GraphsTupleBatcher.from_graphs(tr_input_graphs, tr_target_graphs, batch_size, seed=shuffle_seed)
+            next_tr_batch = batcher.next_batch
 
-        # A list of outputs, one per processing step.
-        output_ops_tr = self._model(input_ph, self._num_processing_steps_tr)
-        output_ops_ge = self._model(input_ph, self._num_processing_steps_ge)
+        ge_input_graphs_tuple, ge_target_graphs_tuple = create_graphs_tuples(ge_input_graphs, ge_target_graphs)
 
-        # Training loss.
-        loss_ops_tr = loss_ops_preexisting_no_penalty(target_ph, output_ops_tr)
-        # Loss across processing steps.
-        loss_op_tr = sum(loss_ops_tr) / self._num_processing_steps_tr
+        iterator = None
+        if prefetch_batches is None:
+            if tr_dataset is not None:
+                input_ph, target_ph = create_placeholders(*tr_dataset.graphs_tuples(0, 1))
+            else:
+                input_ph, target_ph = create_placeholders(tr_input_graphs, tr_target_graphs)
+        else:
+            # Training takes its graphs directly from the Dataset. For generalisation, the graphs are fed in place of
+            # the Dataset's output
+            iterator = create_input_dataset(next_tr_batch, prefetch_batches).make_initializable_iterator()
+            input_ph, target_ph = graphs_tuples_from_iterator(iterator)
+
+        # Summaries are only added to the graph as the instrumentation level allows
+        with instrumentation_level(self._instrumentation):
+            num_tr = self._num_processing_steps_tr
+            num_ge = self._num_processing_steps_ge
+            num_loss_steps_tr = num_tr if self._num_loss_steps is None else min(self._num_loss_steps, num_tr)
+
+            # Outputs are only needed from the first step that the training loss or the generalisation loss uses
+            first_output_step = min(num_tr - num_loss_steps_tr, num_ge - 1)
+            if num_tr != num_ge and getattr(self._model, 'use_while_loop', False):
+                # A model running its steps in a while loop has a graph of the same size for any number of steps, so
+                # training and generalisation each get a loop of their own, rather than training running a loop of
+                # the larger number of steps on every iteration
+                output_ops_tr = self._model(input_ph, num_tr, num_outputs=num_loss_steps_tr)
+                output_ops_ge = self._model(input_ph, num_ge, num_outputs=num_ge - first_output_step)
+            else:
+                # A list of outputs, one per processing step. Each step's output only depends on the steps before it,
+                # so the model is unrolled once, for the larger number of steps, and training and generalisation each
+                # take the outputs of the steps they need
+                num_processing_steps = max(num_tr, num_ge)
+                if first_output_step == 0:
+                    output_ops = self._model(input_ph, num_processing_steps)
+                else:
+                    output_ops = self._model(input_ph, num_processing_steps,
+                                             num_outputs=num_processing_steps - first_output_step)
+                output_ops_tr = output_ops[num_tr - num_loss_steps_tr - first_output_step:num_tr - first_output_step]
+                output_ops_ge = output_ops[:num_ge - first_output_step]
 
-        tf.summary.scalar('loss_op_tr', loss_op_tr)
-        # Test/generalization loss.
-        loss_ops_ge = loss_ops_preexisting_no_penalty(target_ph, output_ops_ge)
-        loss_op_ge = loss_ops_ge[-1]  # Loss from final processing step.
-        tf.summary.scalar('loss_op_ge', loss_op_ge)
+            # Training loss.
+            loss_ops_tr = loss_ops_preexisting_no_penalty(target_ph, output_ops_tr)
+            # Loss across processing steps.
+            loss_op_tr = sum(loss_ops_tr) / num_loss_steps_tr
 
-        # Optimizer
-        optimizer = tf.train.AdamOptimizer(learning_rate)
-        gradients, variables = zip(*optimizer.compute_gradients(loss_op_tr))
+            scalar('loss_op_tr', loss_op_tr)
+            # Test/generalization loss, from the final processing step, shared with training's if it has that step
+            if num_tr - num_loss_steps_tr < num_ge <= num_tr:
+                loss_op_ge = loss_ops_tr[num_ge - 1 - (num_tr - num_loss_steps_tr)]
+            else:
+                loss_op_ge = loss_ops_preexisting_no_penalty(target_ph, output_ops_ge[-1:])[0]
+            scalar('loss_op_ge', loss_op_ge)
+
+            # Accuracy is computed in the graph, so logging only fetches scalars rather than the outputs
+            correct_op_tr, solved_op_tr = existence_accuracy_ops(target_ph, output_ops_tr[-1], use_edges=False)
+            if num_ge == num_tr:
+                correct_op_ge, solved_op_ge = correct_op_tr, solved_op_tr
+            else:
+                correct_op_ge, solved_op_ge = existence_accuracy_ops(target_ph, output_ops_ge[-1], use_edges=False)
 
-        for grad, var in zip(gradients, variables):
-            try:
-                print(var.name)
-                tf.summary.histogram('gradients/' + var.name, grad)
-            except:
-                pass
+            # Optimizer
+            optimizer = tf.train.AdamOptimizer(learning_rate)
+            gradients, variables = zip(*optimizer.compute_gradients(loss_op_tr))
+
+            for grad, var in zip(gradients, variables):
+                try:
+                    print(var.name)
+                    histogram('gradients/' + var.name, grad)
+                except:
+                    pass
 
         gradients, _ = tf.clip_by_global_norm(gradients, 5.0)
         step_op = optimizer.apply_gradients(zip(gradients, variables))
@@ -94,6 +205,7 @@ class KGCNLearner:
         input_ph, target_ph = make_all_runnable_in_session(input_ph, target_ph)
 
         sess = tf.Session()
+        # None if the instrumentation level added no summaries
         merged_summaries = tf.summary.merge_all()
 
         train_writer = None
@@ -102,6 +214,21 @@ class KGCNLearner:
             train_writer = tf.summary.FileWriter(log_dir, sess.graph)
 
         sess.run(tf.global_variables_initializer())
+        if iterator is not None:
+            sess.run(iterator.initializer)
+
+        def next_tr_feed_dict():
+            if iterator is not None:
+                return None
+            input_batch, target_batch = next_tr_batch()
+            return {input_ph: input_batch, target_ph: target_batch}
+
+        # The generalisation graphs never change, so their feed dict is built once and shared by every evaluation
+        ge_feed_dict = {input_ph: ge_input_graphs_tuple, target_ph: ge_target_graphs_tuple}
+        evaluator = Evaluator(sess, {"loss": loss_op_ge, "correct": correct_op_ge, "solved": solved_op_ge},
+                              ge_feed_dict)
+        if evaluate_every is None:
+            evaluate_every = log_every_epochs
 
         logged_iterations = []
         losses_tr = []
@@ -118,59 +245,75 @@ class KGCNLearner:
               "Cge (test/generalization fraction nodes/edges labeled correctly), "
               "Sge (test/generalization fraction examples solved correctly)")
 
+        current_iteration = 0
+        if evaluate_every_seconds is not None:
+            evaluator.start(evaluate_every_seconds, lambda: current_iteration)
+
         start_time = time.time()
-        for iteration in range(num_training_iterations):
-            feed_dict = create_feed_dict(input_ph, target_ph, tr_input_graphs, tr_target_graphs)
+        try:
+            for iteration in range(num_training_iterations):
+                current_iteration = iteration
+                tr_feed_dict = next_tr_feed_dict()
 
-            if iteration % log_every_epochs == 0:
+                if evaluate_every_seconds is None and iteration % evaluate_every == 0:
+                    evaluator.evaluate(iteration)
 
-                train_values = sess.run(
-                    {
-                        "step": step_op,
-                        "target": target_ph,
-                        "loss": loss_op_tr,
-                        "outputs": output_ops_tr,
-                        "summary": merged_summaries
-                    },
-                    feed_dict=feed_dict)
-
-                if train_writer is not None:
-                    train_writer.add_summary(train_values["summary"], iteration)
-
-                feed_dict = create_feed_dict(input_ph, target_ph, ge_input_graphs, ge_target_graphs)
-                test_values = sess.run(
-                    {
-                        "target": target_ph,
-                        "loss": loss_op_ge,
-                        "outputs": output_ops_ge
-                    },
-                    feed_dict=feed_dict)
-                correct_tr, solved_tr = existence_accuracy(
-                    train_values["target"], train_values["outputs"][-1], use_edges=False)
-                correct_ge, solved_ge = existence_accuracy(
-                    test_values["target"], test_values["outputs"][-1], use_edges=False)
-
-                elapsed = time.time() - start_time
-                losses_tr.append(train_values["loss"])
-                corrects_tr.append(correct_tr)
-                solveds_tr.append(solved_tr)
-                losses_ge.append(test_values["loss"])
-                corrects_ge.append(correct_ge)
-                solveds_ge.append(solved_ge)
-                logged_iterations.append(iteration)
-                print("# {:05d}, T {:.1f}, Ltr {:.4f}, Lge {:.4f}, Ctr {:.4f}, Str"
-                      " {:.4f}, Cge {:.4f}, Sge {:.4f}".format(
-                        iteration, elapsed, train_values["loss"], test_values["loss"],
-                        correct_tr, solved_tr, correct_ge, solved_ge))
-            else:
-                train_values = sess.run(
-                    {
+                if iteration % log_every_epochs == 0:
+
+                    train_fetches = {
                         "step": step_op,
-                        "target": target_ph,
                         "loss": loss_op_tr,
-                        "outputs": output_ops_tr
-                    },
-                    feed_dict=feed_dict)
+                        "correct": correct_op_tr,
+                        "solved": solved_op_tr
+                    }
+                    if merged_summaries is not None:
+                        train_fetches["summary"] = merged_summaries
+                    train_values = sess.run(train_fetches, feed_dict=tr_feed_dict)
+
+                    if train_writer is not None and merged_summaries is not None:
+                        train_writer.add_summary(train_values["summary"], iteration)
+
+                    latest_evaluation = evaluator.latest()
+                    if latest_evaluation is None:
+                        # The background evaluation hasn't finished its first run yet
+                        ge_values = evaluator.evaluate(iteration)
+                    else:
+                        _, ge_values = latest_evaluation
+
+                    elapsed = time.time() - start_time
+                    losses_tr.append(train_values["loss"])
+                    corrects_tr.append(train_values["correct"])
+                    solveds_tr.append(train_values["solved"])
+                    losses_ge.append(ge_values["loss"])
+                    corrects_ge.append(ge_values["correct"])
+                    solveds_ge.append(ge_values["solved"])
+                    logged_iterations.append(iteration)
+                    print("# {:05d}, T {:.1f}, Ltr {:.4f}, Lge {:.4f}, Ctr {:.4f}, Str"
+                          " {:.4f}, Cge {:.4f}, Sge {:.4f}".format(
+                            iteration, elapsed, train_values["loss"], ge_values["loss"],
+                            train_values["correct"], train_values["solved"], ge_values["correct"],
+                            ge_values["solved"]))
+                else:
+                    train_values = sess.run(
+                        {
+                            "step": step_op,
+                            "loss": loss_op_tr
+                        },
+                        feed_dict=tr_feed_dict)
+        finally:
+            evaluator.stop()
+
+        if checkpoint_path is not None:
+            save_checkpoint(sess, checkpoint_path)
+
+        # The outputs for the generalisation graphs are only fetched once, after training
+        test_values = sess.run(
+            {
+                "target": target_ph,
+                "loss": loss_op_ge,
+                "outputs": output_ops_ge
+            },
+            feed_dict=ge_feed_dict)
 
         training_info = logged_iterations, losses_tr, losses_ge, corrects_tr, corrects_ge, solveds_tr, solveds_ge
         return train_values, test_values, training_info
@@ -17,44 +17,136 @@
 #  under the License.
 #
 
+import tempfile
 import unittest
 
 import networkx as nx
 import numpy as np
+import tensorflow as tf
 
 from kglib.kgcn.learn.learn import KGCNLearner
+from kglib.kgcn.learn.memmap_dataset import write_memmap_dataset
 from kglib.kgcn.models.core import KGCN
 from kglib.kgcn.models.embedding import ThingEmbedder, RoleEmbedder
 
 
+def create_graphs():
+    input_graph = nx.MultiDiGraph()
+    input_graph.add_node(0, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_edge(1, 0, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_node(1, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_edge(1, 2, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_node(2, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.graph['features'] = np.zeros(5, dtype=np.float32)
+
+    target_graph = nx.MultiDiGraph()
+    target_graph.add_node(0, features=np.array([0, 1, 0], dtype=np.float32))
+    target_graph.add_edge(1, 0, features=np.array([0, 0, 1], dtype=np.float32))
+    target_graph.add_node(1, features=np.array([0, 0, 1], dtype=np.float32))
+    target_graph.add_edge(1, 2, features=np.array([0, 0, 1], dtype=np.float32))
+    target_graph.add_node(2, features=np.array([0, 1, 0], dtype=np.float32))
+    target_graph.graph['features'] = np.zeros(5, dtype=np.float32)
+
+    return input_graph, target_graph
+
+
+def create_kgcn(use_while_loop=False):
+    thing_embedder = ThingEmbedder(node_types=['a', 'b', 'c'], type_embedding_dim=5,
+                                   attr_embedding_dim=6, categorical_attributes={}, continuous_attributes={})
+
+    role_embedder = RoleEmbedder(num_edge_types=2, type_embedding_dim=5)
+
+    return KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3, use_while_loop=use_while_loop)
+
+
+def create_learner(num_processing_steps_tr=2, num_processing_steps_ge=2, use_while_loop=False, num_loss_steps=None):
+    return KGCNLearner(create_kgcn(use_while_loop), num_processing_steps_tr=num_processing_steps_tr,
+                       num_processing_steps_ge=num_processing_steps_ge, num_loss_steps=num_loss_steps)
+
+
+class RecordingModel:
+    """
+    Connects a model, recording the number of processing steps and the keyword arguments of each connection
+    """
+    def __init__(self, model):
+        self._model = model
+        self.use_while_loop = model.use_while_loop
+        self.connections = []
+
+    def __call__(self, input_op, num_processing_steps, **kwargs):
+        self.connections.append((num_processing_steps, kwargs))
+        return self._model(input_op, num_processing_steps, **kwargs)
+
+
 class ITKGCNLearner(unittest.TestCase):
+    def setUp(self):
+        tf.reset_default_graph()
+
     def test_learner_runs(self):
-        input_graph = nx.MultiDiGraph()
-        input_graph.add_node(0, features=np.array([0, 1, 2], dtype=np.float32))
-        input_graph.add_edge(1, 0, features=np.array([0, 1, 2], dtype=np.float32))
-        input_graph.add_node(1, features=np.array([0, 1, 2], dtype=np.float32))
-        input_graph.add_edge(1, 2, features=np.array([0, 1, 2], dtype=np.float32))
-        input_graph.add_node(2, features=np.array([0, 1, 2], dtype=np.float32))
-        input_graph.graph['features'] = np.zeros(5, dtype=np.float32)
+        input_graph, target_graph = create_graphs()
+        learner = create_learner()
+        learner([input_graph], [target_graph], [input_graph], [target_graph], num_training_iterations=50)
 
-        target_graph = nx.MultiDiGraph()
-        target_graph.add_node(0, features=np.array([0, 1, 0], dtype=np.float32))
-        target_graph.add_edge(1, 0, features=np.array([0, 0, 1], dtype=np.float32))
-        target_graph.add_node(1, features=np.array([0, 0, 1], dtype=np.float32))
-        target_graph.add_edge(1, 2, features=np.array([0, 0, 1], dtype=np.float32))
-        target_graph.add_node(2, features=np.array([0, 1, 0], dtype=np.float32))
-        target_graph.graph['features'] = np.zeros(5, dtype=np.float32)
+    def test_learner_runs_with_batches(self):
+        input_graph, target_graph = create_graphs()
+        learner = create_learner()
+        learner([input_graph] * 3, [target_graph] * 3, [input_graph], [target_graph], num_training_iterations=50,
+                batch_size=2)
 
-        thing_embedder = ThingEmbedder(node_types=['a', 'b', 'c'], type_embedding_dim=5,
-                                       attr_embedding_dim=6, categorical_attributes={}, continuous_attributes={})
+    def test_learner_runs_with_batches_from_dataset(self):
+        input_graph, target_graph = create_graphs()
+        learner = create_learner()
+        learner([input_graph] * 3, [target_graph] * 3, [input_graph], [target_graph], num_training_iterations=50,
+                batch_size=2, prefetch_batches=2)
 
-        role_embedder = RoleEmbedder(num_edge_types=2, type_embedding_dim=5)
+    def test_learner_runs_with_batches_from_memmap_dataset(self):
+        input_graph, target_graph = create_graphs()
+        learner = create_learner()
+        with tempfile.TemporaryDirectory() as directory:
+            write_memmap_dataset(directory, [input_graph] * 3, [target_graph] * 3, shuffle=True)
+            _, _, tr_info = learner(None, None, [input_graph], [target_graph], num_training_iterations=50,
+                                    batch_size=2, tr_dataset_dir=directory)
+        self.assertGreater(len(tr_info[0]), 0)
 
-        kgcn = KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3)
+    def test_learner_runs_with_more_generalisation_steps_than_training_steps(self):
+        input_graph, target_graph = create_graphs()
+        learner = create_learner(num_processing_steps_tr=2, num_processing_steps_ge=3)
+        _, test_values, _ = learner([input_graph], [target_graph], [input_graph], [target_graph],
+                                    num_training_iterations=50)
+        self.assertEqual(3, len(test_values["outputs"]))
 
-        learner = KGCNLearner(kgcn, num_processing_steps_tr=2, num_processing_steps_ge=2)
+    def test_learner_runs_with_fewer_generalisation_steps_than_training_steps(self):
+        input_graph, target_graph = create_graphs()
+        learner = create_learner(num_processing_steps_tr=3, num_processing_steps_ge=2)
+        _, test_values, _ = learner([input_graph], [target_graph], [input_graph], [target_graph],
+                                    num_training_iterations=50)
+        self.assertEqual(2, len(test_values["outputs"]))
 
-        learner([input_graph], [target_graph], [input_graph], [target_graph], num_training_iterations=50)
+    def test_learner_runs_with_while_loop_and_loss_over_last_steps(self):
+        input_graph, target_graph = create_graphs()
+        learner = create_learner(num_processing_steps_tr=5, num_processing_steps_ge=5, use_while_loop=True,
+                                 num_loss_steps=2)
+        _, test_values, _ = learner([input_graph], [target_graph], [input_graph], [target_graph],
+                                    num_training_iterations=50)
+        self.assertEqual(2, len(test_values["outputs"]))
+
+    def test_while_loop_model_is_run_for_training_and_generalisation_steps_separately(self):
+        input_graph, target_graph = create_graphs()
+        model = RecordingModel(create_kgcn(use_while_loop=True))
+        learner = KGCNLearner(model, num_processing_steps_tr=2, num_processing_steps_ge=4)
+        _, test_values, _ = learner([input_graph], [target_graph], [input_graph], [target_graph],
+                                    num_training_iterations=10)
+
+        self.assertEqual([(2, dict(num_outputs=2)), (4, dict(num_outputs=4))], model.connections)
+        self.assertEqual(4, len(test_values["outputs"]))
+
+    def test_unrolled_model_is_run_once_for_training_and_generalisation_steps(self):
+        input_graph, target_graph = create_graphs()
+        model = RecordingModel(create_kgcn())
+        learner = KGCNLearner(model, num_processing_steps_tr=2, num_processing_steps_ge=4)
+        learner([input_graph], [target_graph], [input_graph], [target_graph], num_training_iterations=10)
+
+        self.assertEqual([(4, dict())], model.connections)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import json
+import os
+
+import numpy as np
+from graph_nets.graphs import GraphsTuple
+
+from kglib.kgcn.learn.feed import create_graphs_tuples
+
+FEATURE_FIELDS = ('nodes', 'edges', 'globals')
+GRAPHS_TUPLES = ('input', 'target')
+METADATA_FILE = 'metadata.json'
+
+
+def array_file_name(name):
+    return f'{name}.bin'
+
+
+class MemmapDatasetWriter:
+    """
+    Writes input and target GraphsTuples to a directory of flat binary files, one per field, that `MemmapDataset` can
+    memory-map. Graphs are appended a GraphsTuple at a time, so a dataset can be written without ever holding all of
+    its graphs in memory.
+
+    The input and target features are written to separate files, while the structure they share, the senders,
+    receivers, n_node and n_edge, is written once. Senders and receivers are written as indices into all of the nodes
+    of the dataset. The offset of each graph's first node and first edge is written as an index once the writer is
+    closed.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Directory to write the dataset to, created if it doesn't exist. Any dataset already there is
+                overwritten
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = dict()
+        self._arrays_metadata = dict()
+        self.num_graphs = 0
+        self.num_nodes = 0
+        self.num_edges = 0
+
+    def _append(self, name, array):
+        array = np.ascontiguousarray(array)
+        array_metadata = dict(dtype=array.dtype.str, shape=list(array.shape[1:]))
+        expected_metadata = self._arrays_metadata.setdefault(name, array_metadata)
+        if array_metadata != expected_metadata:
+            raise ValueError(f'"{name}" must have dtype {expected_metadata["dtype"]} and shape '
+                             f'[None] + {expected_metadata["shape"]} throughout the dataset, but got dtype '
+                             f'{array_metadata["dtype"]} and shape {list(array.shape)}')
+        if name not in self._files:
+            self._files[name] = open(os.path.join(self.directory, array_file_name(name)), 'wb')
+        self._files[name].write(array.tobytes())
+
+    def write(self, input_graphs, target_graphs):
+        """
+        Appends graphs to the dataset
+
+        Args:
+            input_graphs: GraphsTuple of numpy arrays of input graphs, with no `None` fields
+            target_graphs: GraphsTuple of numpy arrays of the target graphs, with the same structure as `input_graphs`
+        """
+        if not (np.array_equal(input_graphs.n_node, target_graphs.n_node)
+                and np.array_equal(input_graphs.n_edge, target_graphs.n_edge)):
+            raise ValueError('The input and target graphs must have the same structure')
+
+        for prefix, graphs_tuple in zip(GRAPHS_TUPLES, (input_graphs, target_graphs)):
+            for field in FEATURE_FIELDS:
+                value = getattr(graphs_tuple, field)
+                if value is None:
+                    raise ValueError(f'GraphsTuple field "{field}" must not be None to be written to a dataset')
+                self._append(f'{prefix}_{field}', value)
+
+        self._append('senders', np.asarray(input_graphs.senders, dtype=np.int64) + self.num_nodes)
+        self._append('receivers', np.asarray(input_graphs.receivers, dtype=np.int64) + self.num_nodes)
+        self._append('n_node', np.asarray(input_graphs.n_node, dtype=np.int64))
+        self._append('n_edge', np.asarray(input_graphs.n_edge, dtype=np.int64))
+
+        self.num_graphs += len(input_graphs.n_node)
+        self.num_nodes += int(np.sum(input_graphs.n_node))
+        self.num_edges += int(np.sum(input_graphs.n_edge))
+
+    def close(self):
+        """
+        Writes the offset index and the metadata describing the files. The dataset can only be read once this is done
+        """
+        for f in self._files.values():
+            f.close()
+        self._files = dict()
+
+        for name, counts_name in [('node_offsets', 'n_node'), ('edge_offsets', 'n_edge')]:
+            counts_path = os.path.join(self.directory, array_file_name(counts_name))
+            counts = np.fromfile(counts_path, dtype=np.int64) if os.path.exists(counts_path) else np.zeros(0, np.int64)
+            offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            offsets.tofile(os.path.join(self.directory, array_file_name(name)))
+            self._arrays_metadata[name] = dict(dtype=offsets.dtype.str, shape=[])
+
+        metadata = dict(num_graphs=self.num_graphs, num_nodes=self.num_nodes, num_edges=self.num_edges,
+                        arrays=self._arrays_metadata)
+        with open(os.path.join(self.directory, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def write_memmap_dataset(directory, input_graphs, target_graphs, graphs_per_write=1000, shuffle=False, seed=1):
+    """
+    Writes input and target graphs, either networkx graphs or ColumnarGraphs, to a directory as a `MemmapDataset`,
+    converting them to GraphsTuples a few at a time
+
+    Args:
+        directory: Directory to write the dataset to
+        input_graphs: The input graphs
+        target_graphs: The target graphs, in the same order
+        graphs_per_write: The number of graphs to convert to GraphsTuples and write at a time
+        shuffle: Whether to write the graphs in a random order, so that the graphs batched together by
+            `MemmapDataset.batches` aren't those that were neighbours in `input_graphs`
+        seed: Seed for the shuffling
+    """
+    order = np.arange(len(input_graphs))
+    if shuffle:
+        order = np.random.RandomState(seed).permutation(order)
+    with MemmapDatasetWriter(directory) as writer:
+        for start in range(0, len(input_graphs), graphs_per_write):
+            indices = order[start:start + graphs_per_write]
+            writer.write(*create_graphs_tuples([input_graphs[i] for i in indices],
+                                               [target_graphs[i] for i in indices]))
+
+
+class MemmapDataset:
+    """
+    Reads the input and target graphs written by `MemmapDatasetWriter`, memory-mapping its files rather than loading
+    them, so that datasets larger than memory can be trained on.
+
+    A batch is a contiguous range of graphs, so its nodes, edges and globals are slices of the memory-mapped files,
+    without any copying. Only the senders and receivers are copied, to index into the batch's nodes rather than the
+    dataset's. Since the batches must be contiguous, `batches` can't shuffle the graphs themselves. Instead, it moves
+    the boundaries between the batches by a random offset each epoch, so that graphs aren't always batched with the
+    same others, and shuffles the order of the batches. Graphs are still batched with those written near them, so to
+    train on the graphs in a random order, also write them shuffled, with `write_memmap_dataset(..., shuffle=True)`.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Directory that a dataset was written to
+        """
+        self.directory = directory
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        self.num_graphs = metadata['num_graphs']
+        counts = dict(nodes=metadata['num_nodes'], edges=metadata['num_edges'], globals=self.num_graphs)
+
+        self._arrays = dict()
+        for name, array_metadata in metadata['arrays'].items():
+            if name.endswith('_offsets'):
+                count = self.num_graphs + 1
+            elif name in ('senders', 'receivers'):
+                count = counts['edges']
+            elif name in ('n_node', 'n_edge'):
+                count = self.num_graphs
+            else:
+                count = counts[name.split('_', 1)[1]]
+            self._arrays[name] = self._map(name, array_metadata, count)
+
+    def _map(self, name, array_metadata, count):
+        shape = tuple([count] + array_metadata['shape'])
+        dtype = np.dtype(array_metadata['dtype'])
+        if count == 0 or 0 in shape:
+            # An empty file can't be memory-mapped
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.directory, array_file_name(name)), dtype=dtype, mode='r', shape=shape)
+
+    def graphs_tuples(self, start, stop):
+        """
+        Slices a contiguous range of graphs out of the dataset
+
+        Args:
+            start: Index of the first graph
+            stop: Index after the last graph
+
+        Returns:
+            Input and target GraphsTuples of the graphs. The features are read-only views of the memory-mapped files
+        """
+        node_offsets = self._arrays['node_offsets']
+        edge_offsets = self._arrays['edge_offsets']
+        stop = min(stop, self.num_graphs)
+        first_node, last_node = node_offsets[start], node_offsets[stop]
+        first_edge, last_edge = edge_offsets[start], edge_offsets[stop]
+
+        structure = dict(
+            senders=(self._arrays['senders'][first_edge:last_edge] - first_node).astype(np.int32),
+            receivers=(self._arrays['receivers'][first_edge:last_edge] - first_node).astype(np.int32),
+            n_node=np.asarray(self._arrays['n_node'][start:stop], dtype=np.int32),
+            n_edge=np.asarray(self._arrays['n_edge'][start:stop], dtype=np.int32))
+
+        def select(prefix):
+            return GraphsTuple(nodes=self._arrays[f'{prefix}_nodes'][first_node:last_node],
+                               edges=self._arrays[f'{prefix}_edges'][first_edge:last_edge],
+                               globals=self._arrays[f'{prefix}_globals'][start:stop],
+                               **structure)
+
+        return tuple(select(prefix) for prefix in GRAPHS_TUPLES)
+
+    def batches(self, batch_size=None, shuffle=True, seed=1):
+        """
+        Iterates over batches of graphs indefinitely. Every graph is seen exactly once per epoch
+
+        Args:
+            batch_size: The maximum number of graphs in each batch. If None, every batch holds all of the graphs
+            shuffle: Whether to move the boundaries between the batches by a random offset, and to shuffle the order
+                of the batches, each epoch. With an offset, the first graphs form a smaller batch of their own
+            seed: Seed for the shuffling, so that the sequence of batches is deterministic
+
+        Returns:
+            Generator of input and target GraphsTuples
+        """
+        if self.num_graphs == 0:
+            raise ValueError(f'There are no graphs in the dataset at {self.directory}')
+        if batch_size is None:
+            batch_size = self.num_graphs
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least 1, but got {batch_size}')
+
+        random_state = np.random.RandomState(seed)
+        while True:
+            offset = random_state.randint(batch_size) if shuffle and batch_size < self.num_graphs else 0
+            starts = np.arange(offset, self.num_graphs, batch_size)
+            if offset > 0:
+                starts = np.concatenate([[0], starts])
+            stops = np.append(starts[1:], self.num_graphs)
+            order = random_state.permutation(len(starts)) if shuffle else range(len(starts))
+            for i in order:
+                yield self.graphs_tuples(starts[i], stops[i])
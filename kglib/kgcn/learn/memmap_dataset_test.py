@@ -0,0 +1,124 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+from graph_nets import utils_np
+
+from kglib.kgcn.learn.memmap_dataset import MemmapDataset, MemmapDatasetWriter, write_memmap_dataset
+
+
+def create_graph(num_nodes, offset):
+    graph = nx.MultiDiGraph()
+    for node in range(num_nodes):
+        graph.add_node(node, features=np.array([offset + node, 0], dtype=np.float32))
+    for node in range(num_nodes - 1):
+        graph.add_edge(node, node + 1, features=np.array([offset + node, 1], dtype=np.float32))
+    graph.graph['features'] = np.array([offset], dtype=np.float32)
+    return graph
+
+
+class TestMemmapDataset(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._input_graphs = [create_graph(num_nodes, 100 * i) for i, num_nodes in enumerate([3, 2, 4, 2, 5])]
+        self._target_graphs = [create_graph(num_nodes, -100 * i) for i, num_nodes in enumerate([3, 2, 4, 2, 5])]
+        # Write the graphs a few at a time, so that the senders and receivers of later writes must be offset
+        write_memmap_dataset(self._directory.name, self._input_graphs, self._target_graphs, graphs_per_write=2)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def assertGraphsTuplesEqual(self, expected, actual):
+        for field in ['nodes', 'edges', 'globals', 'senders', 'receivers', 'n_node', 'n_edge']:
+            np.testing.assert_array_equal(getattr(expected, field), getattr(actual, field), err_msg=field)
+            self.assertEqual(getattr(expected, field).dtype, getattr(actual, field).dtype, msg=field)
+
+    def test_graphs_tuples_match_those_built_from_networkx(self):
+        dataset = MemmapDataset(self._directory.name)
+        self.assertEqual(5, dataset.num_graphs)
+
+        input_graphs, target_graphs = dataset.graphs_tuples(1, 4)
+
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple(self._input_graphs[1:4]), input_graphs)
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple(self._target_graphs[1:4]), target_graphs)
+
+    def test_features_are_views_of_the_mapped_files(self):
+        input_graphs, _ = MemmapDataset(self._directory.name).graphs_tuples(2, 5)
+        for features in [input_graphs.nodes, input_graphs.edges, input_graphs.globals]:
+            self.assertIsInstance(features, np.memmap)
+            self.assertFalse(features.flags.writeable)
+
+    def test_each_graph_is_seen_once_per_epoch(self):
+        batches = MemmapDataset(self._directory.name).batches(batch_size=2)
+
+        for _ in range(3):
+            globals_seen = []
+            while len(globals_seen) < 5:
+                input_batch, _ = next(batches)
+                globals_seen.extend(input_batch.globals[:, 0])
+            self.assertCountEqual([0, 100, 200, 300, 400], globals_seen)
+
+    def test_graphs_are_batched_with_different_graphs_across_epochs(self):
+        batches = MemmapDataset(self._directory.name).batches(batch_size=2)
+
+        batch_contents = set()
+        for _ in range(30):
+            input_batch, _ = next(batches)
+            batch_contents.add(tuple(sorted(input_batch.globals[:, 0])))
+
+        self.assertIn((0, 100), batch_contents)
+        self.assertIn((100, 200), batch_contents)
+
+    def test_batches_are_in_order_when_not_shuffled(self):
+        batches = MemmapDataset(self._directory.name).batches(batch_size=2, shuffle=False)
+
+        for _ in range(2):
+            globals_seen = [list(next(batches)[0].globals[:, 0]) for _ in range(3)]
+            self.assertEqual([[0, 100], [200, 300], [400]], globals_seen)
+
+    def test_graphs_are_written_shuffled(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        write_memmap_dataset(directory.name, self._input_graphs, self._target_graphs, graphs_per_write=2,
+                             shuffle=True, seed=3)
+
+        input_graphs, target_graphs = MemmapDataset(directory.name).graphs_tuples(0, 5)
+
+        order = np.random.RandomState(3).permutation(5)
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple([self._input_graphs[i] for i in order]),
+                                     input_graphs)
+        self.assertGraphsTuplesEqual(utils_np.networkxs_to_graphs_tuple([self._target_graphs[i] for i in order]),
+                                     target_graphs)
+
+    def test_features_with_a_different_shape_raise_exception(self):
+        input_graphs = utils_np.networkxs_to_graphs_tuple(self._input_graphs[:1])
+        target_graphs = utils_np.networkxs_to_graphs_tuple(self._target_graphs[:1])
+        with MemmapDatasetWriter(self._directory.name) as writer:
+            writer.write(input_graphs, target_graphs)
+            with self.assertRaises(ValueError):
+                writer.write(input_graphs.replace(nodes=np.zeros((3, 4), dtype=np.float32)), target_graphs)
+
+
+if __name__ == "__main__":
+    unittest.main()
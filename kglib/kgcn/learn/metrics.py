@@ -18,9 +18,6 @@
 #
 
 import numpy as np
-from graph_nets import utils_np
-
-from scipy.special import softmax
 
 
 def compute_accuracy(target, output, use_nodes=True, use_edges=True):
@@ -44,59 +41,81 @@ def compute_accuracy(target, output, use_nodes=True, use_edges=True):
     """
     if not use_nodes and not use_edges:
         raise ValueError("Nodes or edges (or both) must be used")
-    tdds = utils_np.graphs_tuple_to_data_dicts(target)
-    odds = utils_np.graphs_tuple_to_data_dicts(output)
-    cs = []
-    ss = []
-    for td, od in zip(tdds, odds):
-        xn = np.argmax(td["nodes"], axis=-1)
-        yn = np.argmax(od["nodes"], axis=-1)
-        xe = np.argmax(td["edges"], axis=-1)
-        ye = np.argmax(od["edges"], axis=-1)
-        c = []
-        if use_nodes:
-            c.append(xn == yn)
-        if use_edges:
-            c.append(xe == ye)
-        c = np.concatenate(c, axis=0)
-        s = np.all(c)
-        cs.append(c)
-        ss.append(s)
-    correct = np.mean(np.concatenate(cs, axis=0))
-    solved = np.mean(np.stack(ss))
+
+    corrects = []
+    incorrect_per_graph = np.zeros(len(target.n_node), dtype=np.int64)
+    for field, count_field in used_fields(use_nodes, use_edges):
+        c = np.argmax(getattr(target, field), axis=-1) == np.argmax(getattr(output, field), axis=-1)
+        corrects.append(c)
+        incorrect_per_graph += segment_sum(~c, getattr(target, count_field))
+
+    correct = np.mean(np.concatenate(corrects, axis=0))
+    solved = np.mean(incorrect_per_graph == 0)
     return correct, solved
 
 
 def existence_accuracy(target, output, use_nodes=True, use_edges=True):
+    """
+    Calculates the accuracy of predicting the existence of the nodes and edges that are not given as pre-existing. The
+    whole of the GraphsTuples are worked on at once, rather than graph by graph
+
+    Args:
+        target: GraphsTuple of the target graphs
+        output: GraphsTuple of the outputs of the model for the same graphs
+        use_nodes: Whether to include the nodes
+        use_edges: Whether to include the edges
+
+    Returns:
+        correct: The fraction of the nodes and edges to predict which are predicted correctly
+        solved: The fraction of graphs whose nodes and edges to predict are all predicted correctly
+    """
     if not use_nodes and not use_edges:
         raise ValueError("Nodes or edges (or both) must be used")
-    tdds = utils_np.graphs_tuple_to_data_dicts(target)
-    odds = utils_np.graphs_tuple_to_data_dicts(output)
-    cs = []
-    ss = []
-    for td, od in zip(tdds, odds):
-
-        nodes_to_predict = td["nodes"][:, 0] == 0
-        xn = np.argmax(td["nodes"][:, 1:], axis=-1)
-        xn = xn[nodes_to_predict]
-        yn = np.argmax(softmax(od["nodes"][:, 1:], axis=1), axis=-1)
-        yn = yn[nodes_to_predict]
-
-        edges_to_predict = td["edges"][:, 0] == 0
-        xe = np.argmax(td["edges"][:, 1:], axis=-1)
-        xe = xe[edges_to_predict]
-        ye = np.argmax(softmax(od["edges"][:, 1:], axis=1), axis=-1)
-        ye = ye[edges_to_predict]
-
-        c = []
-        if use_nodes:
-            c.append(xn == yn)
-        if use_edges:
-            c.append(xe == ye)
-        c = np.concatenate(c, axis=0)
-        s = np.all(c)
-        cs.append(c)
-        ss.append(s)
-    correct = np.mean(np.concatenate(cs, axis=0))
-    solved = np.mean(np.stack(ss))
+
+    corrects = []
+    incorrect_per_graph = np.zeros(len(target.n_node), dtype=np.int64)
+    for field, count_field in used_fields(use_nodes, use_edges):
+        target_features = getattr(target, field)
+        to_predict = target_features[:, 0] == 0
+        x = np.argmax(target_features[:, 1:], axis=-1)
+        # Softmax doesn't change which class is the largest, so the argmax is taken of the logits directly
+        y = np.argmax(getattr(output, field)[:, 1:], axis=-1)
+        c = x == y
+        corrects.append(c[to_predict])
+        incorrect_per_graph += segment_sum(to_predict & ~c, getattr(target, count_field))
+
+    correct = np.mean(np.concatenate(corrects, axis=0))
+    solved = np.mean(incorrect_per_graph == 0)
     return correct, solved
+
+
+def used_fields(use_nodes, use_edges):
+    fields = []
+    if use_nodes:
+        fields.append(('nodes', 'n_node'))
+    if use_edges:
+        fields.append(('edges', 'n_edge'))
+    return fields
+
+
+def segment_sum(values, sizes):
+    """
+    Sums consecutive segments of a flat array, as `np.add.reduceat` does, but giving zero for empty segments
+
+    Args:
+        values: Flat array of numbers or booleans
+        sizes: The number of elements in each segment, in order, summing to the length of `values`
+
+    Returns:
+        int64 array of the sum of each segment
+    """
+    sizes = np.asarray(sizes)
+    if len(sizes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(sizes) - sizes
+    # reduceat can't start a segment at the end of the array, which trailing empty segments do, so pad it
+    padded = np.append(np.asarray(values, dtype=np.int64), 0)
+    sums = np.add.reduceat(padded, offsets)
+    # reduceat gives the element at the start of an empty segment, rather than zero
+    sums[sizes == 0] = 0
+    return sums
@@ -0,0 +1,124 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import time
+
+import numpy as np
+from graph_nets import utils_np
+from graph_nets.graphs import GraphsTuple
+from scipy.special import softmax
+
+from kglib.kgcn.learn.metrics import existence_accuracy
+
+
+def synthetic_graphs_tuples(num_graphs, random_state, max_nodes=30, max_edges=60, num_classes=3):
+    """
+    Creates target and output GraphsTuples of random graphs, with some of their nodes and edges pre-existing
+    """
+    n_node = random_state.randint(0, max_nodes, num_graphs)
+    n_edge = random_state.randint(0, max_edges, num_graphs) * (n_node > 0)
+
+    def features(num_elements):
+        classes = random_state.randint(0, num_classes, num_elements)
+        target = np.eye(num_classes, dtype=np.float32)[classes]
+        output = target + random_state.normal(0, 0.6, target.shape).astype(np.float32)
+        return target, output
+
+    graphs_tuples = []
+    t_nodes, o_nodes = features(n_node.sum())
+    t_edges, o_edges = features(n_edge.sum())
+    # Edges only need to be valid node indices within their own graph for the data dicts to be split apart
+    senders = np.repeat(np.cumsum(n_node) - n_node, n_edge).astype(np.int32)
+    for nodes, edges in [(t_nodes, t_edges), (o_nodes, o_edges)]:
+        graphs_tuples.append(GraphsTuple(nodes=nodes, edges=edges, globals=None, senders=senders, receivers=senders,
+                                         n_node=n_node, n_edge=n_edge))
+    return graphs_tuples
+
+
+def per_graph_existence_accuracy(target, output, use_nodes=True, use_edges=True):
+    """
+    Calculates existence accuracy graph by graph, as it was calculated before `existence_accuracy` worked on the whole
+    GraphsTuple at once
+    """
+    tdds = utils_np.graphs_tuple_to_data_dicts(target)
+    odds = utils_np.graphs_tuple_to_data_dicts(output)
+    cs = []
+    ss = []
+    for td, od in zip(tdds, odds):
+        nodes_to_predict = td["nodes"][:, 0] == 0
+        xn = np.argmax(td["nodes"][:, 1:], axis=-1)
+        xn = xn[nodes_to_predict]
+        yn = np.argmax(softmax(od["nodes"][:, 1:], axis=1), axis=-1)
+        yn = yn[nodes_to_predict]
+
+        edges_to_predict = td["edges"][:, 0] == 0
+        xe = np.argmax(td["edges"][:, 1:], axis=-1)
+        xe = xe[edges_to_predict]
+        ye = np.argmax(softmax(od["edges"][:, 1:], axis=1), axis=-1)
+        ye = ye[edges_to_predict]
+
+        c = []
+        if use_nodes:
+            c.append(xn == yn)
+        if use_edges:
+            c.append(xe == ye)
+        c = np.concatenate(c, axis=0)
+        s = np.all(c)
+        cs.append(c)
+        ss.append(s)
+    correct = np.mean(np.concatenate(cs, axis=0))
+    solved = np.mean(np.stack(ss))
+    return correct, solved
+
+
+def benchmark(num_graphs=10000, repeats=3):
+    """
+    Compares the time taken to compute existence accuracy on an evaluation set graph by graph, against computing it on
+    the whole GraphsTuple at once with `existence_accuracy`. Both must give identical results
+
+    Returns:
+        Seconds taken graph by graph, and for the whole GraphsTuple
+    """
+    target, output = synthetic_graphs_tuples(num_graphs, np.random.RandomState(0))
+
+    timings = []
+    results = []
+    for accuracy_fn in [per_graph_existence_accuracy, existence_accuracy]:
+        seconds = []
+        for _ in range(repeats):
+            start_time = time.time()
+            result = accuracy_fn(target, output)
+            seconds.append(time.time() - start_time)
+        timings.append(min(seconds))
+        results.append(result)
+
+    if results[0] != results[1]:
+        raise AssertionError(f'Results differ: per graph {results[0]}, batched {results[1]}')
+
+    per_graph_seconds, batched_seconds = timings
+    print(f'{num_graphs} graphs, {target.n_node.sum()} nodes and {target.n_edge.sum()} edges')
+    print(f'correct {results[1][0]:.4f}, solved {results[1][1]:.4f}')
+    print(f'per graph: {per_graph_seconds * 1000:.1f}ms')
+    print(f'batched: {batched_seconds * 1000:.1f}ms')
+    print(f'{per_graph_seconds / batched_seconds:.1f}x faster')
+    return per_graph_seconds, batched_seconds
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -22,7 +22,17 @@ import unittest
 import numpy as np
 from graph_nets.graphs import GraphsTuple
 
-from kglib.kgcn.learn.metrics import compute_accuracy, existence_accuracy
+from kglib.kgcn.learn.metrics import compute_accuracy, existence_accuracy, segment_sum
+
+
+def graphs_tuple(nodes, edges, n_node, n_edge):
+    return GraphsTuple(nodes=nodes,
+                       edges=edges,
+                       globals=None,
+                       receivers=np.zeros(len(edges), dtype=np.int32),
+                       senders=np.zeros(len(edges), dtype=np.int32),
+                       n_node=np.array(n_node),
+                       n_edge=np.array(n_edge))
 
 
 class TestComputeAccuracy(unittest.TestCase):
@@ -64,6 +74,21 @@ class TestComputeAccuracy(unittest.TestCase):
         self.assertEqual(expected_correct, correct)
         self.assertEqual(expected_solved, solved)
 
+    def test_graphs_are_solved_separately(self):
+        t_nodes = np.array([[1, 0], [0, 1], [1, 0]], dtype=np.float32)
+        o_nodes = np.array([[1, 0], [0, 1], [0, 1]], dtype=np.float32)
+        t_edges = np.array([[0, 1], [1, 0]], dtype=np.float32)
+        o_edges = np.array([[0, 1], [1, 0]], dtype=np.float32)
+
+        # The second graph's only node is wrong, and the third graph is empty so is solved
+        target = graphs_tuple(t_nodes, t_edges, [2, 1, 0], [2, 0, 0])
+        output = graphs_tuple(o_nodes, o_edges, [2, 1, 0], [2, 0, 0])
+
+        correct, solved = compute_accuracy(target, output)
+
+        self.assertEqual(4 / 5, correct)
+        self.assertEqual(2 / 3, solved)
+
 
 class TestExistenceAccuracy(unittest.TestCase):
 
@@ -104,6 +129,51 @@ class TestExistenceAccuracy(unittest.TestCase):
         self.assertEqual(expected_correct, correct)
         self.assertEqual(expected_solved, solved)
 
+    def test_graphs_are_solved_separately(self):
+        # The first node is pre-existing, so its wrong prediction doesn't count
+        t_nodes = np.array([[1, 0, 1], [0, 0, 1], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+        o_nodes = np.array([[0, 1, 0], [0, 0, 1], [0, 0, 1], [0, 0, 1]], dtype=np.float32)
+        t_edges = np.array([[0, 0, 1], [0, 1, 0]], dtype=np.float32)
+        o_edges = np.array([[0, 0, 1], [0, 0, 1]], dtype=np.float32)
+
+        # The second graph has a wrong node, the third a wrong edge, and the fourth is empty so is solved
+        target = graphs_tuple(t_nodes, t_edges, [2, 1, 1, 0], [0, 1, 1, 0])
+        output = graphs_tuple(o_nodes, o_edges, [2, 1, 1, 0], [0, 1, 1, 0])
+
+        correct, solved = existence_accuracy(target, output)
+
+        self.assertEqual(3 / 5, correct)
+        self.assertEqual(2 / 4, solved)
+
+    def test_only_nodes_can_be_used(self):
+        t_nodes = np.array([[0, 0, 1], [0, 1, 0]], dtype=np.float32)
+        o_nodes = np.array([[0, 0, 1], [0, 1, 0]], dtype=np.float32)
+        t_edges = np.array([[0, 0, 1]], dtype=np.float32)
+        o_edges = np.array([[0, 1, 0]], dtype=np.float32)
+
+        target = graphs_tuple(t_nodes, t_edges, [1, 1], [1, 0])
+        output = graphs_tuple(o_nodes, o_edges, [1, 1], [1, 0])
+
+        correct, solved = existence_accuracy(target, output, use_edges=False)
+
+        self.assertEqual(1.0, correct)
+        self.assertEqual(1.0, solved)
+
+    def test_using_neither_nodes_nor_edges_raises(self):
+        target = graphs_tuple(np.zeros((1, 3)), np.zeros((0, 3)), [1], [0])
+        with self.assertRaises(ValueError):
+            existence_accuracy(target, target, use_nodes=False, use_edges=False)
+
+
+class TestSegmentSum(unittest.TestCase):
+
+    def test_empty_segments_sum_to_zero(self):
+        values = np.array([True, False, True, True])
+        np.testing.assert_array_equal(np.array([0, 1, 0, 1, 1, 0]), segment_sum(values, [0, 2, 0, 1, 1, 0]))
+
+    def test_no_segments_gives_empty_array(self):
+        self.assertEqual(0, len(segment_sum(np.array([], dtype=bool), [])))
+
 
 if __name__ == "__main__":
     unittest.main()
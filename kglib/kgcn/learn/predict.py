@@ -0,0 +1,98 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import tensorflow as tf
+from graph_nets import utils_np, utils_tf
+from graph_nets.graphs import GraphsTuple
+
+from kglib.kgcn.learn.checkpoint import restore_checkpoint
+from kglib.kgcn.learn.feed import graphs_to_graphs_tuple
+from kglib.kgcn.models.instrumentation import OFF, instrumentation_level
+
+
+class Predictor:
+    """
+    Scores encoded input graphs with a trained model restored from a checkpoint, without training. The forward graph is
+    built once, for a fixed number of processing steps, and its session is kept open, so each batch of graphs only
+    costs running the model
+    """
+    def __init__(self, model_fn, checkpoint_path, input_graph, num_processing_steps_ge=10, instrumentation=OFF):
+        """
+        Args:
+            model_fn: Function taking no arguments that builds the model, as it was built for training but without
+                dropout, which would otherwise make predictions random. It's called with the Predictor's own tf.Graph
+                as the default, so that the model's variables have the same names as those saved in the checkpoint
+            checkpoint_path: The path prefix of the checkpoint saved by `KGCNLearner`, or a directory holding it
+            input_graph: An encoded input graph, as a networkx graph or ColumnarGraph, to shape the input placeholders
+                by. Graphs of any size can be scored, provided they have the same feature sizes
+            num_processing_steps_ge: Number of processing (message-passing) steps to run the model for
+            instrumentation: The instrumentation level to build the model at. OFF by default, since there's no training
+                loop to write summaries
+        """
+        self._graph = tf.Graph()
+        with self._graph.as_default(), instrumentation_level(instrumentation):
+            self._input_ph = input_placeholders(input_graph, name="input_placeholders")
+
+            model = model_fn()
+            # Only the outputs of the final processing step are needed
+            self._output_op = utils_tf.make_runnable_in_session(
+                model(self._input_ph, num_processing_steps_ge)[-1])
+
+            self._sess = tf.Session(graph=self._graph)
+            restore_checkpoint(self._sess, checkpoint_path)
+        # Nothing can be added to the graph from now on, so a request can't accidentally grow it
+        self._graph.finalize()
+
+    def predict(self, input_graphs):
+        """
+        Scores a batch of encoded input graphs
+
+        Args:
+            input_graphs: The input graphs, as networkx graphs or ColumnarGraphs, or a GraphsTuple of numpy arrays
+
+        Returns:
+            GraphsTuple of numpy arrays holding the logits of each node and edge, for all of the graphs
+        """
+        if not isinstance(input_graphs, GraphsTuple):
+            input_graphs = graphs_to_graphs_tuple(input_graphs)
+        return self._sess.run(self._output_op, feed_dict={self._input_ph: input_graphs})
+
+    def close(self):
+        self._sess.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def input_placeholders(input_graph, name):
+    """
+    Creates placeholders for batches of any number of input graphs with the same feature sizes as `input_graph`
+
+    Args:
+        input_graph: An encoded input graph, as a networkx graph or ColumnarGraph
+        name: The name scope of the placeholders, each of which is named after its GraphsTuple field within it
+
+    Returns:
+        GraphsTuple of placeholders
+    """
+    data_dict = utils_np.graphs_tuple_to_data_dicts(graphs_to_graphs_tuple([input_graph]))[0]
+    return utils_tf.placeholders_from_data_dicts([data_dict], name=name)
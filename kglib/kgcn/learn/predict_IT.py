@@ -0,0 +1,152 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import os
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+import tensorflow as tf
+
+from kglib.kgcn.learn.export import export_frozen_graph, FrozenPredictor
+from kglib.kgcn.learn.learn import KGCNLearner
+from kglib.kgcn.learn.predict import Predictor
+from kglib.kgcn.models.core import KGCN
+from kglib.kgcn.models.embedding import ThingEmbedder, RoleEmbedder
+
+
+def create_graphs():
+    input_graph = nx.MultiDiGraph()
+    input_graph.add_node(0, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_edge(1, 0, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_node(1, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_edge(1, 2, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.add_node(2, features=np.array([0, 1, 2], dtype=np.float32))
+    input_graph.graph['features'] = np.zeros(5, dtype=np.float32)
+
+    target_graph = nx.MultiDiGraph()
+    target_graph.add_node(0, features=np.array([0, 1, 0], dtype=np.float32))
+    target_graph.add_edge(1, 0, features=np.array([0, 0, 1], dtype=np.float32))
+    target_graph.add_node(1, features=np.array([0, 0, 1], dtype=np.float32))
+    target_graph.add_edge(1, 2, features=np.array([0, 0, 1], dtype=np.float32))
+    target_graph.add_node(2, features=np.array([0, 1, 0], dtype=np.float32))
+    target_graph.graph['features'] = np.zeros(5, dtype=np.float32)
+
+    return input_graph, target_graph
+
+
+def create_model(continuous_attributes=None, use_dropout=True):
+    thing_embedder = ThingEmbedder(node_types=['a', 'b', 'c'], type_embedding_dim=5,
+                                   attr_embedding_dim=6, categorical_attributes={},
+                                   continuous_attributes={} if continuous_attributes is None else continuous_attributes,
+                                   use_dropout=use_dropout)
+
+    role_embedder = RoleEmbedder(num_edge_types=2, type_embedding_dim=5)
+
+    return KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3)
+
+
+class ITPredictor(unittest.TestCase):
+    def setUp(self):
+        tf.reset_default_graph()
+
+    def test_predictions_match_those_at_the_end_of_training(self):
+        input_graph, target_graph = create_graphs()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'model', 'kgcn')
+
+            learner = KGCNLearner(create_model(), num_processing_steps_tr=2, num_processing_steps_ge=2)
+            _, test_values, _ = learner([input_graph], [target_graph], [input_graph], [target_graph],
+                                        num_training_iterations=20, checkpoint_path=checkpoint_path)
+
+            with Predictor(create_model, checkpoint_path, input_graph, num_processing_steps_ge=2) as predictor:
+                logits = predictor.predict([input_graph, input_graph])
+
+        expected_logits = test_values["outputs"][-1]
+        np.testing.assert_allclose(np.concatenate([expected_logits.nodes] * 2), logits.nodes, rtol=1e-5)
+        np.testing.assert_allclose(np.concatenate([expected_logits.edges] * 2), logits.edges, rtol=1e-5)
+
+    def test_checkpoint_directory_restores_latest_checkpoint(self):
+        input_graph, target_graph = create_graphs()
+        with tempfile.TemporaryDirectory() as directory:
+            learner = KGCNLearner(create_model(), num_processing_steps_tr=2, num_processing_steps_ge=2)
+            learner([input_graph], [target_graph], [input_graph], [target_graph], num_training_iterations=5,
+                    checkpoint_path=os.path.join(directory, 'kgcn'))
+
+            with Predictor(create_model, directory, input_graph, num_processing_steps_ge=2) as predictor:
+                logits = predictor.predict([input_graph])
+
+        self.assertEqual((3, 3), logits.nodes.shape)
+
+    def test_predictions_with_continuous_attributes_are_deterministic(self):
+        # The nodes are all of type 'b', so they are embedded by the continuous attribute's MLP, which applies dropout
+        # unless the model is built without it for inference
+        continuous_attributes = {'b': (0, 5)}
+        input_graph, target_graph = create_graphs()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'kgcn')
+            learner = KGCNLearner(create_model(continuous_attributes), num_processing_steps_tr=2,
+                                  num_processing_steps_ge=2)
+            learner([input_graph], [target_graph], [input_graph], [target_graph], num_training_iterations=5,
+                    checkpoint_path=checkpoint_path)
+
+            def model_fn():
+                return create_model(continuous_attributes, use_dropout=False)
+
+            with Predictor(model_fn, checkpoint_path, input_graph, num_processing_steps_ge=2) as predictor:
+                logits = predictor.predict([input_graph, input_graph])
+                repeated_logits = predictor.predict([input_graph, input_graph])
+
+        np.testing.assert_array_equal(logits.nodes, repeated_logits.nodes)
+        np.testing.assert_array_equal(logits.nodes[:3], logits.nodes[3:])
+        np.testing.assert_array_equal(logits.edges[:2], logits.edges[2:])
+
+
+class ITExportFrozenGraph(unittest.TestCase):
+    def setUp(self):
+        tf.reset_default_graph()
+
+    def test_frozen_graph_predicts_as_the_restored_model_does(self):
+        input_graph, target_graph = create_graphs()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'kgcn')
+            export_path = os.path.join(directory, 'export', 'kgcn.pb')
+
+            learner = KGCNLearner(create_model(), num_processing_steps_tr=2, num_processing_steps_ge=2)
+            learner([input_graph], [target_graph], [input_graph], [target_graph], num_training_iterations=20,
+                    checkpoint_path=checkpoint_path)
+
+            graph_def = export_frozen_graph(create_model, checkpoint_path, input_graph, export_path,
+                                            num_processing_steps_ge=2)
+
+            with Predictor(create_model, checkpoint_path, input_graph, num_processing_steps_ge=2) as predictor:
+                expected_logits = predictor.predict([input_graph, input_graph])
+
+            with FrozenPredictor(export_path) as frozen_predictor:
+                logits = frozen_predictor.predict([input_graph, input_graph])
+
+        self.assertFalse(any(node.op in ('VariableV2', 'VarHandleOp') for node in graph_def.node))
+        self.assertFalse(any(node.op.endswith('Summary') for node in graph_def.node))
+        np.testing.assert_allclose(expected_logits.nodes, logits.nodes, rtol=1e-5)
+        np.testing.assert_allclose(expected_logits.edges, logits.edges, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
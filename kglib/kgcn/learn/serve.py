@@ -0,0 +1,197 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import asyncio
+
+import numpy as np
+from graph_nets import utils_np
+from graph_nets.graphs import GraphsTuple
+
+from kglib.utils.graph.columnar import ColumnarGraph
+
+
+class BatchingPredictor:
+    """
+    Coalesces concurrent single-graph prediction requests into batches, so that the model is run once per batch rather
+    than once per graph. Requests queue while the model runs, and form the next batch. A batch is run as soon as it's
+    full, or once its first request has waited `max_wait_seconds`, whichever comes first
+
+    Use it from within an asyncio event loop:
+
+        async with BatchingPredictor(predictor.predict) as batching_predictor:
+            logits = await batching_predictor.predict(input_graph)
+    """
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_seconds=0.005, executor=None):
+        """
+        Args:
+            predict_fn: Function taking a GraphsTuple of numpy arrays of many input graphs, and giving a GraphsTuple of
+                the outputs for the same graphs, such as `Predictor.predict`. It's run in `executor`, so the event
+                loop can keep accepting requests meanwhile
+            max_batch_size: The most graphs to run the model on at once
+            max_wait_seconds: The longest the first request of a batch waits for others to join it
+            executor: The concurrent.futures Executor to run `predict_fn` in. If None, the event loop's default is used
+        """
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size must be at least 1, but got {max_batch_size}')
+        self._predict_fn = predict_fn
+        self._max_batch_size = max_batch_size
+        self._max_wait_seconds = max_wait_seconds
+        self._executor = executor
+        self._queue = None
+        self._task = None
+        self.batch_sizes = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._serve())
+
+    async def stop(self):
+        """
+        Stops batching requests. Requests that haven't been answered are cancelled, whether they are still queued,
+        gathered into a batch that is waiting for more requests, or in a batch that the model is running on
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def predict(self, input_graph):
+        """
+        Scores one encoded input graph, in a batch with any other concurrent requests
+
+        Args:
+            input_graph: The input graph, as a networkx graph, ColumnarGraph or data dict
+
+        Returns:
+            GraphsTuple of numpy arrays of the outputs for just this graph
+        """
+        if self._task is None:
+            raise RuntimeError('BatchingPredictor must be started before making predictions')
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((to_data_dict(input_graph), future))
+        return await future
+
+    async def _serve(self):
+        loop = asyncio.get_event_loop()
+        # The requests taken off the queue and not yet answered, which only this task can answer
+        requests = []
+        try:
+            while True:
+                requests = [await self._queue.get()]
+                deadline = loop.time() + self._max_wait_seconds
+                while len(requests) < self._max_batch_size:
+                    if not self._queue.empty():
+                        requests.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        requests.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._run_batch(requests)
+                requests = []
+        finally:
+            # Stopped while gathering or running a batch, so its requests will never be answered
+            for _, future in requests:
+                if not future.done():
+                    future.cancel()
+
+    async def _run_batch(self, requests):
+        data_dicts, futures = zip(*requests)
+        self.batch_sizes.append(len(requests))
+        try:
+            batch = utils_np.data_dicts_to_graphs_tuple(data_dicts)
+            outputs = await asyncio.get_event_loop().run_in_executor(self._executor, self._predict_fn, batch)
+            outputs_per_graph = split_graphs_tuple(outputs)
+        except asyncio.CancelledError:
+            # Before Python 3.8, CancelledError is an Exception, so it must be re-raised here to stop the task rather
+            # than being given to the requests as an error
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, output in zip(futures, outputs_per_graph):
+            # A request may have been cancelled by its caller while waiting
+            if not future.done():
+                future.set_result(output)
+
+
+def to_data_dict(graph):
+    if isinstance(graph, dict):
+        return graph
+    if isinstance(graph, ColumnarGraph):
+        return graph.to_data_dict()
+    return utils_np.networkx_to_data_dict(graph)
+
+
+def split_graphs_tuple(graphs_tuple):
+    """
+    Splits a GraphsTuple of numpy arrays of many graphs into a GraphsTuple per graph, using `n_node` and `n_edge` to
+    find where each graph's nodes and edges are. The nodes and edges of each are views of those of `graphs_tuple`, and
+    the senders and receivers index its own nodes
+
+    Args:
+        graphs_tuple: GraphsTuple of numpy arrays
+
+    Returns:
+        List of GraphsTuples of one graph each, in order
+    """
+    node_offsets = np.concatenate([[0], np.cumsum(graphs_tuple.n_node)])
+    edge_offsets = np.concatenate([[0], np.cumsum(graphs_tuple.n_edge)])
+
+    def field_slice(values, start, stop):
+        return None if values is None else values[start:stop]
+
+    graphs_tuples = []
+    for i in range(len(graphs_tuple.n_node)):
+        node_start, node_stop = node_offsets[i], node_offsets[i + 1]
+        edge_start, edge_stop = edge_offsets[i], edge_offsets[i + 1]
+        senders = field_slice(graphs_tuple.senders, edge_start, edge_stop)
+        receivers = field_slice(graphs_tuple.receivers, edge_start, edge_stop)
+        graphs_tuples.append(GraphsTuple(
+            nodes=field_slice(graphs_tuple.nodes, node_start, node_stop),
+            edges=field_slice(graphs_tuple.edges, edge_start, edge_stop),
+            globals=field_slice(graphs_tuple.globals, i, i + 1),
+            senders=None if senders is None else senders - node_start,
+            receivers=None if receivers is None else receivers - node_start,
+            n_node=graphs_tuple.n_node[i:i + 1],
+            n_edge=graphs_tuple.n_edge[i:i + 1]))
+    return graphs_tuples
@@ -0,0 +1,128 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tensorflow as tf
+from graph_nets import utils_np, utils_tf
+
+from kglib.kgcn.learn.checkpoint import save_checkpoint
+from kglib.kgcn.learn.learn_benchmark import synthetic_graph_pair, NODE_TYPES, NUM_EDGE_TYPES
+from kglib.kgcn.learn.predict import Predictor
+from kglib.kgcn.learn.serve import BatchingPredictor
+from kglib.kgcn.models.core import KGCN
+from kglib.kgcn.models.embedding import ThingEmbedder, RoleEmbedder
+
+
+def create_model():
+    thing_embedder = ThingEmbedder(node_types=NODE_TYPES, type_embedding_dim=5, attr_embedding_dim=6,
+                                   categorical_attributes={}, continuous_attributes={})
+    role_embedder = RoleEmbedder(num_edge_types=NUM_EDGE_TYPES, type_embedding_dim=5)
+    return KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3)
+
+
+def save_untrained_checkpoint(input_graph, num_processing_steps, checkpoint_path):
+    """
+    Saves the freshly initialised variables of a model, which are as costly to run as trained ones
+    """
+    with tf.Graph().as_default():
+        input_ph = utils_tf.placeholders_from_networkxs([input_graph])
+        create_model()(input_ph, num_processing_steps)
+        with tf.Session() as sess:
+            sess.run(tf.global_variables_initializer())
+            save_checkpoint(sess, checkpoint_path)
+
+
+async def generate_load(batching_predictor, input_graphs, num_clients, num_requests_per_client):
+    """
+    Runs `num_clients` concurrent clients, each sending its requests one after another, waiting for each response
+    before sending the next
+
+    Returns:
+        The latency of every request in seconds, and the total seconds taken
+    """
+    latencies = []
+
+    async def client(client_index):
+        for request_index in range(num_requests_per_client):
+            input_graph = input_graphs[(client_index * num_requests_per_client + request_index) % len(input_graphs)]
+            start_time = time.perf_counter()
+            await batching_predictor.predict(input_graph)
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[client(client_index) for client_index in range(num_clients)])
+    return latencies, time.perf_counter() - start_time
+
+
+def benchmark(num_clients=64, num_requests_per_client=50, num_nodes=20, num_processing_steps=5,
+              configurations=((1, 0.0), (8, 0.002), (32, 0.005))):
+    """
+    Serves single-graph requests from many concurrent clients with a `BatchingPredictor`, for each configuration of
+    maximum batch size and maximum wait. A maximum batch size of 1 runs the model once per request, as without batching
+
+    Returns:
+        Dict keyed by configuration of the 50th and 99th percentile latency in seconds, and the requests per second
+    """
+    random_state = np.random.RandomState(0)
+    input_graphs = [synthetic_graph_pair(num_nodes, random_state)[0] for _ in range(100)]
+    # Requests arrive already encoded, so the conversion to data dicts isn't part of the measured time
+    input_data_dicts = [utils_np.networkx_to_data_dict(graph) for graph in input_graphs]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint_path = os.path.join(directory, 'kgcn')
+        save_untrained_checkpoint(input_graphs[0], num_processing_steps, checkpoint_path)
+
+        with Predictor(create_model, checkpoint_path, input_graphs[0], num_processing_steps) as predictor, \
+                ThreadPoolExecutor(max_workers=1) as executor:
+            predictor.predict(input_graphs[:1])  # Warm up
+
+            for max_batch_size, max_wait_seconds in configurations:
+                async def serve():
+                    async with BatchingPredictor(predictor.predict, max_batch_size=max_batch_size,
+                                                 max_wait_seconds=max_wait_seconds,
+                                                 executor=executor) as batching_predictor:
+                        return await generate_load(batching_predictor, input_data_dicts, num_clients,
+                                                   num_requests_per_client), batching_predictor.batch_sizes
+
+                loop = asyncio.new_event_loop()
+                try:
+                    (latencies, seconds), batch_sizes = loop.run_until_complete(serve())
+                finally:
+                    loop.close()
+
+                p50, p99 = np.percentile(latencies, [50, 99])
+                throughput = len(latencies) / seconds
+                results[(max_batch_size, max_wait_seconds)] = p50, p99, throughput
+                print(f'max batch {max_batch_size:>3}, max wait {max_wait_seconds * 1000:.1f}ms: '
+                      f'p50 {p50 * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms, {throughput:.0f} requests/sec, '
+                      f'mean batch {np.mean(batch_sizes):.1f}')
+
+    print(f'{num_clients} clients sending {num_requests_per_client} requests each, of graphs of {num_nodes} nodes')
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
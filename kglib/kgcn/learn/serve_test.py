@@ -0,0 +1,195 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import asyncio
+import time
+import unittest
+
+import numpy as np
+from graph_nets import utils_np
+
+from kglib.kgcn.learn.serve import BatchingPredictor, split_graphs_tuple
+
+
+def create_data_dict(num_nodes, value):
+    return dict(nodes=np.full((num_nodes, 2), value, dtype=np.float32),
+                edges=np.full((num_nodes - 1, 2), value, dtype=np.float32),
+                senders=np.arange(num_nodes - 1),
+                receivers=np.arange(1, num_nodes),
+                globals=np.zeros(1, dtype=np.float32))
+
+
+class RecordingPredictFn:
+    """
+    Doubles the features of the graphs it's given, recording how many graphs each call is given, optionally taking
+    `delay_seconds` to do so
+    """
+    def __init__(self, error=None, delay_seconds=0):
+        self.batch_sizes = []
+        self._error = error
+        self._delay_seconds = delay_seconds
+
+    def __call__(self, graphs_tuple):
+        self.batch_sizes.append(len(graphs_tuple.n_node))
+        time.sleep(self._delay_seconds)
+        if self._error is not None:
+            raise self._error
+        return graphs_tuple.replace(nodes=graphs_tuple.nodes * 2, edges=graphs_tuple.edges * 2)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class TestBatchingPredictor(unittest.TestCase):
+
+    def setUp(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self.addCleanup(asyncio.get_event_loop().close)
+
+    def test_concurrent_requests_are_coalesced_into_one_batch(self):
+        predict_fn = RecordingPredictFn()
+
+        async def serve():
+            async with BatchingPredictor(predict_fn, max_batch_size=4, max_wait_seconds=1) as batching_predictor:
+                return await asyncio.gather(*[batching_predictor.predict(create_data_dict(i + 2, i))
+                                              for i in range(4)])
+
+        outputs = run(serve())
+
+        self.assertEqual([4], predict_fn.batch_sizes)
+        for i, output in enumerate(outputs):
+            np.testing.assert_array_equal(np.full((i + 2, 2), 2 * i), output.nodes)
+            np.testing.assert_array_equal(np.full((i + 1, 2), 2 * i), output.edges)
+            np.testing.assert_array_equal(np.arange(i + 1), output.senders)
+
+    def test_batches_are_no_larger_than_max_batch_size(self):
+        predict_fn = RecordingPredictFn()
+
+        async def serve():
+            async with BatchingPredictor(predict_fn, max_batch_size=2, max_wait_seconds=0.05) as batching_predictor:
+                return await asyncio.gather(*[batching_predictor.predict(create_data_dict(3, i)) for i in range(5)])
+
+        outputs = run(serve())
+
+        self.assertEqual([2, 2, 1], predict_fn.batch_sizes)
+        self.assertEqual([i * 2 for i in range(5)], [output.nodes[0, 0] for output in outputs])
+
+    def test_lone_request_is_run_after_max_wait(self):
+        predict_fn = RecordingPredictFn()
+
+        async def serve():
+            async with BatchingPredictor(predict_fn, max_batch_size=8, max_wait_seconds=0.01) as batching_predictor:
+                return await batching_predictor.predict(create_data_dict(2, 1))
+
+        output = run(serve())
+
+        self.assertEqual([1], predict_fn.batch_sizes)
+        np.testing.assert_array_equal(np.full((2, 2), 2), output.nodes)
+
+    def test_error_is_raised_for_every_request_in_the_batch(self):
+        predict_fn = RecordingPredictFn(error=RuntimeError('model failed'))
+
+        async def serve():
+            async with BatchingPredictor(predict_fn, max_batch_size=2, max_wait_seconds=1) as batching_predictor:
+                return await asyncio.gather(*[batching_predictor.predict(create_data_dict(2, i)) for i in range(2)],
+                                            return_exceptions=True)
+
+        errors = run(serve())
+
+        self.assertEqual(2, len(errors))
+        for error in errors:
+            self.assertIsInstance(error, RuntimeError)
+
+    def test_stopping_cancels_requests_in_a_running_batch(self):
+        predict_fn = RecordingPredictFn(delay_seconds=0.3)
+
+        async def serve():
+            batching_predictor = BatchingPredictor(predict_fn, max_batch_size=1, max_wait_seconds=0)
+            await batching_predictor.start()
+            running = asyncio.ensure_future(batching_predictor.predict(create_data_dict(2, 0)))
+            queued = asyncio.ensure_future(batching_predictor.predict(create_data_dict(2, 1)))
+            await asyncio.sleep(0.1)
+            await batching_predictor.stop()
+            return await asyncio.wait_for(asyncio.gather(running, queued, return_exceptions=True), 1)
+
+        outputs = run(serve())
+
+        self.assertEqual([1], predict_fn.batch_sizes)
+        for output in outputs:
+            self.assertIsInstance(output, asyncio.CancelledError)
+
+    def test_stopping_during_a_running_batch_stops_the_task(self):
+        predict_fn = RecordingPredictFn(delay_seconds=0.3)
+
+        async def serve():
+            batching_predictor = BatchingPredictor(predict_fn, max_batch_size=1, max_wait_seconds=0)
+            await batching_predictor.start()
+            task = batching_predictor._task
+            requests = [asyncio.ensure_future(batching_predictor.predict(create_data_dict(2, i))) for i in range(3)]
+            await asyncio.sleep(0.1)
+            await asyncio.wait_for(batching_predictor.stop(), 1)
+            await asyncio.gather(*requests, return_exceptions=True)
+            return task
+
+        task = run(serve())
+
+        self.assertTrue(task.done())
+        self.assertTrue(task.cancelled())
+        self.assertEqual([1], predict_fn.batch_sizes)
+
+    def test_stopping_cancels_requests_in_a_batch_waiting_for_more(self):
+        predict_fn = RecordingPredictFn()
+
+        async def serve():
+            batching_predictor = BatchingPredictor(predict_fn, max_batch_size=4, max_wait_seconds=10)
+            await batching_predictor.start()
+            waiting = asyncio.ensure_future(batching_predictor.predict(create_data_dict(2, 0)))
+            await asyncio.sleep(0.05)
+            await batching_predictor.stop()
+            return await asyncio.wait_for(asyncio.gather(waiting, return_exceptions=True), 1)
+
+        outputs = run(serve())
+
+        self.assertEqual([], predict_fn.batch_sizes)
+        self.assertIsInstance(outputs[0], asyncio.CancelledError)
+
+    def test_predicting_before_start_raises(self):
+        batching_predictor = BatchingPredictor(RecordingPredictFn())
+        with self.assertRaises(RuntimeError):
+            run(batching_predictor.predict(create_data_dict(2, 0)))
+
+
+class TestSplitGraphsTuple(unittest.TestCase):
+
+    def test_split_graphs_are_the_graphs_concatenated(self):
+        data_dicts = [create_data_dict(3, 0), create_data_dict(1, 1), create_data_dict(2, 2)]
+        graphs_tuple = utils_np.data_dicts_to_graphs_tuple(data_dicts)
+
+        split = split_graphs_tuple(graphs_tuple)
+
+        self.assertEqual(3, len(split))
+        for data_dict, graph in zip(data_dicts, split):
+            expected = utils_np.data_dicts_to_graphs_tuple([data_dict])
+            for field in ['nodes', 'edges', 'globals', 'senders', 'receivers', 'n_node', 'n_edge']:
+                np.testing.assert_array_equal(getattr(expected, field), getattr(graph, field))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from kglib.kgcn.learn.feed import create_placeholders
+from kglib.kgcn.learn.learn_benchmark import synthetic_graph_pair
+from kglib.kgcn.learn.loss import loss_ops_preexisting_no_penalty
+from kglib.kgcn.learn.serve_benchmark import create_model
+
+
+def build_separately(input_ph, target_ph, num_processing_steps_tr, num_processing_steps_ge):
+    """
+    Builds the training and generalisation outputs and losses as `KGCNLearner` did before sharing them, unrolling the
+    model once for each
+    """
+    model = create_model()
+    output_ops_tr = model(input_ph, num_processing_steps_tr)
+    output_ops_ge = model(input_ph, num_processing_steps_ge)
+    loss_op_tr = sum(loss_ops_preexisting_no_penalty(target_ph, output_ops_tr)) / num_processing_steps_tr
+    loss_op_ge = loss_ops_preexisting_no_penalty(target_ph, output_ops_ge)[-1]
+    return loss_op_tr, loss_op_ge
+
+
+def build_shared(input_ph, target_ph, num_processing_steps_tr, num_processing_steps_ge):
+    """
+    Builds the training and generalisation outputs and losses as `KGCNLearner` does, unrolling the model once
+    """
+    output_ops = create_model()(input_ph, max(num_processing_steps_tr, num_processing_steps_ge))
+    loss_ops_tr = loss_ops_preexisting_no_penalty(target_ph, output_ops[:num_processing_steps_tr])
+    loss_op_tr = sum(loss_ops_tr) / num_processing_steps_tr
+    if num_processing_steps_ge <= num_processing_steps_tr:
+        loss_op_ge = loss_ops_tr[num_processing_steps_ge - 1]
+    else:
+        loss_op_ge = loss_ops_preexisting_no_penalty(target_ph, output_ops[num_processing_steps_ge - 1:])[0]
+    return loss_op_tr, loss_op_ge
+
+
+def benchmark(step_counts=((10, 10), (10, 20), (20, 10))):
+    """
+    Compares the time to build the training graph, including its gradients, and the number of ops in it, when the
+    model is unrolled separately for training and generalisation, against unrolling it once and sharing the outputs
+
+    Returns:
+        Dict keyed by the numbers of training and generalisation steps, then by approach, of the seconds to build the
+        graph and its number of ops
+    """
+    input_graph, target_graph = synthetic_graph_pair(20, np.random.RandomState(0))
+
+    results = {}
+    for num_processing_steps_tr, num_processing_steps_ge in step_counts:
+        results[(num_processing_steps_tr, num_processing_steps_ge)] = {}
+        for build_fn in [build_separately, build_shared]:
+            with tf.Graph().as_default() as graph:
+                start_time = time.perf_counter()
+                input_ph, target_ph = create_placeholders([input_graph], [target_graph])
+                loss_op_tr, _ = build_fn(input_ph, target_ph, num_processing_steps_tr, num_processing_steps_ge)
+                tf.train.AdamOptimizer(1e-3).minimize(loss_op_tr)
+                seconds = time.perf_counter() - start_time
+                num_ops = len(graph.get_operations())
+            results[(num_processing_steps_tr, num_processing_steps_ge)][build_fn.__name__] = seconds, num_ops
+
+        separate_seconds, separate_ops = results[(num_processing_steps_tr, num_processing_steps_ge)]['build_separately']
+        shared_seconds, shared_ops = results[(num_processing_steps_tr, num_processing_steps_ge)]['build_shared']
+        print(f'{num_processing_steps_tr} training, {num_processing_steps_ge} generalisation steps: '
+              f'separately {separate_seconds:.2f}s, {separate_ops} ops; shared {shared_seconds:.2f}s, {shared_ops} ops')
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
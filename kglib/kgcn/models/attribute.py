@@ -22,6 +22,8 @@ import abc
 import sonnet as snt
 import tensorflow as tf
 
+from kglib.kgcn.models.instrumentation import histogram
+
 
 class Attribute(snt.AbstractModule, abc.ABC):
     """
@@ -33,16 +35,17 @@ class Attribute(snt.AbstractModule, abc.ABC):
 
 
 class ContinuousAttribute(Attribute):
-    def __init__(self, attr_embedding_dim, name='ContinuousAttributeEmbedder'):
+    def __init__(self, attr_embedding_dim, use_dropout=True, name='ContinuousAttributeEmbedder'):
         super(ContinuousAttribute, self).__init__(attr_embedding_dim, name=name)
+        self._use_dropout = use_dropout
 
     def _build(self, attribute_value):
-        tf.summary.histogram('cont_attribute_value_histogram', attribute_value)
+        histogram('cont_attribute_value_histogram', attribute_value)
         embedding = snt.Sequential([
-            snt.nets.MLP([self._attr_embedding_dim] * 3, activate_final=True, use_dropout=True),
+            snt.nets.MLP([self._attr_embedding_dim] * 3, activate_final=True, use_dropout=self._use_dropout),
             snt.LayerNorm(),
         ])(tf.cast(attribute_value, dtype=tf.float32))
-        tf.summary.histogram('cont_embedding_histogram', embedding)
+        histogram('cont_embedding_histogram', embedding)
         return embedding
 
 
@@ -54,9 +57,9 @@ class CategoricalAttribute(Attribute):
 
     def _build(self, attribute_value):
         int_attribute_value = tf.cast(attribute_value, dtype=tf.int32)
-        tf.summary.histogram('cat_attribute_value_histogram', int_attribute_value)
+        histogram('cat_attribute_value_histogram', int_attribute_value)
         embedding = snt.Embed(self._num_categories, self._attr_embedding_dim)(int_attribute_value)
-        tf.summary.histogram('cat_embedding_histogram', embedding)
+        histogram('cat_embedding_histogram', embedding)
         return tf.squeeze(embedding, axis=1)
 
 
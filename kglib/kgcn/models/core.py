@@ -19,10 +19,13 @@
 
 import numpy as np
 import sonnet as snt
+import tensorflow as tf
 from graph_nets import modules
 from graph_nets import utils_tf
 from graph_nets.modules import GraphIndependent
 
+from kglib.kgcn.models.instrumentation import instrumentation_level
+
 
 def softmax(x):
     return np.exp(x) / np.sum(np.exp(x))
@@ -81,9 +84,31 @@ class KGCN(snt.AbstractModule):
                  node_output_size=3,
                  latent_size=16,
                  num_layers=2,
+                 instrumentation=None,
+                 use_while_loop=False,
                  name="KGCN"):
+        """
+        Args:
+            thing_embedder: Module embedding the features of nodes
+            role_embedder: Module embedding the features of edges
+            edge_output_size: Size of the output for each edge, or None for no edge outputs
+            node_output_size: Size of the output for each node, or None for no node outputs
+            latent_size: Size of the latent representations
+            num_layers: Number of layers of each MLP
+            instrumentation: The instrumentation level, OFF, SCALARS or FULL from `kglib.kgcn.models.instrumentation`,
+                deciding which summaries the model adds to the graph. If None, the level in effect where the model is
+                connected is used, which is FULL unless set by `instrumentation_level`
+            use_while_loop: Whether to run the message-passing steps in a tf.while_loop rather than unrolling them.
+                The graph then stays the same size however many steps are run, so deep propagation can be built
+                quickly. `KGCNLearner` then connects the model separately for training and for generalisation, so
+                that neither runs more steps than it needs
+            name: The name for this Module
+        """
         super(KGCN, self).__init__(name=name)
 
+        self._instrumentation = instrumentation
+        self._use_while_loop = use_while_loop
+
         self._thing_embedder = thing_embedder
         self._role_embedder = role_embedder
 
@@ -115,16 +140,98 @@ class KGCN(snt.AbstractModule):
                                snt.nets.MLP([self._latent_size] * self._num_layers, activate_final=True),
                                snt.LayerNorm()])
 
+    @property
+    def use_while_loop(self):
+        return self._use_while_loop
+
     def _kg_encoder(self):
         return GraphIndependent(self._edge_model, self._node_model, name='kg_encoder')
 
-    def _build(self, input_op, num_processing_steps):
+    def _build(self, input_op, num_processing_steps, num_outputs=None):
+        """
+        Args:
+            input_op: GraphsTuple of the input graphs
+            num_processing_steps: Number of processing (message-passing) steps to run
+            num_outputs: The number of final processing steps to give outputs for. Earlier steps aren't decoded. If
+                None, every step's outputs are given
+
+        Returns:
+            A list of the outputs of the final `num_outputs` processing steps, in order
+        """
+        if num_outputs is None:
+            num_outputs = num_processing_steps
+        elif not 0 < num_outputs <= num_processing_steps:
+            raise ValueError(f'num_outputs must be between 1 and num_processing_steps ({num_processing_steps}), but '
+                             f'got {num_outputs}')
+        if self._use_while_loop and num_processing_steps < 1:
+            raise ValueError(f'At least one processing step is needed to use a while loop, but got '
+                             f'{num_processing_steps}')
+
+        with instrumentation_level(self._instrumentation):
+            if self._use_while_loop:
+                return self._build_while_loop(input_op, num_processing_steps, num_outputs)
+            return self._build_unrolled(input_op, num_processing_steps, num_outputs)
+
+    def _process(self, latent0, latent):
+        core_input = utils_tf.concat([latent0, latent], axis=1)
+        return self._core(core_input)
+
+    def _step(self, latent0, latent):
+        latent = self._process(latent0, latent)
+        return latent, self._output_transform(self._decoder(latent))
+
+    def _build_unrolled(self, input_op, num_processing_steps, num_outputs):
         latent = self._encoder(input_op)
         latent0 = latent
         output_ops = []
-        for _ in range(num_processing_steps):
-            core_input = utils_tf.concat([latent0, latent], axis=1)
-            latent = self._core(core_input)
-            decoded_op = self._decoder(latent)
-            output_ops.append(self._output_transform(decoded_op))
+        for step in range(num_processing_steps):
+            if step < num_processing_steps - num_outputs:
+                latent = self._process(latent0, latent)
+            else:
+                latent, output_op = self._step(latent0, latent)
+                output_ops.append(output_op)
         return output_ops
+
+    def _build_while_loop(self, input_op, num_processing_steps, num_outputs):
+        """
+        Runs the message-passing steps in tf.while_loops, carrying the latent nodes and edges from step to step. The
+        first step is connected outside of the loops, which creates the variables, since they can't be created inside
+        one. A first loop runs the steps whose outputs aren't needed, and a second accumulates the outputs of the rest
+        in TensorArrays
+        """
+        latent0 = self._encoder(input_op)
+        latent, first_output_op = self._step(latent0, latent0)
+
+        first_output_step = num_processing_steps - num_outputs
+
+        def carried_latent(latent_nodes, latent_edges):
+            # Only the nodes and edges change between steps, and the globals aren't used by the core
+            return latent0.replace(nodes=latent_nodes, edges=latent_edges)
+
+        def skip_body(step, latent_nodes, latent_edges):
+            next_latent = self._process(latent0, carried_latent(latent_nodes, latent_edges))
+            return step + 1, next_latent.nodes, next_latent.edges
+
+        _, latent_nodes, latent_edges = tf.while_loop(
+            lambda step, *_: step < first_output_step, skip_body, (tf.constant(1), latent.nodes, latent.edges),
+            name='skipped_steps')
+
+        node_outputs = tf.TensorArray(first_output_op.nodes.dtype, size=num_outputs)
+        edge_outputs = tf.TensorArray(first_output_op.edges.dtype, size=num_outputs)
+        if first_output_step == 0:
+            node_outputs = node_outputs.write(0, first_output_op.nodes)
+            edge_outputs = edge_outputs.write(0, first_output_op.edges)
+
+        def output_body(step, latent_nodes, latent_edges, node_outputs, edge_outputs):
+            next_latent, output_op = self._step(latent0, carried_latent(latent_nodes, latent_edges))
+            node_outputs = node_outputs.write(step - first_output_step, output_op.nodes)
+            edge_outputs = edge_outputs.write(step - first_output_step, output_op.edges)
+            return step + 1, next_latent.nodes, next_latent.edges, node_outputs, edge_outputs
+
+        _, _, _, node_outputs, edge_outputs = tf.while_loop(
+            lambda step, *_: step < num_processing_steps, output_body,
+            (tf.constant(max(1, first_output_step)), latent_nodes, latent_edges, node_outputs, edge_outputs),
+            name='output_steps')
+
+        return [first_output_op.replace(nodes=node_outputs.read(i), edges=edge_outputs.read(i))
+                for i in range(num_outputs)]
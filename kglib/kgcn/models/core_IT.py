@@ -27,28 +27,69 @@ from kglib.kgcn.models.core import KGCN
 from kglib.kgcn.models.embedding import ThingEmbedder, RoleEmbedder
 
 
+def create_graph():
+    return GraphsTuple(nodes=tf.convert_to_tensor(np.array([[1, 2, 0], [1, 0, 0], [1, 1, 0]], dtype=np.float32)),
+                       edges=tf.convert_to_tensor(np.array([[1, 0, 0], [1, 0, 0]], dtype=np.float32)),
+                       globals=tf.convert_to_tensor(np.array([[0, 0, 0, 0, 0]], dtype=np.float32)),
+                       receivers=tf.convert_to_tensor(np.array([1, 2], dtype=np.int32)),
+                       senders=tf.convert_to_tensor(np.array([0, 1], dtype=np.int32)),
+                       n_node=tf.convert_to_tensor(np.array([3], dtype=np.int32)),
+                       n_edge=tf.convert_to_tensor(np.array([2], dtype=np.int32)))
+
+
+def create_kgcn(use_dropout=True, use_while_loop=False):
+    thing_embedder = ThingEmbedder(node_types=['a', 'b', 'c'], type_embedding_dim=5, attr_embedding_dim=6,
+                                   categorical_attributes={'a': ['a1', 'a2', 'a3'], 'b': ['b1', 'b2', 'b3']},
+                                   continuous_attributes={'c': (0, 1)}, use_dropout=use_dropout)
+
+    role_embedder = RoleEmbedder(num_edge_types=2, type_embedding_dim=5)
+
+    return KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3, use_while_loop=use_while_loop)
+
+
 class ITKGCN(unittest.TestCase):
 
     def test_kgcn_runs(self):
         tf.enable_eager_execution()
 
-        graph = GraphsTuple(nodes=tf.convert_to_tensor(np.array([[1, 2, 0], [1, 0, 0], [1, 1, 0]], dtype=np.float32)),
-                            edges=tf.convert_to_tensor(np.array([[1, 0, 0], [1, 0, 0]], dtype=np.float32)),
-                            globals=tf.convert_to_tensor(np.array([[0, 0, 0, 0, 0]], dtype=np.float32)),
-                            receivers=tf.convert_to_tensor(np.array([1, 2], dtype=np.int32)),
-                            senders=tf.convert_to_tensor(np.array([0, 1], dtype=np.int32)),
-                            n_node=tf.convert_to_tensor(np.array([3], dtype=np.int32)),
-                            n_edge=tf.convert_to_tensor(np.array([2], dtype=np.int32)))
+        kgcn = create_kgcn()
 
-        thing_embedder = ThingEmbedder(node_types=['a', 'b', 'c'], type_embedding_dim=5, attr_embedding_dim=6,
-                                       categorical_attributes={'a': ['a1', 'a2', 'a3'], 'b': ['b1', 'b2', 'b3']},
-                                       continuous_attributes={'c': (0, 1)})
+        kgcn(create_graph(), 2)
 
-        role_embedder = RoleEmbedder(num_edge_types=2, type_embedding_dim=5)
+    def test_while_loop_gives_the_same_outputs_as_unrolling(self):
+        tf.enable_eager_execution()
+
+        graph = create_graph()
+        unrolled_kgcn = create_kgcn(use_dropout=False)
+        while_loop_kgcn = create_kgcn(use_dropout=False, use_while_loop=True)
+        unrolled_kgcn(graph, 1)
+        while_loop_kgcn(graph, 1)
+
+        # Both models create the same variables in the same order, so give the while loop model the unrolled one's
+        for unrolled_variable, while_loop_variable in zip(unrolled_kgcn.get_all_variables(),
+                                                          while_loop_kgcn.get_all_variables()):
+            while_loop_variable.assign(unrolled_variable)
+
+        for num_outputs in [None, 1, 3]:
+            with self.subTest(num_outputs=num_outputs):
+                unrolled_outputs = unrolled_kgcn(graph, 5, num_outputs=num_outputs)
+                while_loop_outputs = while_loop_kgcn(graph, 5, num_outputs=num_outputs)
+
+                self.assertEqual(len(unrolled_outputs), 5 if num_outputs is None else num_outputs)
+                self.assertEqual(len(while_loop_outputs), len(unrolled_outputs))
+                for unrolled_output, while_loop_output in zip(unrolled_outputs, while_loop_outputs):
+                    np.testing.assert_allclose(unrolled_output.nodes.numpy(), while_loop_output.nodes.numpy(),
+                                               rtol=1e-5)
+                    np.testing.assert_allclose(unrolled_output.edges.numpy(), while_loop_output.edges.numpy(),
+                                               rtol=1e-5)
+
+    def test_num_outputs_greater_than_num_processing_steps_raises(self):
+        tf.enable_eager_execution()
 
-        kgcn = KGCN(thing_embedder, role_embedder, edge_output_size=3, node_output_size=3)
+        kgcn = create_kgcn()
 
-        kgcn(graph, 2)
+        with self.assertRaises(ValueError):
+            kgcn(create_graph(), 2, num_outputs=3)
 
 
 if __name__ == "__main__":
@@ -21,12 +21,13 @@ import tensorflow as tf
 import sonnet as snt
 
 from kglib.kgcn.models.attribute import CategoricalAttribute, ContinuousAttribute, BlankAttribute
+from kglib.kgcn.models.instrumentation import histogram
 from kglib.kgcn.models.typewise import TypewiseEncoder
 
 
 class ThingEmbedder(snt.AbstractModule):
     def __init__(self, node_types, type_embedding_dim, attr_embedding_dim, categorical_attributes,
-                 continuous_attributes, name="ThingEmbedder"):
+                 continuous_attributes, use_dropout=True, name="ThingEmbedder"):
         super(ThingEmbedder, self).__init__(name=name)
 
         self._node_types = node_types
@@ -42,7 +43,7 @@ class ThingEmbedder(snt.AbstractModule):
 
         if continuous_attributes is not None:
             self._attr_embedders.update(
-                construct_continuous_embedders(node_types, attr_embedding_dim, continuous_attributes))
+                construct_continuous_embedders(node_types, attr_embedding_dim, continuous_attributes, use_dropout))
 
         self._attr_embedders.update(
             construct_non_attribute_embedders(node_types, attr_embedding_dim, categorical_attributes,
@@ -68,14 +69,14 @@ def embed_type(features, num_types, type_embedding_dim):
     type_embedder = snt.Embed(num_types, type_embedding_dim)
     norm = snt.LayerNorm()
     type_embedding = norm(type_embedder(tf.cast(features[:, 1], tf.int32)))
-    tf.summary.histogram('type_embedding_histogram', type_embedding)
+    histogram('type_embedding_histogram', type_embedding)
     return tf.concat([preexistance_feat, type_embedding], axis=1)
 
 
 def embed_attribute(features, attr_encoders, attr_embedding_dim):
     typewise_attribute_encoder = TypewiseEncoder(attr_encoders, attr_embedding_dim)
     attr_embedding = typewise_attribute_encoder(features[:, 1:])
-    tf.summary.histogram('attribute_embedding_histogram', attr_embedding)
+    histogram('attribute_embedding_histogram', attr_embedding)
     return attr_embedding
 
 
@@ -97,7 +98,7 @@ def construct_categorical_embedders(node_types, attr_embedding_dim, categorical_
     return attr_embedders
 
 
-def construct_continuous_embedders(node_types, attr_embedding_dim, continuous_attributes):
+def construct_continuous_embedders(node_types, attr_embedding_dim, continuous_attributes, use_dropout=True):
     attr_embedders = dict()
 
     # Construct attribute embedders
@@ -106,7 +107,8 @@ def construct_continuous_embedders(node_types, attr_embedding_dim, continuous_at
         attr_typ_index = node_types.index(attribute_type)
 
         def make_embedder():
-            return ContinuousAttribute(attr_embedding_dim, name=attribute_type + '_cat_embedder')
+            return ContinuousAttribute(attr_embedding_dim, use_dropout=use_dropout,
+                                       name=attribute_type + '_cat_embedder')
 
         # Record the embedder, and the index of the type that it should encode
         attr_embedders[make_embedder] = [attr_typ_index]
@@ -0,0 +1,81 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import contextlib
+
+import tensorflow as tf
+
+# Instrumentation levels, from leanest to most detailed
+OFF = 0
+SCALARS = 1
+FULL = 2
+
+_current_level = FULL
+
+
+def current_instrumentation_level():
+    return _current_level
+
+
+@contextlib.contextmanager
+def instrumentation_level(level):
+    """
+    Sets which summaries are added to the graph while inside this context. Summary ops are only created when the graph
+    is built, so this must surround building the model, not running it
+
+    Args:
+        level: OFF for no summaries, SCALARS for scalar summaries only, or FULL for scalars and histograms. If None, the
+            level is left as it is
+    """
+    global _current_level
+    if level is None:
+        yield
+        return
+    if level not in (OFF, SCALARS, FULL):
+        raise ValueError(f'Instrumentation level must be one of OFF, SCALARS or FULL, but got {level}')
+    previous_level = _current_level
+    _current_level = level
+    try:
+        yield
+    finally:
+        _current_level = previous_level
+
+
+def histogram(name, values):
+    """
+    Adds a histogram summary of `values`, if the current instrumentation level is FULL
+
+    Returns:
+        The summary op, or None if it wasn't added
+    """
+    if _current_level >= FULL:
+        return tf.summary.histogram(name, values)
+    return None
+
+
+def scalar(name, value):
+    """
+    Adds a scalar summary of `value`, if the current instrumentation level is SCALARS or FULL
+
+    Returns:
+        The summary op, or None if it wasn't added
+    """
+    if _current_level >= SCALARS:
+        return tf.summary.scalar(name, value)
+    return None
@@ -0,0 +1,77 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import unittest
+from unittest.mock import patch
+
+from kglib.kgcn.models.instrumentation import OFF, SCALARS, FULL, histogram, scalar, instrumentation_level, \
+    current_instrumentation_level
+
+
+class TestInstrumentationLevel(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('kglib.kgcn.models.instrumentation.tf')
+        self.mock_tf = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_full_is_the_default(self):
+        self.assertEqual(FULL, current_instrumentation_level())
+
+    def test_full_adds_histograms_and_scalars(self):
+        with instrumentation_level(FULL):
+            histogram('h', 1)
+            scalar('s', 2)
+        self.mock_tf.summary.histogram.assert_called_once_with('h', 1)
+        self.mock_tf.summary.scalar.assert_called_once_with('s', 2)
+
+    def test_scalars_adds_only_scalars(self):
+        with instrumentation_level(SCALARS):
+            self.assertIsNone(histogram('h', 1))
+            scalar('s', 2)
+        self.mock_tf.summary.histogram.assert_not_called()
+        self.mock_tf.summary.scalar.assert_called_once_with('s', 2)
+
+    def test_off_adds_no_summaries(self):
+        with instrumentation_level(OFF):
+            self.assertIsNone(histogram('h', 1))
+            self.assertIsNone(scalar('s', 2))
+        self.mock_tf.summary.histogram.assert_not_called()
+        self.mock_tf.summary.scalar.assert_not_called()
+
+    def test_level_is_restored_after_context(self):
+        with instrumentation_level(OFF):
+            with instrumentation_level(SCALARS):
+                self.assertEqual(SCALARS, current_instrumentation_level())
+            self.assertEqual(OFF, current_instrumentation_level())
+        self.assertEqual(FULL, current_instrumentation_level())
+
+    def test_none_leaves_level_unchanged(self):
+        with instrumentation_level(SCALARS):
+            with instrumentation_level(None):
+                self.assertEqual(SCALARS, current_instrumentation_level())
+
+    def test_unknown_level_raises(self):
+        with self.assertRaises(ValueError):
+            with instrumentation_level('verbose'):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,15 +17,21 @@
 #  under the License.
 #
 
+import numpy as np
 import sonnet as snt
 import tensorflow as tf
 
+from kglib.kgcn.models.instrumentation import histogram
+
 
 class TypewiseEncoder(snt.AbstractModule):
     """
     Orchestrates encoding elements according to their types. Defers encoding of each feature to the appropriate encoder
     for the type of that feature. Assumes that the type is given categorically as an integer value in the 0th position
     of the provided features Tensor.
+
+    The features are partitioned between the encoders in one pass, by looking up the encoder for each type, and the
+    encoded features are stitched back together in their original order in another.
     """
     def __init__(self, encoders_for_types, feature_length, name="typewise_encoder"):
         """
@@ -49,34 +55,43 @@ class TypewiseEncoder(snt.AbstractModule):
 
         self._feature_length = feature_length
         self._encoders_for_types = encoders_for_types
+        self._encoder_index_for_types = encoder_index_lookup(encoders_for_types)
 
     def _build(self, features):
 
-        tf.summary.histogram('typewise_encoder_features_histogram', features)
+        histogram('typewise_encoder_features_histogram', features)
 
-        shape = tf.stack([tf.shape(features)[0], self._feature_length])
+        feat_types = tf.cast(features[:, 0], tf.int32)  # The types for each feature, as integers
+        encoder_indices = tf.gather(tf.constant(self._encoder_index_for_types), feat_types)
 
-        encoded_features = tf.zeros(shape, dtype=tf.float32)
+        num_encoders = len(self._encoders_for_types)
+        feats_partitions = tf.dynamic_partition(features[:, 1:], encoder_indices, num_encoders)
+        # Where each feature came from, so that the encoded features can be put back in the same place
+        positions_partitions = tf.dynamic_partition(tf.range(tf.shape(features)[0]), encoder_indices, num_encoders)
 
-        for encoder, types in self._encoders_for_types.items():
+        encoded_partitions = [tf.cast(encoder()(feats_to_encode), tf.float32)
+                              for encoder, feats_to_encode in zip(self._encoders_for_types, feats_partitions)]
 
-            feat_types = tf.cast(features[:, 0], tf.int32)  # The types for each feature, as integers
+        encoded_features = tf.dynamic_stitch(positions_partitions, encoded_partitions)
+        encoded_features.set_shape([None, self._feature_length])
 
-            # Expand dimensions ready for element-wise equality comparison
-            exp_types = tf.expand_dims(types, axis=0)
-            exp_feat_types = tf.expand_dims(feat_types, axis=1)
+        histogram('typewise_encoder_encoded_features_histogram', encoded_features)
 
-            elementwise_equality = tf.equal(exp_feat_types, exp_types)
-
-            # Use this encoder when the feat_type matches any of the types
-            applicable_types_mask = tf.reduce_any(elementwise_equality, axis=1)
-            indices_to_encode = tf.where(applicable_types_mask)
+        return encoded_features
 
-            feats_to_encode = tf.squeeze(tf.gather(features[:, 1:], indices_to_encode), axis=1)
-            encoded_feats = encoder()(feats_to_encode)
 
-            encoded_features += tf.scatter_nd(tf.cast(indices_to_encode, dtype=tf.int32), encoded_feats, shape)
+def encoder_index_lookup(encoders_for_types):
+    """
+    Creates a lookup table from each type category to the position of its encoder in `encoders_for_types`
 
-        tf.summary.histogram('typewise_encoder_encoded_features_histogram', encoded_features)
+    Args:
+        encoders_for_types: Dict - keys: encoders; values: a list of type categories the encoder should be used for
 
-        return encoded_features
+    Returns:
+        int32 numpy array, indexed by type category, of encoder positions
+    """
+    num_types = sum(len(types) for types in encoders_for_types.values())
+    lookup = np.zeros(num_types, dtype=np.int32)
+    for encoder_index, types in enumerate(encoders_for_types.values()):
+        lookup[list(types)] = encoder_index
+    return lookup
@@ -24,7 +24,7 @@ import tensorflow as tf
 from unittest.mock import Mock
 
 from kglib.utils.test.utils import get_call_args
-from kglib.kgcn.models.typewise import TypewiseEncoder
+from kglib.kgcn.models.typewise import TypewiseEncoder, encoder_index_lookup
 
 
 class TestTypewiseEncoder(unittest.TestCase):
@@ -64,6 +64,41 @@ class TestTypewiseEncoder(unittest.TestCase):
         expected_encoding = np.array([[0.1, 0, 0], [0.1, 0, 0], [0.1, 0, 0]], dtype=np.float32)
         np.testing.assert_array_equal(expected_encoding, encoding.numpy())
 
+    def test_interleaved_types_are_encoded_in_their_original_positions(self):
+        things = np.array([[2, 0.1], [0, 0], [2, 0.2], [1, 0]], dtype=np.float32)
+
+        mock_entity_relation_encoder = Mock(return_value=np.array([[0, 0], [0, 0]], dtype=np.float32))
+
+        mock_attribute_encoder = Mock(return_value=np.array([[1, 0.1], [1, 0.2]], dtype=np.float32))
+
+        encoders_for_types = {lambda: mock_entity_relation_encoder: [0, 1], lambda: mock_attribute_encoder: [2]}
+
+        tm = TypewiseEncoder(encoders_for_types, 2)
+        encoding = tm(things)  # The function under test
+
+        np.testing.assert_array_equal([[np.array([[0.1], [0.2]], dtype=np.float32)]],
+                                      get_call_args(mock_attribute_encoder))
+
+        expected_encoding = np.array([[1, 0.1], [0, 0], [1, 0.2], [0, 0]], dtype=np.float32)
+        np.testing.assert_array_equal(expected_encoding, encoding.numpy())
+
+    def test_encoder_of_absent_types_is_given_no_features(self):
+        things = np.array([[0, 0], [1, 0]], dtype=np.float32)
+
+        mock_entity_relation_encoder = Mock(return_value=np.array([[0.1, 0], [0.1, 0]], dtype=np.float32))
+
+        mock_attribute_encoder = Mock(return_value=np.zeros((0, 2), dtype=np.float32))
+
+        encoders_for_types = {lambda: mock_entity_relation_encoder: [0, 1], lambda: mock_attribute_encoder: [2]}
+
+        tm = TypewiseEncoder(encoders_for_types, 2)
+        encoding = tm(things)  # The function under test
+
+        self.assertEqual((0, 1), get_call_args(mock_attribute_encoder)[0][0].shape)
+
+        expected_encoding = np.array([[0.1, 0], [0.1, 0]], dtype=np.float32)
+        np.testing.assert_array_equal(expected_encoding, encoding.numpy())
+
     def test_encoders_do_not_fulfil_classes(self):
         mock_entity_relation_encoder = Mock()
 
@@ -76,5 +111,13 @@ class TestTypewiseEncoder(unittest.TestCase):
                          str(context.exception))
 
 
+class TestEncoderIndexLookup(unittest.TestCase):
+
+    def test_types_look_up_the_position_of_their_encoder(self):
+        encoders_for_types = {'a': [1, 3], 'b': [0], 'c': [2, 4]}
+        expected_lookup = np.array([1, 0, 2, 0, 2], dtype=np.int32)
+        np.testing.assert_array_equal(expected_lookup, encoder_index_lookup(encoders_for_types))
+
+
 if __name__ == '__main__':
     unittest.main()
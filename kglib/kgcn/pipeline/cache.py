@@ -0,0 +1,238 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from kglib.utils.graph.columnar import ColumnarGraph
+
+# Change this whenever the preprocessing or the file format changes, so that stale entries are no longer found
+CACHE_FORMAT_VERSION = 1
+
+GRAPH_LISTS = ('graphs', 'input_graphs', 'target_graphs')
+
+
+def fingerprint(*components):
+    """
+    Hashes everything that determines the preprocessed graphs, such as the queries, the example ids, and the types and
+    attributes to encode, into a key for a GraphCache
+
+    Args:
+        *components: JSON-serialisable values. Dicts are hashed independently of the order of their keys
+
+    Returns:
+        Hex digest identifying the components
+    """
+    serialised = json.dumps([CACHE_FORMAT_VERSION, list(components)], sort_keys=True)
+    return hashlib.sha256(serialised.encode('utf-8')).hexdigest()
+
+
+class GraphCache:
+    """
+    Persists preprocessed graphs to disk so that they don't have to be extracted from Grakn and encoded again when
+    nothing that determines them has changed. Each entry holds the encoded graphs, the input graphs and the target graphs
+    given by `preprocess_graphs`, as ColumnarGraphs, in a single .npz file named by its key.
+
+    The graphs of each list are concatenated, so an entry holds one array per column rather than one per graph. Columns
+    of objects, such as the concepts, are pickled, so only load a cache directory that you wrote yourself.
+
+    If `max_bytes` is given, the least recently used entries are evicted whenever an entry is saved, until the cache
+    fits within it. The entry just saved is never evicted.
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        """
+        Args:
+            directory: Directory to keep the entries in, created if it doesn't exist
+            max_bytes: The most bytes for the entries to take up on disk in total. If None, entries are never evicted
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        if key is None:
+            raise ValueError('The key of a cache entry must not be None')
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def keys(self):
+        return [file_name[:-len('.npz')] for file_name in os.listdir(self.directory) if file_name.endswith('.npz')]
+
+    def total_bytes(self):
+        return sum(os.path.getsize(self.path(key)) for key in self.keys())
+
+    def load(self, key):
+        """
+        Returns:
+            The encoded graphs, the input graphs and the target graphs saved under `key`, or None if there are none
+        """
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=True) as arrays:
+                graph_lists = tuple(graphs_from_arrays(arrays, prefix) for prefix in GRAPH_LISTS)
+        except FileNotFoundError:
+            return None
+        # Mark the entry as recently used, for eviction
+        os.utime(path)
+        return graph_lists
+
+    def save(self, key, graphs, input_graphs, target_graphs):
+        """
+        Saves lists of ColumnarGraphs under `key`, replacing any already saved, then evicts other entries if the cache
+        has grown too large
+        """
+        arrays = {}
+        for prefix, graph_list in zip(GRAPH_LISTS, (graphs, input_graphs, target_graphs)):
+            arrays.update(graphs_to_arrays(graph_list, prefix))
+
+        # Write to a temporary file first, so that an interrupted save never leaves a partial entry behind
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temporary_path, self.path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+        self.evict(keep=key)
+
+    def get_or_create(self, key, create_fn):
+        """
+        Loads the graphs saved under `key`, or if there are none, creates them with `create_fn` and saves them
+
+        Args:
+            key: Key of the entry, usually made by `fingerprint`
+            create_fn: Function taking no arguments that gives the lists of encoded, input and target ColumnarGraphs
+
+        Returns:
+            The encoded graphs, the input graphs and the target graphs
+        """
+        graph_lists = self.load(key)
+        if graph_lists is None:
+            graph_lists = tuple(list(graph_list) for graph_list in create_fn())
+            self.save(key, *graph_lists)
+        return graph_lists
+
+    def invalidate(self, key=None):
+        """
+        Removes the entry saved under `key`, or every entry if `key` is None
+        """
+        keys = self.keys() if key is None else [key]
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used entries, other than `keep`, until the cache fits within `max_bytes`
+        """
+        if self.max_bytes is None:
+            return
+        entries = sorted((os.path.getmtime(self.path(key)), os.path.getsize(self.path(key)), key) for key in self.keys())
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if key != keep:
+                self.invalidate(key)
+                total_bytes -= size
+
+
+def concatenate_columns(columns_list, prefix):
+    """
+    Concatenates the columns of many graphs, along with which graphs each column is present in, since a graph only has
+    columns for the properties its elements have, and the dtype of each graph's column, since concatenation can upcast
+    """
+    arrays = {}
+    names = sorted(set().union(*columns_list))
+    for name in names:
+        present_columns = [columns[name] for columns in columns_list if name in columns]
+        arrays[f'{prefix}/{name}/present'] = np.array([name in columns for columns in columns_list], dtype=bool)
+        arrays[f'{prefix}/{name}/dtypes'] = np.array([column.dtype.str for column in present_columns])
+        arrays[f'{prefix}/{name}'] = np.concatenate(present_columns)
+    return arrays
+
+
+def split_columns(arrays, num_elements, prefix):
+    """
+    Reverses `concatenate_columns`
+
+    Returns:
+        A dict of columns for each graph
+    """
+    columns_list = [dict() for _ in num_elements]
+    names = [key[len(prefix) + 1:-len('/present')] for key in arrays.files
+             if key.startswith(f'{prefix}/') and key.endswith('/present')]
+    for name in names:
+        present = arrays[f'{prefix}/{name}/present']
+        dtypes = arrays[f'{prefix}/{name}/dtypes']
+        offsets = np.cumsum(num_elements[present])[:-1]
+        graph_columns = np.split(arrays[f'{prefix}/{name}'], offsets)
+        for i, graph_column, dtype in zip(np.flatnonzero(present), graph_columns, dtypes):
+            columns_list[i][name] = graph_column.astype(dtype, copy=False)
+    return columns_list
+
+
+def graphs_to_arrays(graphs, prefix):
+    """
+    Concatenates the arrays of ColumnarGraphs into one array per field and column, named with `prefix`
+    """
+    n_node = np.array([graph.n_node for graph in graphs], dtype=np.int64)
+    n_edge = np.array([graph.n_edge for graph in graphs], dtype=np.int64)
+    arrays = {f'{prefix}/n_node': n_node, f'{prefix}/n_edge': n_edge}
+    for field in ('senders', 'receivers'):
+        arrays[f'{prefix}/{field}'] = np.concatenate(
+            [np.zeros(0, dtype=np.int32)] + [getattr(graph, field) for graph in graphs])
+    # Multigraph keys are usually integers but can be any object, so keep the dtype of each graph's keys as for columns
+    arrays.update(concatenate_columns([{'edge_keys': graph.edge_keys} for graph in graphs], f'{prefix}/keys'))
+    arrays.update(concatenate_columns([graph.node_columns for graph in graphs], f'{prefix}/node'))
+    arrays.update(concatenate_columns([graph.edge_columns for graph in graphs], f'{prefix}/edge'))
+    graph_attributes = np.empty(len(graphs), dtype=object)
+    graph_attributes[:] = [graph.graph_attributes for graph in graphs]
+    arrays[f'{prefix}/graph_attributes'] = graph_attributes
+    return arrays
+
+
+def graphs_from_arrays(arrays, prefix):
+    """
+    Reverses `graphs_to_arrays`
+
+    Returns:
+        A list of ColumnarGraphs
+    """
+    n_node = arrays[f'{prefix}/n_node']
+    n_edge = arrays[f'{prefix}/n_edge']
+    edge_offsets = np.cumsum(n_edge)[:-1]
+    senders, receivers = [np.split(arrays[f'{prefix}/{field}'], edge_offsets) for field in ('senders', 'receivers')]
+    edge_keys = [columns['edge_keys'] for columns in split_columns(arrays, n_edge, f'{prefix}/keys')]
+    node_columns_list = split_columns(arrays, n_node, f'{prefix}/node')
+    edge_columns_list = split_columns(arrays, n_edge, f'{prefix}/edge')
+    return [ColumnarGraph(*graph_arrays) for graph_arrays in
+            zip(n_node, senders, receivers, node_columns_list, edge_columns_list, edge_keys,
+                arrays[f'{prefix}/graph_attributes'])]
@@ -0,0 +1,159 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import os
+import tempfile
+import time
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from kglib.kgcn.pipeline.cache import GraphCache, fingerprint
+from kglib.kgcn.pipeline.encode import TypeEncoder
+from kglib.kgcn.pipeline.preprocess import preprocess_graphs
+from kglib.utils.grakn.object.thing import Thing
+
+TYPE_ENCODER = TypeEncoder(['person', 'age', 'name'], ['has'], {'name': ['Alice', 'Bob']}, {'age': (0, 100)})
+
+
+def create_graph(graph_index):
+    graph = nx.MultiDiGraph(name=graph_index)
+    person = Thing(f'P{graph_index}', 'person', 'entity')
+    graph.add_node(person, type='person', solution=0)
+    # Some graphs have no attributes, and so no value column, and one has no edges
+    if graph_index % 2 == 0:
+        name = Thing(f'N{graph_index}', 'name', 'attribute', value_type='string', value='Bob')
+        graph.add_node(name, type='name', value='Bob', solution=1)
+        graph.add_edge(person, name, type='has', solution=1)
+    if graph_index % 3 != 1:
+        age = Thing(f'A{graph_index}', 'age', 'attribute', value_type='long', value=graph_index)
+        graph.add_node(age, type='age', value=graph_index, solution=0)
+        graph.add_edge(person, age, type='has', solution=0)
+    return graph
+
+
+class TestGraphCache(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._graph_lists = preprocess_graphs([create_graph(i) for i in range(6)], TYPE_ENCODER)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def assertColumnarGraphsIdentical(self, expected_graphs, graphs):
+        self.assertEqual(len(expected_graphs), len(graphs))
+        for expected, graph in zip(expected_graphs, graphs):
+            self.assertEqual(expected.n_node, graph.n_node)
+            self.assertEqual(expected.graph_attributes['name'], graph.graph_attributes['name'])
+            for expected_array, array in [(expected.senders, graph.senders), (expected.receivers, graph.receivers),
+                                          (expected.edge_keys, graph.edge_keys)]:
+                self.assertEqual(expected_array.tobytes(), array.tobytes())
+            for expected_columns, columns in [(expected.node_columns, graph.node_columns),
+                                              (expected.edge_columns, graph.edge_columns)]:
+                self.assertEqual(expected_columns.keys(), columns.keys())
+                for name, column in columns.items():
+                    self.assertEqual(expected_columns[name].dtype, column.dtype)
+                    self.assertEqual(expected_columns[name].tolist(), column.tolist())
+
+    def test_graphs_are_loaded_as_saved(self):
+        cache = GraphCache(self._directory.name)
+        cache.save('key', *self._graph_lists)
+
+        for expected_graphs, graphs in zip(self._graph_lists, cache.load('key')):
+            self.assertColumnarGraphsIdentical(expected_graphs, graphs)
+
+    def test_missing_entry_gives_none(self):
+        self.assertIsNone(GraphCache(self._directory.name).load('key'))
+
+    def test_graphs_are_only_created_when_missing(self):
+        cache = GraphCache(self._directory.name)
+        calls = []
+
+        def create():
+            calls.append(1)
+            return self._graph_lists
+
+        cache.get_or_create('key', create)
+        graphs, _, _ = cache.get_or_create('key', create)
+
+        self.assertEqual(1, len(calls))
+        self.assertColumnarGraphsIdentical(self._graph_lists[0], graphs)
+
+    def test_none_key_raises_exception_without_creating_graphs(self):
+        cache = GraphCache(self._directory.name)
+        calls = []
+
+        def create():
+            calls.append(1)
+            return self._graph_lists
+
+        with self.assertRaises(ValueError):
+            cache.get_or_create(None, create)
+        self.assertEqual([], calls)
+        self.assertEqual([], cache.keys())
+
+    def test_invalidated_entries_are_removed(self):
+        cache = GraphCache(self._directory.name)
+        cache.save('a', *self._graph_lists)
+        cache.save('b', *self._graph_lists)
+
+        cache.invalidate('a')
+        self.assertNotIn('a', cache)
+        self.assertIn('b', cache)
+
+        cache.invalidate()
+        self.assertListEqual([], cache.keys())
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = GraphCache(self._directory.name)
+        cache.save('a', *self._graph_lists)
+        entry_bytes = cache.total_bytes()
+        cache.max_bytes = 2 * entry_bytes
+
+        cache.save('b', *self._graph_lists)
+        # Use 'a' more recently than 'b'
+        past = time.time() - 10
+        os.utime(cache.path('a'), (past, past))
+        os.utime(cache.path('b'), (past - 10, past - 10))
+        cache.load('a')
+        cache.save('c', *self._graph_lists)
+
+        self.assertListEqual(['a', 'c'], sorted(cache.keys()))
+        self.assertLessEqual(cache.total_bytes(), cache.max_bytes)
+
+    def test_entry_just_saved_is_kept_even_if_too_large(self):
+        cache = GraphCache(self._directory.name, max_bytes=1)
+        cache.save('a', *self._graph_lists)
+        cache.save('b', *self._graph_lists)
+        self.assertListEqual(['b'], cache.keys())
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_independent_of_dict_order(self):
+        self.assertEqual(fingerprint({'a': 1, 'b': 2}, ['x']), fingerprint({'b': 2, 'a': 1}, ['x']))
+
+    def test_differs_for_different_components(self):
+        self.assertNotEqual(fingerprint(['match $x; get;'], [0, 1]), fingerprint(['match $x; get;'], [0, 2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
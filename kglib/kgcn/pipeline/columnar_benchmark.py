@@ -0,0 +1,132 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import copy
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+from kglib.kgcn.pipeline.encode import encode_values, encode_types, create_input_graph, create_target_graph
+from kglib.kgcn.pipeline.utils import duplicate_edges_in_reverse
+from kglib.utils.grakn.object.thing import Thing
+from kglib.utils.graph.columnar import ColumnarGraph
+from kglib.utils.graph.iterate import multidigraph_node_data_iterator, multidigraph_edge_data_iterator
+
+NODE_TYPES = ['person', 'employment', 'company', 'name', 'salary']
+EDGE_TYPES = ['employee', 'employer', 'has']
+CATEGORICAL_ATTRIBUTES = {'name': [f'name-{i}' for i in range(20)]}
+CONTINUOUS_ATTRIBUTES = {'salary': (0, 100000)}
+
+
+def synthetic_concept_graph(graph_index, num_employments, random_state):
+    """
+    Creates a graph shaped like those built from Grakn, of people employed by companies, where the people have names
+    and the employments have salaries
+    """
+    graph = nx.MultiDiGraph(name=graph_index)
+    company = Thing(f'C{graph_index}', 'company', 'entity')
+    graph.add_node(company, type='company', solution=0)
+
+    for i in range(num_employments):
+        person = Thing(f'P{graph_index}-{i}', 'person', 'entity')
+        employment = Thing(f'E{graph_index}-{i}', 'employment', 'relation')
+        name_value = f'name-{random_state.randint(20)}'
+        name = Thing(f'N{graph_index}-{i}', 'name', 'attribute', value_type='string', value=name_value)
+        salary_value = float(random_state.randint(100000))
+        salary = Thing(f'S{graph_index}-{i}', 'salary', 'attribute', value_type='double', value=salary_value)
+
+        graph.add_node(person, type='person', solution=0)
+        graph.add_node(employment, type='employment', solution=int(random_state.randint(1, 3)))
+        graph.add_node(name, type='name', value=name_value, solution=0)
+        graph.add_node(salary, type='salary', value=salary_value, solution=0)
+        graph.add_edge(employment, person, type='employee', solution=0)
+        graph.add_edge(employment, company, type='employer', solution=0)
+        graph.add_edge(person, name, type='has', solution=0)
+        graph.add_edge(employment, salary, type='has', solution=0)
+    return graph
+
+
+def preprocess_networkx(graphs):
+    graphs = [encode_values(graph, CATEGORICAL_ATTRIBUTES, CONTINUOUS_ATTRIBUTES) for graph in graphs]
+    graphs = [nx.convert_node_labels_to_integers(graph, label_attribute='concept') for graph in graphs]
+    graphs = [duplicate_edges_in_reverse(graph) for graph in graphs]
+    graphs = [encode_types(graph, multidigraph_node_data_iterator, NODE_TYPES) for graph in graphs]
+    graphs = [encode_types(graph, multidigraph_edge_data_iterator, EDGE_TYPES) for graph in graphs]
+    return graphs, [create_input_graph(graph) for graph in graphs], [create_target_graph(graph) for graph in graphs]
+
+
+def preprocess_columnar(graphs):
+    graphs = [ColumnarGraph.from_networkx(graph, label_attribute='concept') for graph in graphs]
+    graphs = [encode_values(graph, CATEGORICAL_ATTRIBUTES, CONTINUOUS_ATTRIBUTES) for graph in graphs]
+    graphs = [duplicate_edges_in_reverse(graph) for graph in graphs]
+    graphs = [encode_types(graph, multidigraph_node_data_iterator, NODE_TYPES) for graph in graphs]
+    graphs = [encode_types(graph, multidigraph_edge_data_iterator, EDGE_TYPES) for graph in graphs]
+    return graphs, [create_input_graph(graph) for graph in graphs], [create_target_graph(graph) for graph in graphs]
+
+
+def measure(preprocess_fn, graphs):
+    """
+    Preprocesses copies of the graphs twice, once to time it and once to trace the memory allocated, since tracing
+    slows the preprocessing down
+
+    Returns:
+        The seconds taken to preprocess the graphs, and the bytes allocated for the preprocessed graphs
+    """
+    # The networkx stages modify the graphs in place, so work on a copy of the graphs each time
+    graphs_copy = copy.deepcopy(graphs)
+    start_time = time.time()
+    preprocess_fn(graphs_copy)
+    seconds = time.time() - start_time
+
+    graphs_copy = copy.deepcopy(graphs)
+    tracemalloc.start()
+    preprocessed = preprocess_fn(graphs_copy)
+    allocated_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del preprocessed
+    return seconds, allocated_bytes
+
+
+def benchmark(num_graphs=10000, num_employments=12):
+    """
+    Compares the time taken and the memory held by the preprocessing stages of `pipeline` for networkx graphs, against
+    for ColumnarGraphs, on synthetic graphs of about 1M nodes and edges in total once their edges are duplicated.
+    Memory is measured with tracemalloc, as the bytes still allocated once preprocessing is complete
+
+    Returns:
+        Seconds and bytes for networkx graphs, and seconds and bytes for ColumnarGraphs
+    """
+    random_state = np.random.RandomState(0)
+    graphs = [synthetic_concept_graph(i, num_employments, random_state) for i in range(num_graphs)]
+    num_elements = sum(graph.number_of_nodes() + 2 * graph.number_of_edges() for graph in graphs)
+
+    networkx_seconds, networkx_bytes = measure(preprocess_networkx, graphs)
+    columnar_seconds, columnar_bytes = measure(preprocess_columnar, graphs)
+
+    print(f'{num_graphs} graphs, {num_elements} nodes and edges')
+    print(f'networkx: {networkx_seconds:.2f}s, {networkx_bytes / 1e6:.1f}MB')
+    print(f'columnar: {columnar_seconds:.2f}s, {columnar_bytes / 1e6:.1f}MB')
+    print(f'{networkx_seconds / columnar_seconds:.1f}x faster, {networkx_bytes / columnar_bytes:.1f}x less memory')
+    return (networkx_seconds, networkx_bytes), (columnar_seconds, columnar_bytes)
+
+
+if __name__ == "__main__":
+    benchmark()
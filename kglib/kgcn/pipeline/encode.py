@@ -19,11 +19,113 @@
 
 import numpy as np
 
+from kglib.utils.graph.columnar import ColumnarGraph, get_column
 from kglib.utils.graph.iterate import multidigraph_data_iterator, multidigraph_node_data_iterator, \
     multidigraph_edge_data_iterator
 
+SOLUTION_ONE_HOT_ENCODING = np.array([[1., 0., 0.], [0., 1., 0.], [0., 0., 1.]], dtype=np.float32)
+
+
+class CategoryEncoder:
+    """
+    Encodes categories, such as types or the values of a categorical attribute, as the index of the category in a list.
+    The indices are held in a dict, built once, so each category is encoded by a single lookup rather than by searching
+    the list.
+    """
+    def __init__(self, categories):
+        """
+        Args:
+            categories: The full list of categories to be encoded, in this order
+        """
+        self.categories = list(categories)
+        self._indices = {category: i for i, category in enumerate(self.categories)}
+
+    def __len__(self):
+        return len(self.categories)
+
+    def index(self, category):
+        """
+        Encodes a single category, raising a ValueError for an unknown category as `list.index` does
+        """
+        try:
+            return self._indices[category]
+        except KeyError:
+            raise ValueError(f'{category!r} is not in list') from None
+
+    def encode(self, categories):
+        """
+        Encodes many categories at once
+
+        Args:
+            categories: Iterable of categories, such as an object array
+
+        Returns:
+            Integer numpy array of the index of each category
+        """
+        return np.fromiter(map(self.index, categories), dtype=np.int64, count=len(categories))
+
+
+class TypeEncoder:
+    """
+    Encodes the types and attribute values of graphs, holding the index tables for the node types, the edge types and
+    the values of each categorical attribute. Build one per schema, and use it to encode graphs for training and for
+    inference alike.
+    """
+    def __init__(self, node_types, edge_types, categorical_attributes=None, continuous_attributes=None):
+        """
+        Args:
+            node_types: The full list of node types to be encoded, in this order
+            edge_types: The full list of edge types to be encoded, in this order
+            categorical_attributes: Dict of attribute type to the list of its possible values
+            continuous_attributes: Dict of attribute type to a tuple of its minimum and maximum value
+        """
+        self.node_types = CategoryEncoder(node_types)
+        self.edge_types = CategoryEncoder(edge_types)
+        self.categorical_attributes = category_encoders(categorical_attributes)
+        self.continuous_attributes = continuous_attributes
+
+    def encode_values(self, graph):
+        return encode_values(graph, self.categorical_attributes, self.continuous_attributes)
+
+    def encode_types(self, graph):
+        graph = encode_types(graph, multidigraph_node_data_iterator, self.node_types)
+        return encode_types(graph, multidigraph_edge_data_iterator, self.edge_types)
+
+    def encode(self, graph):
+        """
+        Encodes the attribute values, then the node and edge types, of a networkx graph or ColumnarGraph
+
+        Returns:
+            The graph, which is also updated in-place
+        """
+        return self.encode_types(self.encode_values(graph))
+
+
+def as_category_encoder(categories):
+    """
+    Gives a CategoryEncoder for a list of categories, or the CategoryEncoder itself if one is given, so that callers can
+    pass either and the index table is only built once
+    """
+    if isinstance(categories, CategoryEncoder):
+        return categories
+    return CategoryEncoder(categories)
+
+
+def category_encoders(categorical_attributes):
+    """
+    Converts a dict of attribute type to the list of its possible values into a dict of CategoryEncoders
+    """
+    if categorical_attributes is None:
+        return None
+    return {typ: as_category_encoder(values) for typ, values in categorical_attributes.items()}
+
 
 def encode_values(graph, categorical_attributes, continuous_attributes):
+    categorical_attributes = category_encoders(categorical_attributes)
+
+    if isinstance(graph, ColumnarGraph):
+        return encode_columnar_values(graph, categorical_attributes, continuous_attributes)
+
     for node_data in multidigraph_node_data_iterator(graph):
         typ = node_data['type']
 
@@ -44,18 +146,57 @@ def encode_values(graph, categorical_attributes, continuous_attributes):
     return graph
 
 
+def encode_columnar_values(graph, categorical_attributes, continuous_attributes):
+    """
+    Encodes the attribute values of a ColumnarGraph as `encode_values` does, a whole column at a time
+
+    Args:
+        graph: The ColumnarGraph to encode
+        categorical_attributes: Dict of attribute type to the CategoryEncoder for its values
+        continuous_attributes: Dict of attribute type to a tuple of its minimum and maximum value
+
+    Returns:
+        The graph, which is also updated in-place
+    """
+    types = get_column(graph.node_columns, 'type', graph.n_node)
+    values = graph.node_columns.get('value')
+    encoded_values = np.zeros(graph.n_node, dtype=np.float64)
+
+    for typ, category_values in (categorical_attributes or {}).items():
+        mask = types == typ
+        if np.any(mask):
+            # Add the integer value of the category for each categorical attribute instance
+            encoded_values[mask] = category_values.encode(values[mask])
+
+    for typ, (min_val, max_val) in (continuous_attributes or {}).items():
+        if categorical_attributes is not None and typ in categorical_attributes.keys():
+            continue
+        mask = types == typ
+        if np.any(mask):
+            encoded_values[mask] = (values[mask].astype(np.float64) - min_val) / (max_val - min_val)
+
+    graph.node_columns['encoded_value'] = encoded_values
+    graph.edge_columns['encoded_value'] = np.zeros(graph.n_edge, dtype=np.float64)
+    return graph
+
+
 def encode_types(graph, iterator_func, types):
     """
     Encodes the type found in graph data as an integer according to the index it is found in `all_types`
     Args:
         graph: The graph to encode
         iterator_func: An function to create an iterator of data in the graph (node data, edge data or combined node and edge data)
-        types: The full list of types to be encoded in this order
+        types: The full list of types to be encoded in this order, or a CategoryEncoder of them
         
     Returns:
         The graph, which is also is updated in-place
 
     """
+    types = as_category_encoder(types)
+
+    if isinstance(graph, ColumnarGraph):
+        return encode_columnar_types(graph, COLUMNS_FOR_ITERATORS[iterator_func], types)
+
     iterator = iterator_func(graph)
 
     for data in iterator:
@@ -64,34 +205,185 @@ def encode_types(graph, iterator_func, types):
     return graph
 
 
-def create_input_graph(graph):
-    input_graph = graph.copy()
+def encode_columnar_types(graph, elements, types):
+    """
+    Encodes the types of the nodes and/or edges of a ColumnarGraph as `encode_types` does, a whole column at a time
+
+    Args:
+        graph: The ColumnarGraph to encode
+        elements: The elements to encode the types of, any of 'nodes' and 'edges'
+        types: CategoryEncoder of the types
+
+    Returns:
+        The graph, which is also updated in-place
+    """
+    for columns, num_elements in element_columns(graph, elements):
+        columns['categorical_type'] = types.encode(get_column(columns, 'type', num_elements))
+    return graph
 
-    for data in multidigraph_data_iterator(input_graph):
-        if data["solution"] == 0:
-            preexists = 1
-        else:
-            preexists = 0
 
-        features = stack_features([preexists, data["categorical_type"], data["encoded_value"]])
-        data.clear()
-        data["features"] = features
+COLUMNS_FOR_ITERATORS = {
+    multidigraph_node_data_iterator: ('nodes',),
+    multidigraph_edge_data_iterator: ('edges',),
+    multidigraph_data_iterator: ('nodes', 'edges'),
+}
 
-    input_graph.graph["features"] = np.array([0.0] * 5, dtype=np.float32)
-    return input_graph
+
+def element_columns(graph, elements=('nodes', 'edges')):
+    """
+    Gives the columns of the nodes and/or edges of a ColumnarGraph, with the number of nodes or edges
+    """
+    return [{'nodes': (graph.node_columns, graph.n_node), 'edges': (graph.edge_columns, graph.n_edge)}[element]
+            for element in elements]
+
+
+def create_input_graph(graph):
+    if isinstance(graph, ColumnarGraph):
+        return create_columnar_input_and_target_graphs(graph, with_target=False)[0]
+
+    return create_features_graphs(graph, data_input_features_matrix)[0]
 
 
 def create_target_graph(graph):
-    target_graph = graph.copy()
-    solution_one_hot_encoding = np.array([[1., 0., 0.], [0., 1., 0.], [0., 0., 1.]], dtype=np.float32)
+    if isinstance(graph, ColumnarGraph):
+        return create_columnar_input_and_target_graphs(graph, with_input=False)[1]
+
+    return create_features_graphs(graph, data_target_features_matrix)[0]
+
+
+def create_input_and_target_graphs(graph):
+    """
+    Creates the input graph and the target graph for an encoded graph together, in a single pass over its nodes and
+    edges, without copying the encoded graph.
+
+    Only ColumnarGraphs are built with less memory this way: they share the senders and receivers of `graph`, so only
+    their features are allocated. New networkx graphs must each build their own adjacency and data dicts, which take up
+    most of their memory, so their peak memory is about the same as copying `graph` and replacing its data with
+    features. Building them in one pass is faster, though
+
+    Args:
+        graph: The encoded graph, either a networkx graph or a ColumnarGraph
+
+    Returns:
+        The input graph and the target graph, of the same kind as `graph`
+    """
+    if isinstance(graph, ColumnarGraph):
+        return create_columnar_input_and_target_graphs(graph)
+
+    return create_features_graphs(graph, data_input_features_matrix, data_target_features_matrix)
+
+
+def input_features_matrix(solutions, categorical_types, encoded_values):
+    """
+    Builds the input features of many nodes or edges at once, such as all of those in a graph or in a batch of graphs.
+    The features are filled column by column into a single preallocated matrix, rather than stacked into a small array
+    per element as `stack_features` does
+
+    Args:
+        solutions: Array of the solution of each element
+        categorical_types: Array of the encoded type of each element
+        encoded_values: Array of the encoded value of each element
+
+    Returns:
+        float32 matrix with a row per element, of whether the element preexists, its type and its value
+    """
+    solutions = np.asarray(solutions)
+    features = np.empty((len(solutions), 3), dtype=np.float32)
+    features[:, 0] = solutions == 0
+    features[:, 1] = categorical_types
+    features[:, 2] = encoded_values
+    return features
+
+
+def target_features_matrix(solutions):
+    """
+    Returns:
+        float32 matrix with a row per element, of the one-hot encoding of its solution
+    """
+    return SOLUTION_ONE_HOT_ENCODING[np.asarray(solutions, dtype=np.int64)]
+
+
+def data_input_features_matrix(data_dicts):
+    """
+    Builds the input features of the elements with the given data, as `input_features_matrix` does
+
+    Args:
+        data_dicts: Sequence of the data dicts of encoded nodes or edges, which can be taken from many graphs
+
+    Returns:
+        float32 matrix with a row of input features per data dict
+    """
+    return input_features_matrix(*[np.fromiter((data[key] for data in data_dicts), dtype=dtype, count=len(data_dicts))
+                                   for key, dtype in [("solution", np.int64), ("categorical_type", np.float32),
+                                                      ("encoded_value", np.float32)]])
+
+
+def data_target_features_matrix(data_dicts):
+    return target_features_matrix(np.fromiter((data["solution"] for data in data_dicts), dtype=np.int64,
+                                              count=len(data_dicts)))
+
+
+def create_features_graphs(graph, *features_matrix_fns):
+    """
+    Creates a new graph for each of the given feature matrix functions, with the same nodes and edges as `graph`, in the
+    same order, holding only the features that the function gives for the data of the nodes and of the edges. Each
+    element's features are a row of the matrix
+
+    Returns:
+        A list of the new graphs, one per feature matrix function
+    """
+    nodes, node_data = zip(*graph.nodes(data=True)) if graph.number_of_nodes() > 0 else ((), ())
+    edges = list(graph.edges(keys=True, data=True))
+    edge_data = [data for *_, data in edges]
+
+    features_graphs = []
+    for features_matrix_fn in features_matrix_fns:
+        features_graph = graph.__class__()
+        features_graph.graph.update(graph.graph)
+        features_graph.graph["features"] = np.array([0.0] * 5, dtype=np.float32)
+        features_graph.add_nodes_from(
+            (node, {"features": features}) for node, features in zip(nodes, features_matrix_fn(node_data)))
+        features_graph.add_edges_from(
+            (sender, receiver, key, {"features": features})
+            for (sender, receiver, key, _), features in zip(edges, features_matrix_fn(edge_data)))
+        features_graphs.append(features_graph)
+
+    return features_graphs
+
+
+def create_columnar_input_and_target_graphs(graph, with_input=True, with_target=True):
+    """
+    Creates the input and target graphs for a ColumnarGraph as `create_input_and_target_graphs` does. Both share the
+    structure of `graph` and hold only their features
+
+    Args:
+        graph: The encoded ColumnarGraph
+        with_input: Whether to create the input graph
+        with_target: Whether to create the target graph
+
+    Returns:
+        The input graph and the target graph, either of which is None if not created
+    """
+    input_features_arrays = []
+    target_features_arrays = []
+    for columns, num_elements in element_columns(graph):
+        solutions = get_column(columns, 'solution', num_elements)
+        if with_input:
+            input_features_arrays.append(input_features_matrix(
+                solutions, get_column(columns, 'categorical_type', num_elements),
+                get_column(columns, 'encoded_value', num_elements)))
+        if with_target:
+            target_features_arrays.append(target_features_matrix(solutions))
+
+    return (columnar_features_graph(graph, *input_features_arrays) if with_input else None,
+            columnar_features_graph(graph, *target_features_arrays) if with_target else None)
 
-    for data in multidigraph_data_iterator(target_graph):
-        features = solution_one_hot_encoding[data["solution"]]
-        data.clear()
-        data["features"] = features
 
-    target_graph.graph["features"] = np.array([0.0] * 5, dtype=np.float32)
-    return target_graph
+def columnar_features_graph(graph, node_features, edge_features):
+    graph_attributes = dict(graph.graph_attributes)
+    graph_attributes["features"] = np.array([0.0] * 5, dtype=np.float32)
+    return graph.replace(node_columns={"features": node_features}, edge_columns={"features": edge_features},
+                         graph_attributes=graph_attributes)
 
 
 def stack_features(features):
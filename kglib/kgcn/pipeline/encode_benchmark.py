@@ -0,0 +1,74 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import time
+
+import numpy as np
+
+from kglib.kgcn.pipeline.encode import stack_features, data_input_features_matrix
+
+
+def synthetic_encoded_data(num_elements, random_state):
+    """
+    Creates the data dicts of encoded nodes or edges, as they are once their values and types have been encoded
+    """
+    solutions = random_state.randint(0, 3, num_elements)
+    categorical_types = random_state.randint(0, 10, num_elements)
+    encoded_values = random_state.uniform(0, 1, num_elements)
+    return [dict(solution=int(solution), categorical_type=int(categorical_type), encoded_value=float(encoded_value))
+            for solution, categorical_type, encoded_value in zip(solutions, categorical_types, encoded_values)]
+
+
+def per_element_input_features(data_dicts):
+    """
+    Builds the input features of each element separately, as they were built before `data_input_features_matrix`
+    """
+    return [stack_features([1 if data["solution"] == 0 else 0, data["categorical_type"], data["encoded_value"]])
+            for data in data_dicts]
+
+
+def benchmark(num_elements=1000000, repeats=3):
+    """
+    Compares the throughput of building input features for a batch of nodes and edges one element at a time with
+    `stack_features`, against building them as one matrix with `data_input_features_matrix`
+
+    Returns:
+        Elements per second for each element separately, and for a matrix
+    """
+    data_dicts = synthetic_encoded_data(num_elements, np.random.RandomState(0))
+
+    throughputs = []
+    for features_fn in [per_element_input_features, data_input_features_matrix]:
+        seconds = []
+        for _ in range(repeats):
+            start_time = time.time()
+            features_fn(data_dicts)
+            seconds.append(time.time() - start_time)
+        throughputs.append(num_elements / min(seconds))
+
+    per_element_throughput, matrix_throughput = throughputs
+    print(f'{num_elements} nodes and edges')
+    print(f'per element: {per_element_throughput:.0f} elements/s')
+    print(f'matrix: {matrix_throughput:.0f} elements/s')
+    print(f'{matrix_throughput / per_element_throughput:.1f}x the throughput')
+    return per_element_throughput, matrix_throughput
+
+
+if __name__ == "__main__":
+    benchmark()
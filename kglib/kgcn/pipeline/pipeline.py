@@ -17,18 +17,21 @@
 #  under the License.
 #
 
-import networkx as nx
 import numpy as np
 from graph_nets.utils_np import graphs_tuple_to_networkxs
 
+from kglib.kgcn.learn.export import export_frozen_graph
 from kglib.kgcn.learn.learn import KGCNLearner
+from kglib.kgcn.learn.predict import Predictor
 from kglib.kgcn.models.core import softmax, KGCN
 from kglib.kgcn.models.embedding import ThingEmbedder, RoleEmbedder
-from kglib.kgcn.pipeline.encode import encode_types, create_input_graph, create_target_graph, encode_values
-from kglib.kgcn.pipeline.utils import apply_logits_to_graphs, duplicate_edges_in_reverse
+from kglib.kgcn.models.instrumentation import FULL
+from kglib.kgcn.pipeline.encode import TypeEncoder, create_input_graph
+from kglib.kgcn.pipeline.preprocess import preprocess_graphs
+from kglib.kgcn.pipeline.utils import apply_logits_to_graphs
 from kglib.kgcn.plot.plotting import plot_across_training, plot_predictions
-from kglib.utils.graph.iterate import multidigraph_node_data_iterator, multidigraph_data_iterator, \
-    multidigraph_edge_data_iterator
+from kglib.utils.graph.columnar import ColumnarGraph
+from kglib.utils.graph.iterate import multidigraph_data_iterator
 
 
 def pipeline(graphs,
@@ -44,23 +47,37 @@ def pipeline(graphs,
              attr_embedding_dim=6,
              edge_output_size=3,
              node_output_size=3,
-             output_dir=None):
+             output_dir=None,
+             batch_size=None,
+             prefetch_batches=None,
+             num_workers=None,
+             cache=None,
+             cache_key=None,
+             instrumentation=FULL,
+             checkpoint_path=None,
+             use_while_loop=False,
+             num_loss_steps=None):
+
+    if cache is not None and cache_key is None:
+        raise ValueError('A cache_key, such as one made by `fingerprint`, must be given to use a cache, so that graphs '
+                         'preprocessed from different data are kept apart')
 
     ############################################################
     # Manipulate the graph data
     ############################################################
 
-    # Encode attribute values
-    graphs = [encode_values(graph, categorical_attributes, continuous_attributes) for graph in graphs]
-
-    indexed_graphs = [nx.convert_node_labels_to_integers(graph, label_attribute='concept') for graph in graphs]
-    graphs = [duplicate_edges_in_reverse(graph) for graph in indexed_graphs]
+    # Build the index tables for the types and categorical attribute values once, for all of the graphs
+    type_encoder = TypeEncoder(node_types, edge_types, categorical_attributes, continuous_attributes)
 
-    graphs = [encode_types(graph, multidigraph_node_data_iterator, node_types) for graph in graphs]
-    graphs = [encode_types(graph, multidigraph_edge_data_iterator, edge_types) for graph in graphs]
+    # Encode the graphs and create the input and target graphs from them, holding the graphs as arrays
+    def create_preprocessed_graphs():
+        return preprocess_graphs(graphs() if callable(graphs) else graphs, type_encoder, num_workers=num_workers)
 
-    input_graphs = [create_input_graph(graph) for graph in graphs]
-    target_graphs = [create_target_graph(graph) for graph in graphs]
+    if cache is None:
+        graphs, input_graphs, target_graphs = create_preprocessed_graphs()
+    else:
+        # Only extract and preprocess the graphs if they weren't saved by a previous run
+        graphs, input_graphs, target_graphs = cache.get_or_create(cache_key, create_preprocessed_graphs)
 
     tr_input_graphs = input_graphs[:tr_ge_split]
     tr_target_graphs = target_graphs[:tr_ge_split]
@@ -71,40 +88,176 @@ def pipeline(graphs,
     # Build and run the KGCN
     ############################################################
 
-    thing_embedder = ThingEmbedder(node_types, type_embedding_dim, attr_embedding_dim, categorical_attributes,
-                                   continuous_attributes)
-
-    role_embedder = RoleEmbedder(len(edge_types), type_embedding_dim)
-
-    kgcn = KGCN(thing_embedder,
-                role_embedder,
-                edge_output_size=edge_output_size,
-                node_output_size=node_output_size)
+    kgcn = build_kgcn(node_types, edge_types, continuous_attributes, categorical_attributes, type_embedding_dim,
+                      attr_embedding_dim, edge_output_size, node_output_size, use_while_loop=use_while_loop)
 
     learner = KGCNLearner(kgcn,
                           num_processing_steps_tr=num_processing_steps_tr,
-                          num_processing_steps_ge=num_processing_steps_ge)
+                          num_processing_steps_ge=num_processing_steps_ge,
+                          instrumentation=instrumentation,
+                          num_loss_steps=num_loss_steps)
 
     train_values, test_values, tr_info = learner(tr_input_graphs,
                                                  tr_target_graphs,
                                                  ge_input_graphs,
                                                  ge_target_graphs,
                                                  num_training_iterations=num_training_iterations,
-                                                 log_dir=output_dir)
+                                                 log_dir=output_dir,
+                                                 batch_size=batch_size,
+                                                 prefetch_batches=prefetch_batches,
+                                                 checkpoint_path=checkpoint_path)
+
+    indexed_ge_graphs = [graph.to_networkx() for graph in graphs[tr_ge_split:]]
 
     plot_across_training(*tr_info, output_file=f'{output_dir}learning.png')
-    plot_predictions(graphs[tr_ge_split:], test_values, num_processing_steps_ge, output_file=f'{output_dir}graph.png')
+    plot_predictions(indexed_ge_graphs, test_values, len(test_values["outputs"]), output_file=f'{output_dir}graph.png')
+
+    ge_graphs = apply_predictions(indexed_ge_graphs, test_values["outputs"][-1])
+
+    _, _, _, _, _, solveds_tr, solveds_ge = tr_info
+    return ge_graphs, solveds_tr, solveds_ge
+
+
+def build_kgcn(node_types,
+               edge_types,
+               continuous_attributes=None,
+               categorical_attributes=None,
+               type_embedding_dim=5,
+               attr_embedding_dim=6,
+               edge_output_size=3,
+               node_output_size=3,
+               use_dropout=True,
+               use_while_loop=False):
+    """
+    Builds the KGCN model for a schema. Training and inference must build it with the same arguments, so that a
+    checkpoint saved by one can be restored by the other, other than `use_dropout`, which should be False for inference,
+    and `use_while_loop`, which doesn't change the model's variables
+    """
+    thing_embedder = ThingEmbedder(node_types, type_embedding_dim, attr_embedding_dim, categorical_attributes,
+                                   continuous_attributes, use_dropout=use_dropout)
+
+    role_embedder = RoleEmbedder(len(edge_types), type_embedding_dim)
+
+    return KGCN(thing_embedder,
+                role_embedder,
+                edge_output_size=edge_output_size,
+                node_output_size=node_output_size,
+                use_while_loop=use_while_loop)
+
+
+def apply_predictions(graphs, logits):
+    """
+    Adds the logits of each node and edge to the graphs, with the probabilities and the prediction made from them
+
+    Args:
+        graphs: networkx graphs of Grakn concepts, indexed in the same order as the graphs that were scored
+        logits: GraphsTuple of the logits output by the model for the graphs
 
-    logit_graphs = graphs_tuple_to_networkxs(test_values["outputs"][-1])
+    Returns:
+        The graphs with "logits", "probabilities" and "prediction" added to each node and edge
+    """
+    logit_graphs = graphs_tuple_to_networkxs(logits)
 
-    indexed_ge_graphs = indexed_graphs[tr_ge_split:]
-    ge_graphs = [apply_logits_to_graphs(graph, logit_graph) for graph, logit_graph in
-                 zip(indexed_ge_graphs, logit_graphs)]
+    graphs = [apply_logits_to_graphs(graph, logit_graph) for graph, logit_graph in zip(graphs, logit_graphs)]
 
-    for ge_graph in ge_graphs:
-        for data in multidigraph_data_iterator(ge_graph):
+    for graph in graphs:
+        for data in multidigraph_data_iterator(graph):
             data['probabilities'] = softmax(data['logits'])
             data['prediction'] = int(np.argmax(data['probabilities']))
+    return graphs
 
-    _, _, _, _, _, solveds_tr, solveds_ge = tr_info
-    return ge_graphs, solveds_tr, solveds_ge
+
+def inference_model_fn(node_types,
+                       edge_types,
+                       continuous_attributes=None,
+                       categorical_attributes=None,
+                       type_embedding_dim=5,
+                       attr_embedding_dim=6,
+                       edge_output_size=3,
+                       node_output_size=3):
+    """
+    Gives a function that builds the KGCN for a schema as `pipeline` does, but without dropout, for inference
+    """
+    def model_fn():
+        return build_kgcn(node_types, edge_types, continuous_attributes, categorical_attributes, type_embedding_dim,
+                          attr_embedding_dim, edge_output_size, node_output_size, use_dropout=False)
+    return model_fn
+
+
+def template_input_graph():
+    """
+    Gives an encoded input graph of a single pre-existing node and edge. Any graph in the encoded format shapes input
+    placeholders the same way
+    """
+    template_graph = ColumnarGraph(1, [0], [0],
+                                   node_columns={'solution': [0], 'categorical_type': [0], 'encoded_value': [0.0]},
+                                   edge_columns={'solution': [0], 'categorical_type': [0], 'encoded_value': [0.0]})
+    return create_input_graph(template_graph)
+
+
+def create_predictor(checkpoint_path,
+                     node_types,
+                     edge_types,
+                     num_processing_steps_ge=10,
+                     continuous_attributes=None,
+                     categorical_attributes=None,
+                     type_embedding_dim=5,
+                     attr_embedding_dim=6,
+                     edge_output_size=3,
+                     node_output_size=3):
+    """
+    Restores a KGCN trained by `pipeline` from its checkpoint, ready to score new graphs with `predict`. The arguments
+    must match those that `pipeline` was given
+
+    Returns:
+        The TypeEncoder to encode new graphs with, and the Predictor
+    """
+    type_encoder = TypeEncoder(node_types, edge_types, categorical_attributes, continuous_attributes)
+    model_fn = inference_model_fn(node_types, edge_types, continuous_attributes, categorical_attributes,
+                                  type_embedding_dim, attr_embedding_dim, edge_output_size, node_output_size)
+    predictor = Predictor(model_fn, checkpoint_path, template_input_graph(),
+                          num_processing_steps_ge=num_processing_steps_ge)
+    return type_encoder, predictor
+
+
+def export_model(checkpoint_path,
+                 export_path,
+                 node_types,
+                 edge_types,
+                 num_processing_steps_ge=10,
+                 continuous_attributes=None,
+                 categorical_attributes=None,
+                 type_embedding_dim=5,
+                 attr_embedding_dim=6,
+                 edge_output_size=3,
+                 node_output_size=3):
+    """
+    Exports a KGCN trained by `pipeline` from its checkpoint as a frozen, optimised graph, which a `FrozenPredictor`
+    can score new graphs with in place of a Predictor. The arguments must match those that `pipeline` was given
+    """
+    model_fn = inference_model_fn(node_types, edge_types, continuous_attributes, categorical_attributes,
+                                  type_embedding_dim, attr_embedding_dim, edge_output_size, node_output_size)
+    export_frozen_graph(model_fn, checkpoint_path, template_input_graph(), export_path,
+                        num_processing_steps_ge=num_processing_steps_ge)
+
+
+def predict(graphs, type_encoder, predictor, num_workers=None):
+    """
+    Scores new graphs of Grakn concepts with a trained model, without any training. They're encoded just as graphs are
+    for training, so the nodes and edges to predict must be marked by a non-zero "solution", and pre-existing ones by
+    zero
+
+    Args:
+        graphs: Iterable of networkx graphs of Grakn concepts
+        type_encoder: TypeEncoder for the types and attribute values, as given by `create_predictor`
+        predictor: Predictor restored from the trained model's checkpoint, or a FrozenPredictor of the exported model
+        num_workers: The number of processes to preprocess the graphs with, as for `preprocess_graphs`
+
+    Returns:
+        The graphs, indexed, with "logits", "probabilities" and "prediction" added to each node and edge
+    """
+    encoded_graphs, input_graphs, _ = preprocess_graphs(graphs, type_encoder, num_workers=num_workers)
+    if len(input_graphs) == 0:
+        return []
+    logits = predictor.predict(input_graphs)
+    return apply_predictions([graph.to_networkx() for graph in encoded_graphs], logits)
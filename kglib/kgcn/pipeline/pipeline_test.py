@@ -0,0 +1,46 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import tempfile
+import unittest
+
+from kglib.kgcn.pipeline.cache import GraphCache
+from kglib.kgcn.pipeline.pipeline import pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_cache_without_cache_key_raises_exception(self):
+        calls = []
+
+        def create_graphs():
+            calls.append(1)
+            return []
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphCache(directory)
+            with self.assertRaises(ValueError):
+                pipeline(create_graphs, 0, ['person'], ['has'], cache=cache)
+
+            self.assertEqual([], cache.keys())
+        self.assertEqual([], calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from kglib.kgcn.pipeline.encode import create_input_and_target_graphs
+from kglib.kgcn.pipeline.utils import duplicate_edges_in_reverse
+from kglib.utils.graph.columnar import ColumnarGraph, to_column
+
+LABEL_ATTRIBUTE = 'concept'
+
+# The graphs being preprocessed by a pool of processes, which forked processes inherit rather than being sent
+_graphs_for_pool = None
+
+# The number of graphs to send to a process at a time when they are given by an iterator, whose length isn't known
+STREAM_CHUNKSIZE = 16
+
+
+def preprocess_graph(graph, type_encoder):
+    """
+    Takes a graph of Grakn concepts through all of the steps needed before learning, one after another: conversion to a
+    ColumnarGraph with nodes numbered as integers, encoding attribute values, duplicating edges in reverse, encoding
+    types, then building the input and target graphs together
+
+    Args:
+        graph: networkx graph of Grakn concepts, with the concepts as its nodes
+        type_encoder: TypeEncoder for the types and attribute values
+
+    Returns:
+        The encoded ColumnarGraph, holding the concept of each node under "concept", and the input and target
+        ColumnarGraphs
+    """
+    graph = ColumnarGraph.from_networkx(graph, label_attribute=LABEL_ATTRIBUTE)
+    graph = type_encoder.encode_values(graph)
+    graph = duplicate_edges_in_reverse(graph)
+    graph = type_encoder.encode_types(graph)
+    input_graph, target_graph = create_input_and_target_graphs(graph)
+    return graph, input_graph, target_graph
+
+
+def preprocess_graphs(graphs, type_encoder, num_workers=None, chunksize=None):
+    """
+    Preprocesses many graphs with `preprocess_graph`, optionally sharing them between a pool of processes. The results
+    are the same, and in the same order, whether or not a pool is used
+
+    `graphs` can be a generator, such as one extracting the graphs from Grakn, in which case each graph is preprocessed
+    as soon as it is produced, and needn't be kept once it is, so the networkx graphs are never all held in memory.
+
+    Args:
+        graphs: Iterable of networkx graphs of Grakn concepts
+        type_encoder: TypeEncoder for the types and attribute values
+        num_workers: The number of processes to use. If None or 1, the graphs are preprocessed in this process. If 0,
+            one process is used per CPU
+        chunksize: The number of graphs to give a process at a time. By default, each process is given about four
+            chunks of a list of graphs, or `STREAM_CHUNKSIZE` graphs at a time from any other iterable
+
+    Returns:
+        Lists of the encoded graphs, the input graphs and the target graphs
+    """
+    if num_workers == 0:
+        num_workers = os.cpu_count()
+
+    if num_workers is None or num_workers <= 1 or (isinstance(graphs, list) and len(graphs) <= 1):
+        preprocessed = [preprocess_graph(graph, type_encoder) for graph in graphs]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(graphs) // (4 * num_workers)) if isinstance(graphs, list) else STREAM_CHUNKSIZE
+        preprocessed = preprocess_graphs_in_pool(graphs, type_encoder, num_workers, chunksize)
+
+    if len(preprocessed) == 0:
+        return [], [], []
+    encoded_graphs, input_graphs, target_graphs = zip(*preprocessed)
+    return list(encoded_graphs), list(input_graphs), list(target_graphs)
+
+
+def preprocess_graphs_in_pool(graphs, type_encoder, num_workers, chunksize):
+    """
+    Preprocesses chunks of the graphs in a pool of processes. Where processes can be forked and the graphs are in a
+    list, they read the graphs from memory inherited from this process, rather than each graph being pickled and sent
+    to them. Graphs from any other iterable are sent a chunk at a time, as they are produced.
+
+    Forking is only safe while this process has no other threads running, since a forked process inherits their locks
+    in whatever state they happen to be in. A generator of graphs is typically extracting them from Grakn while the
+    pool starts, with a live gRPC session and the threads of `iterate_graphs_for_examples` running, and a forked
+    process can deadlock on them. So in that case the pool's processes are started from a fresh interpreter, with the
+    "forkserver" start method where it's available and "spawn" otherwise. A list of graphs is only forked from, so when
+    preprocessing a list, first close any Grakn sessions, or at least make sure no queries are in progress.
+
+    The concepts of the nodes are left out of the results sent back, since unpickling them is costly, and are filled in
+    from the nodes of the original graphs instead
+    """
+    global _graphs_for_pool
+
+    start_methods = multiprocessing.get_all_start_methods()
+    inherit = 'fork' in start_methods and isinstance(graphs, list)
+    if inherit:
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in start_methods else 'spawn')
+
+    _graphs_for_pool = graphs if inherit else None
+    node_lists = []
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+            futures = []
+            start = 0
+            for chunk in iterate_chunks(graphs, chunksize):
+                stop = start + len(chunk)
+                futures.append(executor.submit(preprocess_chunk, start, stop, type_encoder, None if inherit else chunk))
+                node_lists.extend(list(graph.nodes) for graph in chunk)
+                start = stop
+            preprocessed = [result for future in futures for result in future.result()]
+    finally:
+        _graphs_for_pool = None
+
+    for nodes, (encoded_graph, _, _) in zip(node_lists, preprocessed):
+        encoded_graph.node_columns[LABEL_ATTRIBUTE] = to_column(nodes)
+    return preprocessed
+
+
+def iterate_chunks(iterable, chunksize):
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, chunksize))
+
+
+def preprocess_chunk(start, stop, type_encoder, graphs=None):
+    """
+    Preprocesses the given graphs, or if None, the graphs from `start` to `stop` of those inherited from the parent
+    process
+    """
+    if graphs is None:
+        graphs = _graphs_for_pool[start:stop]
+
+    preprocessed = [preprocess_graph(graph, type_encoder) for graph in graphs]
+    for encoded_graph, _, _ in preprocessed:
+        # Keep the column's place, so that the columns are in the same order as when preprocessing serially
+        encoded_graph.node_columns[LABEL_ATTRIBUTE] = None
+    return preprocessed
@@ -0,0 +1,108 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import networkx as nx
+import numpy as np
+
+from kglib.kgcn.pipeline.encode import TypeEncoder
+from kglib.kgcn.pipeline.preprocess import preprocess_graphs
+from kglib.utils.grakn.object.thing import Thing
+
+TYPE_ENCODER = TypeEncoder(['person', 'employment', 'name'], ['employee', 'has'], {'name': ['Alice', 'Bob']}, {})
+
+
+def create_graph(graph_index, num_people):
+    graph = nx.MultiDiGraph(name=graph_index)
+    for i in range(num_people):
+        person = Thing(f'P{graph_index}-{i}', 'person', 'entity')
+        employment = Thing(f'E{graph_index}-{i}', 'employment', 'relation')
+        value = ['Alice', 'Bob'][i % 2]
+        name = Thing(f'N{graph_index}-{i}', 'name', 'attribute', value_type='string', value=value)
+        graph.add_node(person, type='person', solution=0)
+        graph.add_node(employment, type='employment', solution=1 + i % 2)
+        graph.add_node(name, type='name', value=value, solution=0)
+        graph.add_edge(employment, person, type='employee', solution=1 + i % 2)
+        graph.add_edge(person, name, type='has', solution=0)
+    return graph
+
+
+class TestPreprocessGraphs(unittest.TestCase):
+
+    def setUp(self):
+        self._graphs = [create_graph(graph_index, 1 + graph_index % 4) for graph_index in range(10)]
+
+    def assertColumnarGraphsIdentical(self, expected_graphs, graphs):
+        self.assertEqual(len(expected_graphs), len(graphs))
+        for expected, graph in zip(expected_graphs, graphs):
+            self.assertEqual(expected.graph_attributes.keys(), graph.graph_attributes.keys())
+            for expected_array, array in [(expected.senders, graph.senders), (expected.receivers, graph.receivers)]:
+                self.assertEqual(expected_array.tobytes(), array.tobytes())
+            for expected_columns, columns in [(expected.node_columns, graph.node_columns),
+                                              (expected.edge_columns, graph.edge_columns)]:
+                self.assertEqual(expected_columns.keys(), columns.keys())
+                for name, column in columns.items():
+                    if column.dtype == object:
+                        self.assertEqual(expected_columns[name].tolist(), column.tolist())
+                    else:
+                        self.assertEqual(expected_columns[name].dtype, column.dtype)
+                        self.assertEqual(expected_columns[name].tobytes(), column.tobytes())
+
+    def test_graphs_are_preprocessed_in_order(self):
+        graphs, input_graphs, target_graphs = preprocess_graphs(self._graphs, TYPE_ENCODER)
+
+        self.assertEqual(list(range(10)), [graph.graph_attributes['name'] for graph in graphs])
+        self.assertEqual([graph.number_of_nodes() for graph in self._graphs], [graph.n_node for graph in input_graphs])
+        self.assertEqual([2 * graph.number_of_edges() for graph in self._graphs],
+                         [graph.n_edge for graph in target_graphs])
+        np.testing.assert_array_equal([[1., 0., 0.], [0., 1., 0.], [1., 2., 0.]],
+                                      input_graphs[1].node_columns['features'][:3])
+
+    def test_results_with_a_process_pool_are_identical_to_serial_results(self):
+        serial = preprocess_graphs(self._graphs, TYPE_ENCODER)
+        parallel = preprocess_graphs(self._graphs, TYPE_ENCODER, num_workers=2, chunksize=3)
+
+        for expected_graphs, graphs in zip(serial, parallel):
+            self.assertColumnarGraphsIdentical(expected_graphs, graphs)
+
+    def test_graphs_from_a_generator_are_preprocessed_as_from_a_list(self):
+        expected = preprocess_graphs(self._graphs, TYPE_ENCODER)
+
+        for num_workers in [None, 2]:
+            preprocessed = preprocess_graphs((graph for graph in self._graphs), TYPE_ENCODER, num_workers=num_workers,
+                                             chunksize=3)
+            for expected_graphs, graphs in zip(expected, preprocessed):
+                self.assertColumnarGraphsIdentical(expected_graphs, graphs)
+
+    def test_processes_are_not_forked_for_graphs_from_a_generator(self):
+        # The generator may be extracting graphs with threads and a gRPC session running, which forking can deadlock on
+        with patch('kglib.kgcn.pipeline.preprocess.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as executor:
+            preprocess_graphs((graph for graph in self._graphs), TYPE_ENCODER, num_workers=2, chunksize=3)
+
+        self.assertNotEqual('fork', executor.call_args[1]['mp_context'].get_start_method())
+
+    def test_no_graphs_gives_empty_lists(self):
+        self.assertEqual(([], [], []), preprocess_graphs([], TYPE_ENCODER, num_workers=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
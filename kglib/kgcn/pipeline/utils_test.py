@@ -24,6 +24,7 @@ import numpy as np
 
 from kglib.kgcn.pipeline.utils import duplicate_edges_in_reverse, apply_logits_to_graphs
 from kglib.utils.grakn.object.thing import Thing
+from kglib.utils.graph.columnar import ColumnarGraph
 from kglib.utils.graph.test.case import GraphTestCase
 
 
@@ -63,6 +64,44 @@ class TestDuplicateEdgesInReverse(GraphTestCase):
         expected_graph.add_edge(p1, par0, type='child', solution=1)
         self.assertGraphsEqual(expected_graph, graph)
 
+    def test_columnar_edges_are_duplicated_as_for_networkx(self):
+        graph = nx.MultiDiGraph(name=0)
+        graph.add_node(0, type='person')
+        graph.add_node(1, type='person')
+        graph.add_node(2, type='parentship')
+        graph.add_node(3, type='name')
+        graph.add_edge(2, 0, type='parent')
+        graph.add_edge(2, 1, type='child')
+        graph.add_edge(2, 1, type='parent')
+        graph.add_edge(0, 3, type='has')
+
+        columnar_graph = duplicate_edges_in_reverse(ColumnarGraph.from_networkx(graph))
+        duplicate_edges_in_reverse(graph)
+
+        self.assertEqual(list(graph.edges(keys=True, data=True)),
+                         list(columnar_graph.to_networkx().edges(keys=True, data=True)))
+
+    def test_columnar_opposing_edges_with_the_same_key_are_duplicated_as_for_networkx(self):
+        graph = nx.MultiDiGraph(name=0)
+        graph.add_node(0, type='person')
+        graph.add_node(1, type='person')
+        graph.add_node(2, type='person')
+        graph.add_edge(0, 1, key=0, type='friend')
+        graph.add_edge(1, 0, key=0, type='enemy')
+        graph.add_edge(2, 1, key=0, type='sibling')
+        graph.add_edge(1, 2, key=0, type='cousin')
+
+        columnar_graph = duplicate_edges_in_reverse(ColumnarGraph.from_networkx(graph))
+        duplicate_edges_in_reverse(graph)
+
+        self.assertEqual([(0, 1, 0, {'type': 'friend'}),
+                          (1, 0, 0, {'type': 'friend'}),
+                          (1, 2, 0, {'type': 'cousin'}),
+                          (2, 1, 0, {'type': 'cousin'})],
+                         list(graph.edges(keys=True, data=True)))
+        self.assertEqual(list(graph.edges(keys=True, data=True)),
+                         list(columnar_graph.to_networkx().edges(keys=True, data=True)))
+
 
 class TestApplyLogitsToGraphs(GraphTestCase):
     def test_logits_applied_as_expected(self):
@@ -17,9 +17,13 @@
 #  under the License.
 #
 
+import threading
+from collections import OrderedDict
+
 from kglib.utils.grakn.object.comparable import PropertyComparable
 
-VALUE_TYPE_NAMES = ('long', 'double', 'boolean', 'date', 'string')
+# The names of the attribute value types, as the client gives them, lower-cased, and as Graql writes them
+VALUE_TYPE_NAMES = ('long', 'double', 'boolean', 'datetime', 'string')
 
 
 class Thing(PropertyComparable):
@@ -49,19 +53,121 @@ class Thing(PropertyComparable):
         return self.__str__()
 
 
-def build_thing(grakn_thing, tx):
+def build_thing(grakn_thing, tx, cache=None, schema=None):
+    """
+    Builds a local Thing from a Grakn concept
+
+    Args:
+        grakn_thing: A Grakn Thing concept
+        tx: The Grakn transaction the concept was retrieved with
+        cache: Optional ThingCache to re-use Things and type information already built, avoiding requests to the server
+        schema: Optional SchemaCache to look up the concept's type information in, avoiding requests to the server.
+            Ignored if `cache` is given, in which case the cache's own schema is used
+
+    Returns:
+        The Thing
+    """
+    if cache is not None:
+        return cache.get_thing(grakn_thing, tx)
 
-    id = grakn_thing.id
     type_label = grakn_thing.type().label()
+    type_info = None if schema is None else schema.type_info(type_label)
+    if type_info is None:
+        type_info = fetch_type_info(grakn_thing, tx)
+    base_type_label, value_type = type_info
+    return create_thing(grakn_thing, type_label, base_type_label, value_type)
+
+
+def fetch_type_info(grakn_thing, tx):
+    """
+    Asks the server for the information about a concept that depends only upon its type
+
+    Returns:
+        The base type label of the concept, and its value type if it is an attribute, otherwise None
+    """
     base_type_label = grakn_thing.as_remote(tx).base_type.replace('_TYPE', '').lower()
 
     assert(base_type_label in ['entity', 'relation', 'attribute'])
 
+    value_type = None
     if base_type_label == 'attribute':
         value_type = grakn_thing.as_remote(tx).type().value_type().name.lower()
         assert value_type in VALUE_TYPE_NAMES
-        value = grakn_thing.value()
 
-        return Thing(id, type_label, base_type_label, value_type, value)
+    return base_type_label, value_type
+
+
+def create_thing(grakn_thing, type_label, base_type_label, value_type):
+    if base_type_label == 'attribute':
+        return Thing(grakn_thing.id, type_label, base_type_label, value_type, grakn_thing.value())
+
+    return Thing(grakn_thing.id, type_label, base_type_label)
+
+
+class ThingCache:
+    """
+    Caches the Things built from Grakn concepts, keyed by concept id, and the base type and value type of each type
+    label. Concepts that have been seen before, and concepts of types that have been seen before, are then built
+    without any requests to the server. Safe to share between threads.
+    """
+    def __init__(self, max_size=None, schema=None):
+        """
+        Args:
+            max_size: The maximum number of Things to hold, after which the least recently used are evicted. If None,
+                the number of Things held is unbounded
+            schema: Optional SchemaCache holding the type information of the whole schema, so that no type information
+                needs to be requested from the server. Types missing from it are requested as usual
+        """
+        self._max_size = max_size
+        self._schema = schema
+        self._things = OrderedDict()
+        self._type_info = dict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.type_hits = 0
+        self.type_misses = 0
+
+    def get_thing(self, grakn_thing, tx):
+        with self._lock:
+            thing = self._things.get(grakn_thing.id)
+            if thing is not None:
+                self._things.move_to_end(grakn_thing.id)
+                self.hits += 1
+                return thing
+            self.misses += 1
+
+        type_label = grakn_thing.type().label()
+        base_type_label, value_type = self._get_type_info(grakn_thing, type_label, tx)
+        thing = create_thing(grakn_thing, type_label, base_type_label, value_type)
+
+        with self._lock:
+            self._things[grakn_thing.id] = thing
+            if self._max_size is not None and len(self._things) > self._max_size:
+                self._things.popitem(last=False)
+        return thing
+
+    def _get_type_info(self, grakn_thing, type_label, tx):
+        with self._lock:
+            type_info = self._type_info.get(type_label)
+            if type_info is None and self._schema is not None:
+                type_info = self._schema.type_info(type_label)
+            if type_info is not None:
+                self.type_hits += 1
+                return type_info
+            self.type_misses += 1
+
+        type_info = fetch_type_info(grakn_thing, tx)
+
+        with self._lock:
+            self._type_info[type_label] = type_info
+        return type_info
 
-    return Thing(id, type_label, base_type_label)
+    def stats(self):
+        """
+        Returns:
+            The hit and miss counts for Things and for type information
+        """
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, type_hits=self.type_hits, type_misses=self.type_misses)
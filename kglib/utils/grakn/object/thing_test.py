@@ -0,0 +1,148 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import unittest
+
+from kglib.utils.grakn.object.thing import Thing, ThingCache, build_thing
+from kglib.utils.grakn.test.mock.concept import MockThing, MockType, MockAttribute, MockAttributeType
+from kglib.utils.grakn.type.type import SchemaCache
+
+
+class CountingMockThing(MockThing):
+    remote_calls = 0
+
+    def as_remote(self, tx):
+        CountingMockThing.remote_calls += 1
+        return self
+
+
+class CountingMockAttribute(MockAttribute):
+    remote_calls = 0
+
+    def as_remote(self, tx):
+        CountingMockAttribute.remote_calls += 1
+        return self
+
+
+class TestBuildThing(unittest.TestCase):
+
+    def test_entity_is_built_as_expected(self):
+        thing = build_thing(MockThing('V123', MockType('V456', 'person', 'ENTITY')), None)
+        self.assertEqual(Thing('V123', 'person', 'entity'), thing)
+
+    def test_attribute_is_built_as_expected(self):
+        thing = build_thing(MockAttribute('V987', 'Bob', MockAttributeType('V555', 'name', 'ATTRIBUTE', 'STRING')),
+                            None)
+        self.assertEqual(Thing('V987', 'name', 'attribute', value_type='string', value='Bob'), thing)
+
+
+class TestThingCache(unittest.TestCase):
+
+    def setUp(self):
+        CountingMockThing.remote_calls = 0
+        CountingMockAttribute.remote_calls = 0
+        self._person_type = MockType('V456', 'person', 'ENTITY')
+        self._name_type = MockAttributeType('V555', 'name', 'ATTRIBUTE', 'STRING')
+
+    def test_things_are_the_same_as_without_cache(self):
+        cache = ThingCache()
+        person = MockThing('V123', self._person_type)
+        name = MockAttribute('V987', 'Bob', self._name_type)
+
+        self.assertEqual(build_thing(person, None), build_thing(person, None, cache=cache))
+        self.assertEqual(build_thing(name, None), build_thing(name, None, cache=cache))
+
+    def test_seen_concept_is_a_hit(self):
+        cache = ThingCache()
+        person = CountingMockThing('V123', self._person_type)
+
+        first = build_thing(person, None, cache=cache)
+        second = build_thing(person, None, cache=cache)
+
+        self.assertIs(first, second)
+        self.assertEqual(1, CountingMockThing.remote_calls)
+        self.assertEqual(dict(hits=1, misses=1, type_hits=0, type_misses=1), cache.stats())
+
+    def test_concept_of_seen_type_needs_no_remote_calls(self):
+        cache = ThingCache()
+
+        build_thing(CountingMockAttribute('V987', 'Bob', self._name_type), None, cache=cache)
+        remote_calls_for_first = CountingMockAttribute.remote_calls
+        thing = build_thing(CountingMockAttribute('V988', 'Sue', self._name_type), None, cache=cache)
+
+        self.assertEqual(Thing('V988', 'name', 'attribute', value_type='string', value='Sue'), thing)
+        self.assertEqual(remote_calls_for_first, CountingMockAttribute.remote_calls)
+        self.assertEqual(dict(hits=0, misses=2, type_hits=1, type_misses=1), cache.stats())
+
+    def test_least_recently_used_thing_is_evicted(self):
+        cache = ThingCache(max_size=2)
+        things = [MockThing(f'V{i}', self._person_type) for i in range(3)]
+
+        build_thing(things[0], None, cache=cache)
+        build_thing(things[1], None, cache=cache)
+        build_thing(things[0], None, cache=cache)
+        build_thing(things[2], None, cache=cache)  # Evicts things[1]
+        build_thing(things[0], None, cache=cache)
+        build_thing(things[1], None, cache=cache)
+
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(4, cache.misses)
+
+
+class TestBuildThingWithSchemaCache(unittest.TestCase):
+
+    def setUp(self):
+        CountingMockThing.remote_calls = 0
+        CountingMockAttribute.remote_calls = 0
+        self._schema = SchemaCache({'person': ('entity', None), 'name': ('attribute', 'string')})
+
+    def test_things_are_built_without_remote_calls(self):
+        person = CountingMockThing('V123', MockType('V456', 'person', 'ENTITY'))
+        name = CountingMockAttribute('V987', 'Bob', MockAttributeType('V555', 'name', 'ATTRIBUTE', 'STRING'))
+
+        self.assertEqual(Thing('V123', 'person', 'entity'), build_thing(person, None, schema=self._schema))
+        self.assertEqual(Thing('V987', 'name', 'attribute', value_type='string', value='Bob'),
+                         build_thing(name, None, schema=self._schema))
+        self.assertEqual(0, CountingMockThing.remote_calls)
+        self.assertEqual(0, CountingMockAttribute.remote_calls)
+
+    def test_datetime_value_type_is_the_same_with_and_without_schema(self):
+        birth_date = CountingMockAttribute('V876', '2000-01-01',
+                                           MockAttributeType('V556', 'birth-date', 'ATTRIBUTE', 'DATETIME'))
+        schema = SchemaCache({'birth-date': ('attribute', 'datetime')})
+
+        self.assertEqual(build_thing(birth_date, None), build_thing(birth_date, None, schema=schema))
+
+    def test_type_missing_from_schema_is_fetched(self):
+        company = CountingMockThing('V321', MockType('V654', 'company', 'ENTITY'))
+        self.assertEqual(Thing('V321', 'company', 'entity'), build_thing(company, None, schema=self._schema))
+        self.assertEqual(1, CountingMockThing.remote_calls)
+
+    def test_thing_cache_uses_schema(self):
+        cache = ThingCache(schema=self._schema)
+        person = CountingMockThing('V123', MockType('V456', 'person', 'ENTITY'))
+
+        build_thing(person, None, cache=cache)
+
+        self.assertEqual(0, CountingMockThing.remote_calls)
+        self.assertEqual(dict(hits=0, misses=1, type_hits=1, type_misses=0), cache.stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import threading
+import time
+
+
+class MockTransaction:
+    def __init__(self, answers_for_queries, latency=0):
+        self._answers_for_queries = answers_for_queries
+        self._latency = latency
+
+    def query(self, query, infer=True):
+        time.sleep(self._latency)
+        try:
+            return iter(self._answers_for_queries[query])
+        except KeyError:
+            raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class MockTransactionBuilder:
+    def __init__(self, session):
+        self._session = session
+
+    def read(self):
+        return self._session.open_transaction()
+
+    def write(self):
+        return self._session.open_transaction()
+
+
+class MockSession:
+    """
+    Gives transactions which answer queries from a dict of answers keyed by query, optionally taking `latency` seconds
+    to answer each query
+    """
+    def __init__(self, answers_for_queries, latency=0):
+        self._answers_for_queries = answers_for_queries
+        self._latency = latency
+        self._lock = threading.Lock()
+        self.transactions_opened = 0
+
+    def open_transaction(self):
+        with self._lock:
+            self.transactions_opened += 1
+        return MockTransaction(self._answers_for_queries, latency=self._latency)
+
+    def transaction(self):
+        return MockTransactionBuilder(self)
@@ -17,6 +17,11 @@
 #  under the License.
 #
 
+import json
+import os
+
+from kglib.utils.grakn.object.thing import VALUE_TYPE_NAMES
+
 
 def get_thing_types(tx):
     """
@@ -56,3 +61,106 @@ def get_role_types(tx):
     role_types = ['has'] + [role.get('x').label() for role in schema_concepts]
     role_types.remove('role')
     return role_types
+
+
+BASE_TYPES = ('entity', 'relation', 'attribute')
+
+
+class SchemaCache:
+    """
+    Holds the base type and value type of every thing type in the schema, keyed by type label. These depend only on a
+    concept's type, so once loaded they can be looked up locally rather than requested from the server for each concept.
+    The cache can be saved to disk so that later runs need not query the schema at all.
+    """
+    def __init__(self, type_info):
+        """
+        Args:
+            type_info: Dict of type label to a tuple of base type label and value type. The value type is None for
+                types that are not attribute types
+        """
+        self._type_info = {label: (base_type_label, value_type)
+                           for label, (base_type_label, value_type) in type_info.items()}
+
+    @classmethod
+    def from_transaction(cls, tx):
+        """
+        Queries the base type and value type of all thing types in the schema, making one query per base type and per
+        attribute value type, rather than one per concept
+
+        Args:
+            tx: Grakn transaction
+
+        Returns:
+            The SchemaCache
+        """
+        type_info = {}
+        for base_type_label in BASE_TYPES:
+            for label in _get_type_labels(tx, f"match $x sub {base_type_label}; get;"):
+                type_info[label] = (base_type_label, None)
+
+        for value_type in VALUE_TYPE_NAMES:
+            for label in _get_type_labels(tx, f"match $x sub attribute, value {value_type}; get;"):
+                type_info[label] = ('attribute', value_type)
+
+        [type_info.pop(el, None) for el in ['thing'] + list(BASE_TYPES)]
+        return cls(type_info)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a SchemaCache previously written with `save`
+        """
+        with open(path, 'r') as f:
+            return cls({label: tuple(info) for label, info in json.load(f).items()})
+
+    @classmethod
+    def load_or_create(cls, path, grakn_session):
+        """
+        Reads the SchemaCache from `path` if it exists. Otherwise, queries the schema and writes the result to `path`
+        for next time
+
+        Args:
+            path: Path of the JSON file to read or write
+            grakn_session: Grakn Session, used only if there is no file at `path`
+
+        Returns:
+            The SchemaCache
+        """
+        if os.path.exists(path):
+            return cls.load(path)
+
+        with grakn_session.transaction().read() as tx:
+            schema = cls.from_transaction(tx)
+        schema.save(path)
+        return schema
+
+    def save(self, path):
+        """
+        Writes the SchemaCache to a JSON file
+        """
+        with open(path, 'w') as f:
+            json.dump(self._type_info, f, indent=2, sort_keys=True)
+
+    def type_info(self, type_label):
+        """
+        Args:
+            type_label: Label of a thing type
+
+        Returns:
+            The base type label of the type, and its value type if it is an attribute type, otherwise None. None if the
+            type is not in the cache
+        """
+        return self._type_info.get(type_label)
+
+    def __contains__(self, type_label):
+        return type_label in self._type_info
+
+    def __len__(self):
+        return len(self._type_info)
+
+    def __eq__(self, other):
+        return isinstance(other, SchemaCache) and self._type_info == other._type_info
+
+
+def _get_type_labels(tx, query):
+    return [schema_concept.get('x').label() for schema_concept in tx.query(query)]
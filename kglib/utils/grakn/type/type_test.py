@@ -0,0 +1,105 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import os
+import tempfile
+import unittest
+
+from kglib.utils.grakn.test.mock.session import MockTransaction, MockSession
+from kglib.utils.grakn.type.type import SchemaCache
+
+
+class MockLabelledType:
+    def __init__(self, label):
+        self._label = label
+
+    def label(self):
+        return self._label
+
+
+class MockTypeAnswer:
+    def __init__(self, label):
+        self._type = MockLabelledType(label)
+
+    def get(self, variable):
+        assert variable == 'x'
+        return self._type
+
+
+def type_answers(*labels):
+    return [MockTypeAnswer(label) for label in labels]
+
+
+SCHEMA_ANSWERS = {
+    'match $x sub entity; get;': type_answers('entity', 'person', 'patient'),
+    'match $x sub relation; get;': type_answers('relation', 'diagnosis', '@has-name'),
+    'match $x sub attribute; get;': type_answers('attribute', 'name', 'age', 'severity'),
+    'match $x sub attribute, value long; get;': type_answers('age'),
+    'match $x sub attribute, value double; get;': type_answers('severity'),
+    'match $x sub attribute, value boolean; get;': [],
+    'match $x sub attribute, value datetime; get;': [],
+    'match $x sub attribute, value string; get;': type_answers('name'),
+}
+
+EXPECTED_TYPE_INFO = {
+    'person': ('entity', None),
+    'patient': ('entity', None),
+    'diagnosis': ('relation', None),
+    '@has-name': ('relation', None),
+    'name': ('attribute', 'string'),
+    'age': ('attribute', 'long'),
+    'severity': ('attribute', 'double'),
+}
+
+
+class TestSchemaCache(unittest.TestCase):
+
+    def test_type_info_is_loaded_from_transaction(self):
+        schema = SchemaCache.from_transaction(MockTransaction(SCHEMA_ANSWERS))
+        self.assertEqual(SchemaCache(EXPECTED_TYPE_INFO), schema)
+
+    def test_base_types_are_excluded(self):
+        schema = SchemaCache.from_transaction(MockTransaction(SCHEMA_ANSWERS))
+        for label in ['thing', 'entity', 'relation', 'attribute']:
+            self.assertNotIn(label, schema)
+
+    def test_unknown_type_gives_none(self):
+        self.assertIsNone(SchemaCache(EXPECTED_TYPE_INFO).type_info('drug'))
+
+    def test_save_and_load_round_trip(self):
+        schema = SchemaCache(EXPECTED_TYPE_INFO)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schema.json')
+            schema.save(path)
+            loaded = SchemaCache.load(path)
+        self.assertEqual(schema, loaded)
+        self.assertEqual(('attribute', 'long'), loaded.type_info('age'))
+
+    def test_load_or_create_queries_the_schema_only_once(self):
+        session = MockSession(SCHEMA_ANSWERS)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schema.json')
+            first = SchemaCache.load_or_create(path, session)
+            second = SchemaCache.load_or_create(path, session)
+        self.assertEqual(first, second)
+        self.assertEqual(1, session.transactions_opened)
+
+
+if __name__ == "__main__":
+    unittest.main()
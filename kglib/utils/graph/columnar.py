@@ -0,0 +1,251 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import networkx as nx
+import numpy as np
+
+NUMERIC_TYPES = (bool, int, float, np.number, np.bool_)
+
+
+class ColumnarGraph:
+    """
+    A directed multigraph held as arrays rather than as dicts of dicts. Nodes are identified by the integers
+    0..n_node-1, each edge is given by its entries in the `senders` and `receivers` arrays, and the data of the nodes
+    and edges is held in columns: one array per property, indexed by node or edge.
+
+    Numeric properties are held in numpy arrays of their natural dtype, and all other properties in object arrays. The
+    node and edge order is that of the graph it was converted from, and edges keep their multigraph keys, so a
+    conversion to networkx and back gives the same graph.
+    """
+
+    def __init__(self, n_node, senders, receivers, node_columns=None, edge_columns=None, edge_keys=None,
+                 graph_attributes=None):
+        """
+        Args:
+            n_node: The number of nodes
+            senders: Array of the index of the node each edge comes from
+            receivers: Array of the index of the node each edge goes to
+            node_columns: Dict of property name to an array with one entry per node
+            edge_columns: Dict of property name to an array with one entry per edge
+            edge_keys: Array of the multigraph key of each edge. If None, every edge is given key 0
+            graph_attributes: Dict of properties of the graph as a whole
+        """
+        self.n_node = int(n_node)
+        self.senders = np.asarray(senders, dtype=np.int32)
+        self.receivers = np.asarray(receivers, dtype=np.int32)
+        self.node_columns = dict() if node_columns is None else dict(node_columns)
+        self.edge_columns = dict() if edge_columns is None else dict(edge_columns)
+        self.edge_keys = np.zeros(len(self.senders), dtype=np.int64) if edge_keys is None else edge_keys
+        self.graph_attributes = dict() if graph_attributes is None else dict(graph_attributes)
+
+        if len(self.senders) != len(self.receivers) or len(self.senders) != len(self.edge_keys):
+            raise ValueError(f'senders, receivers and edge_keys must have the same length, but got '
+                             f'{len(self.senders)}, {len(self.receivers)} and {len(self.edge_keys)}')
+        for name, column in self.node_columns.items():
+            if len(column) != self.n_node:
+                raise ValueError(f'Node column "{name}" has {len(column)} entries, but there are {self.n_node} nodes')
+        for name, column in self.edge_columns.items():
+            if len(column) != self.n_edge:
+                raise ValueError(f'Edge column "{name}" has {len(column)} entries, but there are {self.n_edge} edges')
+
+    @property
+    def n_edge(self):
+        return len(self.senders)
+
+    def __str__(self):
+        return str(self.graph_attributes.get('name', ''))
+
+    def __repr__(self):
+        return f'<ColumnarGraph {self}: {self.n_node} nodes, {self.n_edge} edges>'
+
+    @classmethod
+    def from_networkx(cls, graph, label_attribute=None):
+        """
+        Converts a networkx multigraph, in the same manner as `nx.convert_node_labels_to_integers`, numbering the
+        nodes in the order they are found in the graph
+
+        Args:
+            graph: networkx MultiDiGraph
+            label_attribute: If given, the name of a node column in which to keep the original node labels
+
+        Returns:
+            The ColumnarGraph
+        """
+        nodes = list(graph.nodes(data=True))
+        node_indices = {node: i for i, (node, _) in enumerate(nodes)}
+
+        # Walk the adjacency directly, which gives the edges in the same order as graph.edges, but looks up the index
+        # of each receiver once per neighbour rather than once per edge
+        senders = []
+        receivers = []
+        keys = []
+        edge_data = []
+        for sender, (_, neighbours) in enumerate(graph.adjacency()):
+            for neighbour, key_data in neighbours.items():
+                receiver = node_indices[neighbour]
+                for key, data in key_data.items():
+                    senders.append(sender)
+                    receivers.append(receiver)
+                    keys.append(key)
+                    edge_data.append(data)
+
+        node_columns = data_to_columns([data for _, data in nodes])
+        if label_attribute is not None:
+            node_columns[label_attribute] = to_column([node for node, _ in nodes])
+
+        return cls(len(nodes), senders, receivers,
+                   node_columns=node_columns,
+                   edge_columns=data_to_columns(edge_data),
+                   edge_keys=to_column(keys),
+                   graph_attributes=graph.graph)
+
+    def to_networkx(self, label_attribute=None):
+        """
+        Converts to a networkx multigraph. Missing values, held as None, are left out of the data of the nodes and edges
+
+        Args:
+            label_attribute: If given, the name of a node column holding the labels to give the nodes, which is then
+                not included in the node data. Otherwise, nodes are labelled by their integer index
+
+        Returns:
+            networkx MultiDiGraph
+        """
+        graph = nx.MultiDiGraph()
+        graph.graph.update(self.graph_attributes)
+
+        node_columns = {name: column for name, column in self.node_columns.items() if name != label_attribute}
+        if label_attribute is None:
+            labels = list(range(self.n_node))
+        else:
+            labels = self.node_columns[label_attribute].tolist()
+
+        graph.add_nodes_from(zip(labels, columns_to_data(node_columns, self.n_node)))
+        graph.add_edges_from(
+            (labels[sender], labels[receiver], key, data) for sender, receiver, key, data in
+            zip(self.senders.tolist(), self.receivers.tolist(), self.edge_keys.tolist(),
+                columns_to_data(self.edge_columns, self.n_edge)))
+        return graph
+
+    def to_data_dict(self, features_attribute='features'):
+        """
+        Gives the graph's features in the form of a graph_nets data dict, such that
+        `graph_nets.utils_np.data_dicts_to_graphs_tuple` can combine many graphs into a GraphsTuple
+
+        Args:
+            features_attribute: Name of the node column, edge column and graph attribute holding the features
+
+        Returns:
+            Dict of numpy arrays keyed by GraphsTuple field
+        """
+        return dict(nodes=self.node_columns.get(features_attribute),
+                    edges=self.edge_columns.get(features_attribute),
+                    globals=self.graph_attributes.get(features_attribute),
+                    senders=self.senders,
+                    receivers=self.receivers,
+                    n_node=self.n_node,
+                    n_edge=self.n_edge)
+
+    @classmethod
+    def from_data_dict(cls, data_dict, features_attribute='features'):
+        """
+        Creates a ColumnarGraph from a graph_nets data dict, such as those given by
+        `graph_nets.utils_np.graphs_tuple_to_data_dicts`, holding the features under `features_attribute`
+        """
+        node_columns = {}
+        edge_columns = {}
+        graph_attributes = {}
+        if data_dict.get('nodes') is not None:
+            node_columns[features_attribute] = data_dict['nodes']
+        if data_dict.get('edges') is not None:
+            edge_columns[features_attribute] = data_dict['edges']
+        if data_dict.get('globals') is not None:
+            graph_attributes[features_attribute] = data_dict['globals']
+
+        return cls(data_dict['n_node'], data_dict['senders'], data_dict['receivers'], node_columns=node_columns,
+                   edge_columns=edge_columns, graph_attributes=graph_attributes)
+
+    def replace(self, **kwargs):
+        """
+        Creates a new ColumnarGraph with the given constructor arguments replaced, sharing all of the other arrays
+        """
+        arguments = dict(n_node=self.n_node, senders=self.senders, receivers=self.receivers,
+                         node_columns=self.node_columns, edge_columns=self.edge_columns, edge_keys=self.edge_keys,
+                         graph_attributes=self.graph_attributes)
+        arguments.update(kwargs)
+        return ColumnarGraph(**arguments)
+
+    def nbytes(self):
+        """
+        Returns:
+            The number of bytes held by the graph's arrays, not counting the objects referred to by object arrays
+        """
+        arrays = [self.senders, self.receivers, self.edge_keys] + list(self.node_columns.values()) + list(
+            self.edge_columns.values())
+        return sum(array.nbytes for array in arrays)
+
+
+def to_column(values):
+    """
+    Creates a column array from a list of values, of a numeric dtype if all of the values are numbers or numeric arrays
+    of the same shape, otherwise of object dtype
+    """
+    if len(values) > 0 and all(isinstance(value, NUMERIC_TYPES) for value in values):
+        return np.array(values)
+
+    if len(values) > 0 and all(isinstance(value, np.ndarray) and value.dtype.kind in 'biuf' for value in values):
+        if len({value.shape for value in values}) == 1:
+            return np.stack(values)
+
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def data_to_columns(data_dicts):
+    """
+    Converts a list of data dicts to a dict of columns, with None for the values missing from any of the dicts
+    """
+    names = {}
+    for data in data_dicts:
+        names.update(dict.fromkeys(data))
+    return {name: to_column([data.get(name) for data in data_dicts]) for name in names}
+
+
+def columns_to_data(columns, num_elements):
+    """
+    Converts a dict of columns to a list of data dicts, leaving out missing values held as None
+    """
+    values = {name: column.tolist() if column.ndim == 1 else list(column) for name, column in columns.items()}
+    data_dicts = [dict() for _ in range(num_elements)]
+    for name, column_values in values.items():
+        for data, value in zip(data_dicts, column_values):
+            if value is not None:
+                data[name] = value
+    return data_dicts
+
+
+def get_column(columns, name, num_elements):
+    """
+    Gets a column by name. Graphs converted from networkx have no columns for their edges if they have no edges, so in
+    that case an empty column is given for any name
+    """
+    if num_elements == 0 and name not in columns:
+        return np.zeros(0)
+    return columns[name]
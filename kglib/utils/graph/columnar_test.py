@@ -0,0 +1,140 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from kglib.utils.grakn.object.thing import Thing
+from kglib.utils.graph.columnar import ColumnarGraph
+from kglib.utils.graph.test.case import GraphTestCase
+
+
+def create_graph():
+    person = Thing('V123', 'person', 'entity')
+    name = Thing('V1234', 'name', 'attribute', value_type='string', value='Bob')
+    parentship = Thing('V567', 'parentship', 'relation')
+
+    graph = nx.MultiDiGraph(name='example')
+    graph.add_node(person, type='person', solution=1)
+    graph.add_node(name, type='name', value='Bob', solution=0)
+    graph.add_node(parentship, type='parentship', solution=2)
+    graph.add_edge(parentship, person, type='parent', solution=1)
+    graph.add_edge(parentship, person, type='child', solution=2)
+    graph.add_edge(person, name, type='has', solution=0)
+    return graph, [person, name, parentship]
+
+
+class TestColumnarGraphFromNetworkx(unittest.TestCase):
+
+    def test_structure_is_as_expected(self):
+        graph, _ = create_graph()
+
+        columnar_graph = ColumnarGraph.from_networkx(graph)
+
+        self.assertEqual(3, columnar_graph.n_node)
+        self.assertEqual(3, columnar_graph.n_edge)
+        np.testing.assert_array_equal([0, 2, 2], columnar_graph.senders)
+        np.testing.assert_array_equal([1, 0, 0], columnar_graph.receivers)
+        np.testing.assert_array_equal([0, 0, 1], columnar_graph.edge_keys)
+        self.assertEqual({'name': 'example'}, columnar_graph.graph_attributes)
+
+    def test_numeric_columns_are_numeric_and_others_are_objects(self):
+        graph, _ = create_graph()
+
+        columnar_graph = ColumnarGraph.from_networkx(graph)
+
+        self.assertEqual(np.int64, columnar_graph.node_columns['solution'].dtype)
+        self.assertEqual(object, columnar_graph.node_columns['type'].dtype)
+        self.assertEqual(['person', 'name', 'parentship'], columnar_graph.node_columns['type'].tolist())
+
+    def test_missing_values_are_none(self):
+        graph, _ = create_graph()
+
+        columnar_graph = ColumnarGraph.from_networkx(graph)
+
+        self.assertEqual([None, 'Bob', None], columnar_graph.node_columns['value'].tolist())
+
+    def test_node_labels_are_kept_in_label_attribute(self):
+        graph, things = create_graph()
+
+        columnar_graph = ColumnarGraph.from_networkx(graph, label_attribute='concept')
+
+        self.assertEqual(things, columnar_graph.node_columns['concept'].tolist())
+
+    def test_array_features_are_stacked(self):
+        graph = nx.MultiDiGraph()
+        graph.add_node(0, features=np.array([1., 0.], dtype=np.float32))
+        graph.add_node(1, features=np.array([0., 1.], dtype=np.float32))
+
+        columnar_graph = ColumnarGraph.from_networkx(graph)
+
+        np.testing.assert_array_equal(np.eye(2, dtype=np.float32), columnar_graph.node_columns['features'])
+        self.assertEqual(np.float32, columnar_graph.node_columns['features'].dtype)
+
+
+class TestColumnarGraphToNetworkx(GraphTestCase):
+
+    def test_round_trip_gives_graph_relabelled_to_integers(self):
+        graph, _ = create_graph()
+
+        round_tripped = ColumnarGraph.from_networkx(graph, label_attribute='concept').to_networkx()
+
+        expected = nx.convert_node_labels_to_integers(graph, label_attribute='concept')
+        self.assertEqual(list(expected.nodes(data=True)), list(round_tripped.nodes(data=True)))
+        self.assertEqual(list(expected.edges(keys=True, data=True)), list(round_tripped.edges(keys=True, data=True)))
+        self.assertEqual(expected.graph, round_tripped.graph)
+
+    def test_round_trip_with_label_attribute_gives_original_graph(self):
+        graph, _ = create_graph()
+
+        round_tripped = ColumnarGraph.from_networkx(graph, label_attribute='concept').to_networkx(
+            label_attribute='concept')
+
+        self.assertGraphsEqual(graph, round_tripped)
+        self.assertEqual(list(graph.nodes(data=True)), list(round_tripped.nodes(data=True)))
+
+
+class TestColumnarGraphDataDicts(unittest.TestCase):
+
+    def test_data_dict_round_trip(self):
+        columnar_graph = ColumnarGraph(3, [0, 1], [1, 2],
+                                       node_columns={'features': np.ones((3, 2), dtype=np.float32)},
+                                       edge_columns={'features': np.zeros((2, 4), dtype=np.float32)},
+                                       graph_attributes={'features': np.zeros(5, dtype=np.float32)})
+
+        data_dict = columnar_graph.to_data_dict()
+        self.assertEqual(3, data_dict['n_node'])
+        self.assertEqual(2, data_dict['n_edge'])
+
+        round_tripped = ColumnarGraph.from_data_dict(data_dict)
+        np.testing.assert_array_equal(columnar_graph.senders, round_tripped.senders)
+        np.testing.assert_array_equal(columnar_graph.receivers, round_tripped.receivers)
+        np.testing.assert_array_equal(columnar_graph.node_columns['features'], round_tripped.node_columns['features'])
+        np.testing.assert_array_equal(columnar_graph.edge_columns['features'], round_tripped.edge_columns['features'])
+
+    def test_mismatched_column_length_raises_exception(self):
+        with self.assertRaises(ValueError) as context:
+            ColumnarGraph(3, [0], [1], node_columns={'solution': np.zeros(2)})
+        self.assertEqual('Node column "solution" has 2 entries, but there are 3 nodes', str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,27 +16,31 @@
 #  specific language governing permissions and limitations
 #  under the License.
 #
+import itertools
 import warnings
-from functools import reduce
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import networkx as nx
 
-from kglib.utils.grakn.object.thing import build_thing
+from kglib.utils.grakn.object.thing import build_thing, ThingCache
 from kglib.utils.graph.thing.concept_dict_to_graph import concept_dict_to_graph
 
 
-def concept_dict_from_concept_map(concept_map, tx):
+def concept_dict_from_concept_map(concept_map, tx, thing_cache=None):
     """
     Given a concept map, build a dictionary of the variables present and the concepts they refer to, locally storing any
     information required about those concepts.
 
     Args:
         concept_map: A dict of Concepts provided by Grakn keyed by query variables
+        thing_cache: Optional ThingCache of concepts already built
 
     Returns:
         A dictionary of concepts keyed by query variables
     """
-    return {variable: build_thing(grakn_concept, tx) for variable, grakn_concept in concept_map.map().items()}
+    return {variable: build_thing(grakn_concept, tx, cache=thing_cache)
+            for variable, grakn_concept in concept_map.map().items()}
 
 
 def combine_2_graphs(graph1, graph2):
@@ -50,43 +54,68 @@ def combine_2_graphs(graph1, graph2):
     Returns:
         Combined graph
     """
-
-    for node, data in graph1.nodes(data=True):
-        if graph2.has_node(node):
-            data2 = graph2.nodes[node]
-            if data2 != data:
-                raise ValueError((f'Found non-matching node properties for node {node} '
-                                  f'between graphs {graph1} and {graph2}:\n'
-                                  f'In graph {graph1}: {data}\n'
-                                  f'In graph {graph2}: {data2}'))
-
-    for sender, receiver, keys, data in graph1.edges(data=True, keys=True):
-        if graph2.has_edge(sender, receiver, keys):
-            data2 = graph2.edges[sender, receiver, keys]
-            if data2 != data:
-                raise ValueError((f'Found non-matching edge properties for edge {sender, receiver, keys} '
-                                  f'between graphs {graph1} and {graph2}:\n'
-                                  f'In graph {graph1}: {data}\n'
-                                  f'In graph {graph2}: {data2}'))
-
-    return nx.compose(graph1, graph2)
+    return combine_n_graphs([graph1, graph2])
 
 
 def combine_n_graphs(graphs_list):
     """
     Combine N graphs into one. Do this by recognising common nodes between the two.
 
+    The graphs are merged into a single new graph in one pass, looking up each node and edge in the graph built so far,
+    so the cost is linear in the total size of the graphs, rather than copying the combined graph once per graph.
+    `graphs_list` can be a generator, in which case each graph is merged as soon as it is produced, so that only the
+    combined graph need be held in memory.
+
     Args:
-        graphs_list: List of graphs to combine
+        graphs_list: Iterable of graphs to combine
 
     Returns:
-        Combined graph
+        Combined graph, or None if there are no graphs
+    """
+    combined = None
+    for graph in graphs_list:
+        if combined is None:
+            combined = graph.__class__()
+        merge_graph_into(combined, graph)
+    return combined
+
+
+def merge_graph_into(combined, graph):
+    """
+    Adds the nodes and edges of `graph` to `combined` in place, checking that the nodes and edges they have in common
+    have the same properties
+
+    Args:
+        combined: Graph to add to
+        graph: Graph to add
     """
-    return reduce(lambda x, y: combine_2_graphs(x, y), graphs_list)
+    combined_nodes = combined.nodes
+    for node, data in graph.nodes(data=True):
+        if node in combined_nodes:
+            combined_data = combined_nodes[node]
+            if combined_data != data:
+                raise ValueError((f'Found non-matching node properties for node {node} '
+                                  f'between graphs {combined} and {graph}:\n'
+                                  f'In graph {combined}: {combined_data}\n'
+                                  f'In graph {graph}: {data}'))
+
+    for sender, receiver, keys, data in graph.edges(data=True, keys=True):
+        if combined.has_edge(sender, receiver, keys):
+            combined_data = combined.edges[sender, receiver, keys]
+            if combined_data != data:
+                raise ValueError((f'Found non-matching edge properties for edge {sender, receiver, keys} '
+                                  f'between graphs {combined} and {graph}:\n'
+                                  f'In graph {combined}: {combined_data}\n'
+                                  f'In graph {graph}: {data}'))
+
+    # Only modify the combined graph once there are no conflicts, so that it is never left partially merged
+    combined.graph.update(graph.graph)
+    combined.add_nodes_from(graph.nodes(data=True))
+    combined.add_edges_from(graph.edges(data=True, keys=True))
 
 
 def build_graph_from_queries(query_sampler_variable_graph_tuples, grakn_transaction,
-                             concept_dict_converter=concept_dict_to_graph, infer=True):
+                             concept_dict_converter=concept_dict_to_graph, infer=True, thing_cache=None):
     """
     Builds a graph of Things, interconnected by roles (and *has*), from a set of queries and graphs representing those
     queries (variable graphs)of those queries, over a Grakn transaction
@@ -98,40 +127,211 @@ def build_graph_from_queries(query_sampler_variable_graph_tuples, grakn_transact
         grakn_transaction: A Grakn transaction
         concept_dict_converter: The function to use to convert from concept_dicts to a Grakn model. This could be
             a typical model or a mathematical model
+        thing_cache: ThingCache to share between the queries. Pass the same cache to multiple calls to share it
+            between graphs too. If None, a new cache is used for this graph only
 
     Returns:
         A networkx graph
     """
+    if thing_cache is None:
+        thing_cache = ThingCache()
 
-    query_concept_graphs = []
+    query_concept_graphs = [
+        build_query_concept_graph(query, sampler, variable_graph, grakn_transaction,
+                                  concept_dict_converter=concept_dict_converter, infer=infer, thing_cache=thing_cache)
+        for query, sampler, variable_graph in query_sampler_variable_graph_tuples
+    ]
 
-    for query, sampler, variable_graph in query_sampler_variable_graph_tuples:
+    return combine_query_concept_graphs(query_sampler_variable_graph_tuples, query_concept_graphs)
 
-        concept_maps = sampler(grakn_transaction.query(query, infer=infer))
 
-        concept_dicts = [concept_dict_from_concept_map(concept_map, grakn_transaction) for concept_map in concept_maps]
+def build_graph_from_queries_concurrently(query_sampler_variable_graph_tuples, grakn_session,
+                                          concept_dict_converter=concept_dict_to_graph, infer=True,
+                                          max_concurrent_queries=4, thing_cache=None):
+    """
+    Builds the same graph as `build_graph_from_queries`, but issues the queries concurrently, each in its own read
+    transaction from `grakn_session`, so that the time spent waiting on the server for independent queries overlaps
 
-        answer_concept_graphs = []
-        for concept_dict in concept_dicts:
-            try:
-                answer_concept_graphs.append(concept_dict_converter(concept_dict, variable_graph))
-            except ValueError as e:
-                raise ValueError(str(e) + f'Encountered processing query:\n \"{query}\"')
+    Args:
+        query_sampler_variable_graph_tuples: A list of tuples, each tuple containing a query, a sampling function,
+            and a variable_graph
+        grakn_session: A Grakn session
+        concept_dict_converter: The function to use to convert from concept_dicts to a Grakn model
+        infer: whether to use Grakn's inference engine
+        max_concurrent_queries: The maximum number of queries (and therefore transactions) in flight at once
+        thing_cache: ThingCache to share between the queries, see `build_graph_from_queries`
+
+    Returns:
+        A networkx graph
+    """
+    if thing_cache is None:
+        thing_cache = ThingCache()
+
+    def build_in_own_transaction(query, sampler, variable_graph):
+        with grakn_session.transaction().read() as tx:
+            return build_query_concept_graph(query, sampler, variable_graph, tx,
+                                             concept_dict_converter=concept_dict_converter, infer=infer,
+                                             thing_cache=thing_cache)
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_queries) as executor:
+        futures = [executor.submit(build_in_own_transaction, *query_sampler_variable_graph_tuple)
+                   for query_sampler_variable_graph_tuple in query_sampler_variable_graph_tuples]
+        query_concept_graphs = [future.result() for future in futures]
+
+    return combine_query_concept_graphs(query_sampler_variable_graph_tuples, query_concept_graphs)
+
+
+def build_query_concept_graph(query, sampler, variable_graph, grakn_transaction,
+                              concept_dict_converter=concept_dict_to_graph, infer=True, thing_cache=None):
+    """
+    Builds a graph of the answers to a single query
+
+    Args:
+        query: The query to make
+        sampler: A function to sample the answers
+        variable_graph: The graph representing the query
+        grakn_transaction: A Grakn transaction
+        concept_dict_converter: The function to use to convert from concept_dicts to a Grakn model
+        infer: whether to use Grakn's inference engine
+        thing_cache: Optional ThingCache of concepts already built
+
+    Returns:
+        A networkx graph, or None if the query gave no answers
+    """
+    return combine_n_graphs(iterate_answer_graphs(query, sampler, variable_graph, grakn_transaction,
+                                                  concept_dict_converter=concept_dict_converter, infer=infer,
+                                                  thing_cache=thing_cache))
 
-        if len(answer_concept_graphs) > 1:
-            query_concept_graph = combine_n_graphs(answer_concept_graphs)
-            query_concept_graphs.append(query_concept_graph)
+
+def iterate_answer_graphs(query, sampler, variable_graph, grakn_transaction,
+                          concept_dict_converter=concept_dict_to_graph, infer=True, thing_cache=None):
+    """
+    Lazily builds a graph for each answer to a query. Each concept map is only fetched from the answer stream, built
+    into a concept dict and converted to a graph once the previous graph has been consumed, so none of them are
+    gathered into lists. Arguments are as for `build_query_concept_graph`
+
+    Returns:
+        Generator of a networkx graph per answer
+    """
+    concept_maps = sampler(grakn_transaction.query(query, infer=infer))
+
+    concept_dicts = (concept_dict_from_concept_map(concept_map, grakn_transaction, thing_cache=thing_cache)
+                     for concept_map in concept_maps)
+
+    for concept_dict in concept_dicts:
+        try:
+            answer_concept_graph = concept_dict_converter(concept_dict, variable_graph)
+        except ValueError as e:
+            raise ValueError(str(e) + f'Encountered processing query:\n \"{query}\"')
+        yield answer_concept_graph
+
+
+def combine_query_concept_graphs(query_sampler_variable_graph_tuples, query_concept_graphs):
+    """
+    Combines the graphs built for each query into one, warning about any queries that gave no answers
+
+    Args:
+        query_sampler_variable_graph_tuples: A list of tuples, each tuple containing a query, a sampling function,
+            and a variable_graph
+        query_concept_graphs: The graph built for each query, or None if the query gave no answers
+
+    Returns:
+        A networkx graph
+    """
+    graphs_with_answers = []
+    for (query, _, _), query_concept_graph in zip(query_sampler_variable_graph_tuples, query_concept_graphs):
+        if query_concept_graph is None:
+            warnings.warn(f'There were no results for query: \n\"{query}\"\nand so nothing will be added to the '
+                          f'graph for this query')
         else:
-            if len(answer_concept_graphs) > 0:
-                query_concept_graphs.append(answer_concept_graphs[0])
-            else:
-                warnings.warn(f'There were no results for query: \n\"{query}\"\nand so nothing will be added to the '
-                              f'graph for this query')
+            graphs_with_answers.append(query_concept_graph)
 
-    if len(query_concept_graphs) == 0:
+    if len(graphs_with_answers) == 0:
         # Raise exception when none of the queries returned any results
         raise RuntimeError(f'The graph from queries: {[query_sampler_variable_graph_tuple[0] for query_sampler_variable_graph_tuple in query_sampler_variable_graph_tuples]}\n'
                            f'could not be created, since none of these queries returned results')
 
-    concept_graph = combine_n_graphs(query_concept_graphs)
-    return concept_graph
+    return combine_n_graphs(graphs_with_answers)
+
+
+def build_graphs_for_examples(example_ids, get_query_handles, grakn_session, num_workers=4, max_retries=2,
+                              concept_dict_converter=concept_dict_to_graph, infer=True, progress_callback=None,
+                              thing_cache=None):
+    """
+    Builds a graph for each example concurrently, using a bounded pool of worker threads. Each worker opens its own
+    read transaction from `grakn_session` for each example it builds, so examples don't share transactions.
+
+    Args:
+        example_ids: The values used to anchor the subgraph queries for each example
+        get_query_handles: Function taking an example id, giving the query handles (query, sampler and variable_graph
+            tuples) to build that example's graph from
+        grakn_session: A Grakn session
+        num_workers: The maximum number of examples to build at once
+        max_retries: The number of times to retry building an example's graph after an exception before giving up
+        concept_dict_converter: The function to use to convert from concept_dicts to a Grakn model
+        infer: whether to use Grakn's inference engine
+        progress_callback: Optional function called for each example in turn, once its graph is built, with arguments:
+            the example id, the number of examples completed so far and the total number of examples
+        thing_cache: Optional ThingCache to share between all of the examples. If None, each example uses its own
+
+    Returns:
+        A list of networkx graphs, in the same order as `example_ids`
+    """
+    example_ids = list(example_ids)
+    return list(iterate_graphs_for_examples(example_ids, get_query_handles, grakn_session, num_workers=num_workers,
+                                            max_retries=max_retries, concept_dict_converter=concept_dict_converter,
+                                            infer=infer, progress_callback=progress_callback,
+                                            thing_cache=thing_cache, max_pending=max(1, len(example_ids))))
+
+
+def iterate_graphs_for_examples(example_ids, get_query_handles, grakn_session, num_workers=4, max_retries=2,
+                                concept_dict_converter=concept_dict_to_graph, infer=True, progress_callback=None,
+                                thing_cache=None, max_pending=None):
+    """
+    Builds a graph for each example as `build_graphs_for_examples` does, but yields each graph as soon as it and those
+    of the examples before it are built. Only `max_pending` examples are built ahead of the graph last yielded, so if
+    the consumer doesn't keep the graphs, such as when it preprocesses them one by one, they are never all held in
+    memory at once. Arguments are as for `build_graphs_for_examples`, and:
+
+    Args:
+        max_pending: The most examples to be building, or built but not yet yielded, at once. By default, twice
+            `num_workers`
+
+    Returns:
+        Generator of networkx graphs, in the same order as `example_ids`
+    """
+    example_ids = list(example_ids)
+    if max_pending is None:
+        max_pending = 2 * num_workers
+
+    def build_example_graph(example_id):
+        for attempt in range(max_retries + 1):
+            try:
+                with grakn_session.transaction().read() as tx:
+                    return build_graph_from_queries(get_query_handles(example_id), tx,
+                                                    concept_dict_converter=concept_dict_converter, infer=infer,
+                                                    thing_cache=thing_cache)
+            except Exception as e:
+                if attempt == max_retries:
+                    raise RuntimeError(f'Failed to build the graph for example {example_id} after '
+                                       f'{max_retries + 1} attempts') from e
+                warnings.warn(f'Attempt {attempt + 1} to build the graph for example {example_id} failed, '
+                              f'retrying: {e}')
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        example_ids_to_submit = iter(example_ids)
+        pending = deque((example_id, executor.submit(build_example_graph, example_id))
+                        for example_id in itertools.islice(example_ids_to_submit, max_pending))
+        try:
+            for num_completed in range(1, len(example_ids) + 1):
+                example_id, future = pending.popleft()
+                graph = future.result()
+                for next_example_id in itertools.islice(example_ids_to_submit, 1):
+                    pending.append((next_example_id, executor.submit(build_example_graph, next_example_id)))
+                if progress_callback is not None:
+                    progress_callback(example_id, num_completed, len(example_ids))
+                yield graph
+        finally:
+            # Don't start building any more examples if one has failed or the graphs are no longer wanted
+            for _, future in pending:
+                future.cancel()
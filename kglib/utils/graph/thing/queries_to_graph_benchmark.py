@@ -0,0 +1,87 @@
+#
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+#
+
+import time
+from functools import reduce
+
+import networkx as nx
+import numpy as np
+
+from kglib.utils.grakn.object.thing import Thing
+from kglib.utils.graph.thing.queries_to_graph import combine_2_graphs, combine_n_graphs
+
+
+def synthetic_answer_graphs(num_answers, num_people, random_state):
+    """
+    Creates one small graph per answer, as given by `concept_dict_to_graph` for the answers to a query matching an
+    employment between a person with a name and a company. People recur between answers, so the graphs overlap
+    """
+    people = [Thing(f'P{i}', 'person', 'entity') for i in range(num_people)]
+    names = [Thing(f'N{i}', 'name', 'attribute', value_type='string', value=f'name-{i}') for i in range(num_people)]
+    companies = [Thing(f'C{i}', 'company', 'entity') for i in range(max(1, num_people // 10))]
+
+    graphs = []
+    for answer in range(num_answers):
+        person_index = random_state.randint(num_people)
+        person = people[person_index]
+        name = names[person_index]
+        company = companies[random_state.randint(len(companies))]
+        employment = Thing(f'E{answer}', 'employment', 'relation')
+
+        graph = nx.MultiDiGraph()
+        for thing in [person, name, company, employment]:
+            graph.add_node(thing, type=thing.type_label)
+        graph.add_edge(person, name, type='has')
+        graph.add_edge(employment, person, type='employee')
+        graph.add_edge(employment, company, type='employer')
+        graphs.append(graph)
+    return graphs
+
+
+def seconds_to_combine(combine_fn, graphs):
+    start_time = time.time()
+    combined = combine_fn(graphs)
+    return time.time() - start_time, combined
+
+
+def benchmark(answer_counts=(100, 500, 1000), num_people=500):
+    """
+    Compares combining the graphs of the answers to a query pairwise, copying the combined graph at every step, against
+    merging them all in a single pass with `combine_n_graphs`
+
+    Returns:
+        Dict of the number of answers to the seconds taken pairwise and in a single pass
+    """
+    random_state = np.random.RandomState(0)
+    results = {}
+    for num_answers in answer_counts:
+        graphs = synthetic_answer_graphs(num_answers, num_people, random_state)
+
+        pairwise, pairwise_graph = seconds_to_combine(lambda gs: reduce(combine_2_graphs, gs), graphs)
+        single_pass, single_pass_graph = seconds_to_combine(combine_n_graphs, graphs)
+
+        assert set(pairwise_graph.edges(keys=True)) == set(single_pass_graph.edges(keys=True))
+        results[num_answers] = (pairwise, single_pass)
+        print(f'{num_answers} answers: pairwise {pairwise:.3f}s, single pass {single_pass:.3f}s, '
+              f'speedup {pairwise / single_pass:.1f}x')
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
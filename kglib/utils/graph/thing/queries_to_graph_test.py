@@ -17,14 +17,19 @@
 #  under the License.
 #
 
+import time
 import unittest
+import warnings
 
 import networkx as nx
 
-from kglib.utils.grakn.object.thing import Thing
+from kglib.utils.grakn.object.thing import Thing, ThingCache
 from kglib.utils.grakn.test.mock.answer import MockConceptMap
-from kglib.utils.grakn.test.mock.concept import MockType, MockThing
-from kglib.utils.graph.thing.queries_to_graph import concept_dict_from_concept_map, combine_2_graphs
+from kglib.utils.grakn.test.mock.concept import MockType, MockThing, MockAttribute, MockAttributeType
+from kglib.utils.grakn.test.mock.session import MockSession, MockTransaction
+from kglib.utils.graph.thing.queries_to_graph import concept_dict_from_concept_map, combine_2_graphs, combine_n_graphs, \
+    build_graphs_for_examples, build_graph_from_queries, build_graph_from_queries_concurrently, \
+    iterate_answer_graphs, iterate_graphs_for_examples
 from kglib.utils.graph.test.case import GraphTestCase
 
 
@@ -132,5 +137,287 @@ class TestCombineGraphs(GraphTestCase):
                           'In graph b: {\'type\': \'has\', \'input\': 1, \'solution\': 0}'), str(context.exception))
 
 
+class TestCombineNGraphs(GraphTestCase):
+
+    def setUp(self):
+        self._person = Thing('V123', 'person', 'entity')
+        self._name = Thing('V1234', 'name', 'attribute', value_type='string', value='Bob')
+        self._employment = Thing('V567', 'employment', 'relation')
+        self._company = Thing('V890', 'company', 'entity')
+
+    def answer_graphs(self):
+        graph_a = nx.MultiDiGraph(name='a')
+        graph_a.add_node(self._person, input=1)
+        graph_a.add_node(self._name, input=1)
+        graph_a.add_edge(self._person, self._name, type='has', input=1)
+
+        graph_b = nx.MultiDiGraph(name='b')
+        graph_b.add_node(self._employment, input=0)
+        graph_b.add_node(self._person, input=1)
+        graph_b.add_edge(self._employment, self._person, type='employee', input=0)
+
+        graph_c = nx.MultiDiGraph(name='c')
+        graph_c.add_node(self._employment, input=0)
+        graph_c.add_node(self._company, input=1)
+        graph_c.add_node(self._person, input=1)
+        graph_c.add_edge(self._employment, self._company, type='employer', input=0)
+        graph_c.add_edge(self._employment, self._person, type='employee', input=0)
+        return [graph_a, graph_b, graph_c]
+
+    def test_graphs_combined_as_with_pairwise_composition(self):
+        graphs = self.answer_graphs()
+
+        expected_combined_graph = nx.compose(nx.compose(graphs[0], graphs[1]), graphs[2])
+
+        self.assertGraphsEqual(expected_combined_graph, combine_n_graphs(graphs))
+
+    def test_graphs_from_a_generator_are_combined_as_from_a_list(self):
+        expected_combined_graph = combine_n_graphs(self.answer_graphs())
+        self.assertGraphsEqual(expected_combined_graph, combine_n_graphs(graph for graph in self.answer_graphs()))
+
+    def test_no_graphs_gives_none(self):
+        self.assertIsNone(combine_n_graphs(iter([])))
+
+    def test_input_graphs_are_not_modified(self):
+        graphs = self.answer_graphs()
+        combine_n_graphs(graphs)
+        self.assertEqual([2, 2, 3], [graph.number_of_nodes() for graph in graphs])
+        self.assertEqual([1, 1, 2], [graph.number_of_edges() for graph in graphs])
+
+    def test_mismatch_with_a_later_graph_raises_exception(self):
+        graphs = self.answer_graphs()
+        graphs[2].add_edge(self._person, self._name, type='has', input=0)
+        graphs[2].nodes[self._name]['input'] = 1
+
+        with self.assertRaises(ValueError) as context:
+            combine_n_graphs(graphs)
+
+        self.assertIn('Found non-matching edge properties for edge (<person, V123>, <name, V1234: Bob>, 0)',
+                      str(context.exception))
+
+
+def example_query(example_id):
+    return f'match $x isa person, has example-id {example_id}; get;'
+
+
+def get_example_query_handles(example_id):
+    variable_graph = nx.MultiDiGraph()
+    variable_graph.add_node('x')
+    return [(example_query(example_id), lambda x: x, variable_graph)]
+
+
+def example_answers(example_ids):
+    return {example_query(example_id): [MockConceptMap({'x': MockThing(f'V{example_id}',
+                                                                        MockType('V4123', 'person', 'ENTITY'))})]
+            for example_id in example_ids}
+
+
+class TestBuildGraphsForExamples(GraphTestCase):
+
+    def test_graphs_are_built_in_order_of_example_ids(self):
+        example_ids = [5, 3, 8, 1, 0, 9, 2]
+        session = MockSession(example_answers(example_ids))
+
+        graphs = build_graphs_for_examples(example_ids, get_example_query_handles, session, num_workers=3)
+
+        self.assertEqual([[Thing(f'V{example_id}', 'person', 'entity')] for example_id in example_ids],
+                         [list(graph.nodes) for graph in graphs])
+
+    def test_each_example_uses_its_own_transaction(self):
+        example_ids = list(range(6))
+        session = MockSession(example_answers(example_ids))
+
+        build_graphs_for_examples(example_ids, get_example_query_handles, session, num_workers=3)
+
+        self.assertEqual(6, session.transactions_opened)
+
+    def test_progress_is_reported_for_every_example(self):
+        example_ids = list(range(6))
+        session = MockSession(example_answers(example_ids))
+        progress = []
+
+        build_graphs_for_examples(example_ids, get_example_query_handles, session, num_workers=3,
+                                  progress_callback=lambda *args: progress.append(args))
+
+        self.assertCountEqual(example_ids, [example_id for example_id, _, _ in progress])
+        self.assertEqual([(i + 1, 6) for i in range(6)], [(completed, total) for _, completed, total in progress])
+
+    def test_failed_example_is_retried(self):
+        example_ids = [0, 1]
+        answers = example_answers(example_ids)
+        failures = {1: 2}
+
+        def get_flaky_query_handles(example_id):
+            if failures.get(example_id, 0) > 0:
+                failures[example_id] -= 1
+                raise ConnectionError('Lost connection')
+            return get_example_query_handles(example_id)
+
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            graphs = build_graphs_for_examples(example_ids, get_flaky_query_handles, MockSession(answers),
+                                               max_retries=2)
+
+        self.assertEqual([Thing('V1', 'person', 'entity')], list(graphs[1].nodes))
+
+    def test_exception_raised_when_retries_are_exhausted(self):
+        session = MockSession(example_answers([0]))
+
+        def get_failing_query_handles(example_id):
+            raise ConnectionError('Lost connection')
+
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            with self.assertRaises(RuntimeError) as context:
+                build_graphs_for_examples([0], get_failing_query_handles, session, max_retries=1)
+
+        self.assertEqual('Failed to build the graph for example 0 after 2 attempts', str(context.exception))
+
+
+class TestIterateGraphsForExamples(GraphTestCase):
+
+    def test_graphs_are_yielded_as_from_build_graphs_for_examples(self):
+        example_ids = [5, 3, 8, 1, 0, 9, 2]
+        session = MockSession(example_answers(example_ids))
+
+        graphs = iterate_graphs_for_examples(example_ids, get_example_query_handles, session, num_workers=3)
+
+        self.assertEqual([[Thing(f'V{example_id}', 'person', 'entity')] for example_id in example_ids],
+                         [list(graph.nodes) for graph in graphs])
+
+    def test_only_a_bounded_number_of_examples_are_built_ahead(self):
+        example_ids = list(range(10))
+        session = MockSession(example_answers(example_ids))
+
+        graphs = iterate_graphs_for_examples(example_ids, get_example_query_handles, session, num_workers=1,
+                                             max_pending=2)
+        next(graphs)
+        # Wait for the examples in flight to be built, so that any more than the bound would have been started too
+        time.sleep(0.1)
+
+        self.assertLessEqual(session.transactions_opened, 3)
+        self.assertEqual(9, len(list(graphs)))
+
+
+class TestIterateAnswerGraphs(GraphTestCase):
+
+    def test_answers_are_fetched_as_graphs_are_consumed(self):
+        person = MockThing('V123', MockType('V4123', 'person', 'ENTITY'))
+        query = 'match $x isa person; get;'
+        fetched = []
+
+        def sampler(concept_maps):
+            for concept_map in concept_maps:
+                fetched.append(concept_map)
+                yield concept_map
+
+        variable_graph = nx.MultiDiGraph()
+        variable_graph.add_node('x')
+        answer_graphs = iterate_answer_graphs(query, sampler, variable_graph,
+                                              MockTransaction({query: [MockConceptMap({'x': person})] * 3}))
+
+        next(answer_graphs)
+        self.assertEqual(1, len(fetched))
+        self.assertEqual(2, len(list(answer_graphs)))
+        self.assertEqual(3, len(fetched))
+
+
+class TestBuildGraphFromQueries(GraphTestCase):
+
+    def setUp(self):
+        person = MockThing('V123', MockType('V4123', 'person', 'ENTITY'))
+        parentship = MockThing('V567', MockType('V9876', 'parentship', 'RELATION'))
+        name = MockAttribute('V987', 'Bob', MockAttributeType('V555', 'name', 'ATTRIBUTE', 'STRING'))
+        age = MockAttribute('V988', 42, MockAttributeType('V556', 'age', 'ATTRIBUTE', 'LONG'))
+
+        self._answers = {
+            'match $x id V123; get;': [MockConceptMap({'x': person})],
+            'match $x id V123, has name $n; get;': [MockConceptMap({'x': person, 'n': name})],
+            'match $x id V123, has age $a; get;': [MockConceptMap({'x': person, 'a': age})],
+            'match $x id V123; $r(child: $x, parent: $y); get;': [MockConceptMap({'x': person, 'y': person,
+                                                                                  'r': parentship})],
+        }
+
+    def query_handles(self):
+        g1 = nx.MultiDiGraph()
+        g1.add_node('x')
+
+        g2 = nx.MultiDiGraph()
+        g2.add_node('x')
+        g2.add_node('n')
+        g2.add_edge('x', 'n', type='has')
+
+        g3 = nx.MultiDiGraph()
+        g3.add_node('x')
+        g3.add_node('a')
+        g3.add_edge('x', 'a', type='has')
+
+        g4 = nx.MultiDiGraph()
+        g4.add_node('x')
+        g4.add_node('r')
+        g4.add_node('y')
+        g4.add_edge('r', 'x', type='child')
+        g4.add_edge('r', 'y', type='parent')
+
+        queries = list(self._answers.keys())
+        return [(query, lambda x: x, graph) for query, graph in zip(queries, [g1, g2, g3, g4])]
+
+    def test_graph_matches_graph_built_sequentially(self):
+        expected_graph = build_graph_from_queries(self.query_handles(), MockTransaction(self._answers))
+
+        graph = build_graph_from_queries_concurrently(self.query_handles(), MockSession(self._answers))
+
+        self.assertGraphsEqual(expected_graph, graph)
+
+    def test_each_query_uses_its_own_transaction(self):
+        session = MockSession(self._answers)
+
+        build_graph_from_queries_concurrently(self.query_handles(), session)
+
+        self.assertEqual(4, session.transactions_opened)
+
+    def test_queries_are_made_concurrently(self):
+        latency = 0.2
+
+        start_time = time.time()
+        build_graph_from_queries(self.query_handles(), MockTransaction(self._answers, latency=latency))
+        sequential_time = time.time() - start_time
+
+        start_time = time.time()
+        build_graph_from_queries_concurrently(self.query_handles(), MockSession(self._answers, latency=latency),
+                                              max_concurrent_queries=4)
+        concurrent_time = time.time() - start_time
+
+        self.assertGreaterEqual(sequential_time, 4 * latency)
+        self.assertLess(concurrent_time, 2 * latency)
+
+    def test_number_of_concurrent_queries_is_bounded(self):
+        latency = 0.2
+
+        start_time = time.time()
+        build_graph_from_queries_concurrently(self.query_handles(), MockSession(self._answers, latency=latency),
+                                              max_concurrent_queries=2)
+        concurrent_time = time.time() - start_time
+
+        self.assertGreaterEqual(concurrent_time, 2 * latency)
+
+    def test_concepts_are_built_once_across_queries(self):
+        thing_cache = ThingCache()
+
+        build_graph_from_queries(self.query_handles(), MockTransaction(self._answers), thing_cache=thing_cache)
+
+        # 8 concepts are given in the answers, 4 of them distinct
+        self.assertEqual(dict(hits=4, misses=4, type_hits=0, type_misses=4), thing_cache.stats())
+
+    def test_warning_given_when_one_query_gives_no_results(self):
+        self._answers['match $x id V123, has age $a; get;'] = []
+
+        with self.assertWarns(UserWarning) as context:
+            build_graph_from_queries_concurrently(self.query_handles(), MockSession(self._answers))
+
+        self.assertEqual('There were no results for query: \n"match $x id V123, has age $a; get;"\nand so nothing '
+                         'will be added to the graph for this query', str(context.warning))
+
+
 if __name__ == "__main__":
     unittest.main()